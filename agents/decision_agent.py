@@ -7,11 +7,15 @@ from langchain.prompts import ChatPromptTemplate
 from prompts.human_prompts import DECISION_HUMAN_PROMPT
 from app.context import SOCWorkflowState, DecisionResult, Verdict, Priority, AlertStatus
 from app.config import settings
-from app.llm_factory import get_llm
+from app.llm_factory import get_llm, get_cascade_llm
+from app.llm_gateway import field_emitter
+from app.cascade import ainvoke_cascade
 import json
 from datetime import datetime
 import asyncio
 
+DECISION_RESULT_FIELDS = ("final_verdict", "priority", "confidence", "rationale", "recommended_actions", "escalation_required", "estimated_impact")
+
 
 class DecisionAgent:
     """Agent responsible for making final decisions on alerts"""
@@ -23,6 +27,12 @@ class DecisionAgent:
             model=ai_model,
             api_key=api_key
         )
+        self.cascade_llm = get_cascade_llm(
+            temperature=settings.decision_temperature,
+            provider=ai_provider,
+            model=ai_model,
+            api_key=api_key
+        )
         self.prompt_template = self._load_prompt()
     
     def _load_prompt(self) -> ChatPromptTemplate:
@@ -94,8 +104,6 @@ class DecisionAgent:
                 "investigation_summary": self._format_investigation_summary(state)
             }
             
-            # Create chain and invoke
-            chain = self.prompt_template | self.llm
             if event_callback:
                 event_callback(state.workflow_id, {"type": "progress", "stage": "decide", "status": "processing"})
             
@@ -128,13 +136,10 @@ class DecisionAgent:
                 await asyncio.sleep(settings.mock_data_delay)
                 return state
             else:
-                response = await asyncio.wait_for(chain.ainvoke(prompt_vars), timeout=settings.llm_timeout_seconds)  # Set a configurable timeout
-            
-            if not response or not response.content:
-                raise ValueError("LLM invocation failed or returned an empty response")
-
-            # Parse response
-            result_dict = self._parse_response(response.content)
+                result_dict = await ainvoke_cascade(
+                    "decision", self.cascade_llm, self.llm, self.prompt_template, prompt_vars, self._parse_response,
+                    DECISION_RESULT_FIELDS, on_field=field_emitter(event_callback, state.workflow_id, "decision")
+                )
             
             # Create DecisionResult
             decision_result = DecisionResult(
@@ -7,7 +7,12 @@ from langchain.prompts import ChatPromptTemplate
 from prompts.human_prompts import INVESTIGATION_HUMAN_PROMPT
 from app.context import SOCWorkflowState, InvestigationResult, AlertStatus
 from app.config import settings
+from app.correlation import correlation_index, format_related
 from app.llm_factory import get_llm
+from app.llm_gateway import ainvoke_llm, field_emitter
+from app.prompt_compaction import render_raw_data
+from app.threat_intel import ThreatIntelStore, candidate_domains, candidate_ips, evidence_entities, get_threat_intel_store
+from app.tracing import tracer
 import json
 from datetime import datetime
 import asyncio
@@ -16,7 +21,7 @@ import asyncio
 class InvestigationAgent:
     """Agent responsible for deep threat investigation"""
     
-    def __init__(self, threat_intel_path: str = "data/threat_intel.json", ai_provider=None, ai_model=None, api_key=None):
+    def __init__(self, threat_intel_path: str | None = None, ai_provider=None, ai_model=None, api_key=None):
         self.llm = get_llm(
             temperature=settings.investigation_temperature,
             provider=ai_provider,
@@ -25,7 +30,6 @@ class InvestigationAgent:
         )
         self.prompt_template = self._load_prompt()
         self.threat_intel_path = threat_intel_path
-        self.threat_intel = self._load_threat_intel()
     
     def _load_prompt(self) -> ChatPromptTemplate:
         """Load investigation agent prompt"""
@@ -39,33 +43,50 @@ class InvestigationAgent:
         
         return prompt
     
-    def _load_threat_intel(self) -> Dict[str, Any]:
-        """Load threat intelligence data"""
-        try:
-            with open(self.threat_intel_path, "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+    @property
+    def threat_intel(self) -> ThreatIntelStore:
+        """Current threat intelligence snapshot (hot-reloaded)"""
+        return get_threat_intel_store(self.threat_intel_path)
     
-    def _get_relevant_threat_intel(self, state: SOCWorkflowState) -> str:
+    def _get_relevant_threat_intel(self, state: SOCWorkflowState, threat_intel: ThreatIntelStore | None = None) -> str:
         """Get relevant threat intelligence for the alert"""
-        if not self.threat_intel:
+        threat_intel = threat_intel or self.threat_intel
+        if not threat_intel.data and not threat_intel.iocs:
             return "No threat intelligence data available"
         
         alert = state.alert
         relevant_intel = []
         
-        # Check for IP-based intelligence
-        if alert.assets.source_ip:
-            for intel in self.threat_intel.get("malicious_ips", []):
-                if intel["ip"] == alert.assets.source_ip:
-                    relevant_intel.append(f"- Source IP {intel['ip']}: {intel['description']} (Confidence: {intel['confidence']})")
-        
-        # Check for technique-based intelligence
-        for technique in alert.mitre.techniques:
-            for intel in self.threat_intel.get("attack_patterns", []):
-                if technique in intel.get("techniques", []):
-                    relevant_intel.append(f"- {intel['name']}: {intel['description']}")
+        with tracer.span("threat_intel.lookup", source_ip=alert.assets.source_ip, techniques=len(alert.mitre.techniques), version=threat_intel.version) as span:
+            # Check for IP-based intelligence (exact indicators, then listed CIDR ranges) across every entity.
+            # Evidence is only scanned for kinds the snapshot has indicators for, and internal addresses are
+            # dropped before probing; the prefilter rejects most of what remains without touching the indexes
+            source_ips = candidate_ips(alert)
+            has_domains = threat_intel.has_domain_indicators
+            evidence_ips, evidence_domains = evidence_entities(alert, threat_intel.has_ip_indicators, has_domains)
+            for ip in dict.fromkeys(source_ips + evidence_ips):
+                label = "Source IP" if ip in source_ips else "IP"
+                matches = threat_intel.lookup_ip(ip)
+                for intel in matches.exact:
+                    relevant_intel.append(f"- {label} {ip}: {intel.get('description', 'listed indicator')} (Confidence: {intel.get('confidence', 'unknown')})")
+                for match in matches.ranges:
+                    name = match.entry.get("name") or match.entry.get("description", "listed range")
+                    relevant_intel.append(f"- {label} {ip} is within {match.cidr}: {name}")
+            for domain in dict.fromkeys(candidate_domains(alert) + evidence_domains) if has_domains else ():
+                for intel in threat_intel.lookup_domain(domain):
+                    relevant_intel.append(f"- Domain {domain}: {intel.get('description', 'listed indicator')} (Confidence: {intel.get('confidence', 'unknown')})")
+            
+            # Check for technique-based intelligence (parent and sub-techniques included)
+            techniques = threat_intel.lookup_techniques(alert.mitre.techniques)
+            for technique, intel in techniques.patterns:
+                related = "" if technique in intel.get("techniques", []) else f" (related to {technique})"
+                relevant_intel.append(f"- {intel['name']}: {intel['description']}{related}")
+            for technique, actor in techniques.actors:
+                relevant_intel.append(f"- Threat actor {actor['name']} uses {technique} or related techniques")
+            for technique_id, entry in techniques.techniques:
+                relevant_intel.append(f"- {technique_id} {entry.get('name', '')}: {entry.get('description', '')}")
+            if span:
+                span.set_attribute("matches", len(relevant_intel))
         
         if relevant_intel:
             return "\n".join(relevant_intel)
@@ -87,7 +108,10 @@ class InvestigationAgent:
             
             # Prepare prompt variables
             alert = state.alert
+            raw_data = render_raw_data(alert.raw_data, self.llm)
             triage = state.triage_result
+            threat_intel = self.threat_intel  # one snapshot for the whole investigation
+            related = correlation_index.related(alert, state.workflow_id) if settings.correlation_enabled else []
             
             prompt_vars = {
                 "alert_id": alert.alert_id,
@@ -106,12 +130,12 @@ class InvestigationAgent:
                 "triage_confidence": triage.confidence if triage else "N/A",
                 "key_indicators": ", ".join(triage.key_indicators) if triage and triage.key_indicators else "None",
                 "triage_reasoning": triage.reasoning if triage else "N/A",
-                "threat_intel": self._get_relevant_threat_intel(state),
-                "raw_data": json.dumps(alert.raw_data, indent=2) if alert.raw_data else "No additional data"
+                "threat_intel": self._get_relevant_threat_intel(state, threat_intel),
+                "related_alerts": format_related(related),
+                "raw_data": raw_data.text
             }
+            state.prompt_tokens_saved["investigation"] = raw_data.tokens_saved
             
-            # Create chain and invoke
-            chain = self.prompt_template | self.llm
             if event_callback:
                 event_callback(state.workflow_id, {"type": "progress", "stage": "investigate", "status": "processing"})
 
@@ -130,10 +154,11 @@ class InvestigationAgent:
                 investigation_result = InvestigationResult(
                     findings=mock_data["findings"],
                     threat_context=mock_data["threat_context"],
-                    related_alerts=mock_data["related_alerts"],
+                    related_alerts=[r.alert_id for r in related] if settings.correlation_enabled else mock_data["related_alerts"],
                     attack_chain=mock_data["attack_chain"],
                     risk_score=mock_data["risk_score"],
                     evidence=mock_data["evidence"],
+                    threat_intel_version=threat_intel.version,
                     timestamp=mock_data["timestamp"]
                 )
                 state.investigation_result = investigation_result
@@ -141,23 +166,21 @@ class InvestigationAgent:
                 await asyncio.sleep(settings.mock_data_delay)
                 return state
             else:
-                response = await asyncio.wait_for(chain.ainvoke(prompt_vars), timeout=settings.llm_timeout_seconds)  # Set a configurable timeout
-            
-            if not response or not response.content:
-                raise ValueError("LLM invocation failed or returned an empty response")
-
-
-            # Parse response
-            result_dict = self._parse_response(response.content)
+                result_dict = await ainvoke_llm(
+                    "investigation", self.llm, self.prompt_template, prompt_vars, self._parse_response,
+                    on_field=field_emitter(event_callback, state.workflow_id, "investigation")
+                )
             
             # Create InvestigationResult
             investigation_result = InvestigationResult(
                 findings=result_dict["findings"],
                 threat_context=result_dict["threat_context"],
-                related_alerts=result_dict["related_alerts"],
+                # The correlation index is authoritative; the model never sees other workflows
+                related_alerts=[r.alert_id for r in related] if settings.correlation_enabled else result_dict["related_alerts"],
                 attack_chain=result_dict["attack_chain"],
                 risk_score=result_dict["risk_score"],
                 evidence=result_dict["evidence"],
+                threat_intel_version=threat_intel.version,
                 timestamp=datetime.utcnow().isoformat()
             )
             
@@ -8,6 +8,7 @@ from prompts.human_prompts import RESPONSE_HUMAN_PROMPT
 from app.context import SOCWorkflowState, ResponseResult, AlertStatus, Priority
 from app.config import settings
 from app.llm_factory import get_llm
+from app.llm_gateway import ainvoke_llm, field_emitter
 import json
 from datetime import datetime
 import uuid
@@ -189,8 +190,6 @@ class ResponseAgent:
                 "rationale": decision.rationale
             }
             
-            # Create chain and invoke
-            chain = self.prompt_template | self.llm
             if event_callback:
                 event_callback(state.workflow_id, {"type": "progress", "stage": "respond", "status": "processing"})
             
@@ -221,14 +220,10 @@ class ResponseAgent:
                 await asyncio.sleep(settings.mock_data_delay)
                 return state
             else:
-                response = await asyncio.wait_for(chain.ainvoke(prompt_vars), timeout=settings.llm_timeout_seconds)  # Set a configurable timeout
-            
-            if not response or not response.content:
-                raise ValueError("LLM invocation failed or returned an empty response")
-
-            
-            # Parse response
-            result_dict = self._parse_response(response.content)
+                result_dict = await ainvoke_llm(
+                    "response", self.llm, self.prompt_template, prompt_vars, self._parse_response,
+                    on_field=field_emitter(event_callback, state.workflow_id, "response")
+                )
             
             # Simulate actual actions (in production, this would execute real actions)
             simulated = self._simulate_actions(state)
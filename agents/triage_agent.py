@@ -2,16 +2,164 @@
 Triage Agent - Level 1 SOC Alert Triage and Noise Filtering
 """
 
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
 from langchain.prompts import ChatPromptTemplate
 from app.context import SOCWorkflowState, TriageResult, Verdict, AlertStatus
 from app.config import settings
-from app.llm_factory import get_llm
+from app.llm_factory import get_llm, get_cascade_llm
+from app.llm_gateway import ainvoke_llm, field_emitter, lookup_cached, remember
+from app.prompt_compaction import render_raw_data
+from app.cascade import ainvoke_cascade
 import json
+import logging
 from datetime import datetime
-from prompts.human_prompts import TRIAGE_AGENT_HUMAN_PROMPT
+from prompts.human_prompts import TRIAGE_AGENT_HUMAN_PROMPT, TRIAGE_BATCH_HUMAN_PROMPT, TRIAGE_BATCH_ALERT_BLOCK
 import asyncio
 
+logger = logging.getLogger(__name__)
+
+TRIAGE_RESULT_FIELDS = ("verdict", "confidence", "reasoning", "noise_score", "requires_investigation", "key_indicators")
+
+# Batched triage counters (shared across orchestrators)
+batch_stats = {
+    "batches": 0,
+    "batched_alerts": 0,
+    "cache_hits": 0,
+    "single_calls": 0,
+    "fallback_alerts": 0,
+    "failed_batches": 0,
+}
+
+
+class TriageBatcher:
+    """Collects triage requests for a short window and classifies them in one LLM call.
+
+    A batch is flushed when it reaches ``max_size`` or ``max_wait_ms`` after its first
+    alert. The JSON array response is split back into per-alert results; alerts
+    missing from a malformed response fall back to individual triage calls.
+    """
+
+    def __init__(self, agent: "TriageAgent", max_size: int, max_wait_ms: int):
+        self.agent = agent
+        self.max_size = max(1, max_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to running batches; the event loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, prompt_vars: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue one alert's prompt variables and wait for its parsed triage result"""
+        cached = await lookup_cached("triage", self.agent.llm, self.agent.prompt_template, prompt_vars, self.agent._parse_response)
+        if cached is not None:
+            batch_stats["cache_hits"] += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt_vars, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush_now)
+        return await future
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        error: Optional[BaseException] = None
+        try:
+            await self._classify_batch(batch)
+        except Exception as e:
+            logger.error(f"Batched triage of {len(batch)} alerts failed: {str(e)}")
+            error = e
+        finally:
+            # Nothing may be left waiting: an unresolved future hangs its workflow and scheduler slot
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error or RuntimeError("Batched triage ended without a result"))
+
+    async def _classify_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        if len(batch) == 1:
+            batch_stats["single_calls"] += 1
+            await self._run_single(*batch[0])
+            return
+
+        batch_stats["batches"] += 1
+        batch_stats["batched_alerts"] += len(batch)
+        alerts_text = "\n".join(
+            TRIAGE_BATCH_ALERT_BLOCK.format(index=i, **prompt_vars)
+            for i, (prompt_vars, _) in enumerate(batch, 1)
+        )
+        try:
+            results = await ainvoke_llm(
+                "triage_batch",
+                self.agent.llm,
+                self.agent.batch_prompt_template,
+                {"alert_count": len(batch), "alerts": alerts_text},
+                self._parse_batch_response,
+            )
+        except Exception as e:
+            logger.warning(f"Batched triage of {len(batch)} alerts failed, falling back to per-alert calls: {str(e)}")
+            batch_stats["failed_batches"] += 1
+            results = {}
+
+        # Resolve every future before caching, so a cache error cannot hold anyone back
+        fallbacks, resolved = [], []
+        for prompt_vars, future in batch:
+            result = results.get(prompt_vars["alert_id"])
+            if result is None:
+                fallbacks.append(self._run_single(prompt_vars, future))
+                continue
+            if not future.done():
+                future.set_result(result)
+            resolved.append((prompt_vars, result))
+
+        if fallbacks:
+            batch_stats["fallback_alerts"] += len(fallbacks)
+            await asyncio.gather(*fallbacks)
+        for prompt_vars, result in resolved:
+            await remember("triage", self.agent.llm, self.agent.prompt_template, prompt_vars, json.dumps(result))
+
+    async def _run_single(self, prompt_vars: Dict[str, Any], future: asyncio.Future) -> None:
+        try:
+            result = await ainvoke_llm("triage", self.agent.llm, self.agent.prompt_template, prompt_vars, self.agent._parse_response)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _parse_batch_response(content: str) -> Dict[str, Dict[str, Any]]:
+        """Parse a JSON array of triage results into {alert_id: result}, keeping only complete entries"""
+        start_idx = content.find("[")
+        end_idx = content.rfind("]") + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            raise ValueError("No JSON array found in batched triage response")
+        try:
+            items = json.loads(content[start_idx:end_idx])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse batched triage response: {str(e)}")
+
+        results = {}
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and item.get("alert_id") and all(field in item for field in TRIAGE_RESULT_FIELDS):
+                results[item["alert_id"]] = {field: item[field] for field in TRIAGE_RESULT_FIELDS}
+        if not results:
+            raise ValueError("Batched triage response contained no usable results")
+        return results
+
 
 class TriageAgent:
     """Agent responsible for initial alert triage and noise filtering"""
@@ -21,19 +169,35 @@ class TriageAgent:
             temperature=settings.triage_temperature,
             provider=ai_provider,
             model=ai_model,
-            api_key=api_key,
-            stream=True  # Enable streaming for real-time updates
+            api_key=api_key
+        )
+        self.cascade_llm = get_cascade_llm(
+            temperature=settings.triage_temperature,
+            provider=ai_provider,
+            model=ai_model,
+            api_key=api_key
         )
         self.prompt_template = self._load_prompt()
+        self.batch_prompt_template = self._load_prompt(TRIAGE_BATCH_HUMAN_PROMPT)
+        self.batcher = (
+            # No more alerts than the scheduler runs at once can be waiting in triage, so a larger batch would
+            # never fill and every batch would wait the full max_wait_ms
+            TriageBatcher(
+                self,
+                min(settings.triage_batch_max_size, settings.max_concurrent_alerts),
+                settings.triage_batch_max_wait_ms,
+            )
+            if settings.triage_batch_enabled else None
+        )
     
-    def _load_prompt(self) -> ChatPromptTemplate:
+    def _load_prompt(self, human_prompt: str = TRIAGE_AGENT_HUMAN_PROMPT) -> ChatPromptTemplate:
         """Load triage agent prompt"""
         with open("prompts/triage_agent.md", "r") as f:
             system_prompt = f.read()
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", system_prompt),
-            ("human", TRIAGE_AGENT_HUMAN_PROMPT)
+            ("human", human_prompt)
         ])
         
         return prompt
@@ -50,6 +214,7 @@ class TriageAgent:
 
             # Prepare prompt variables
             alert = state.alert
+            raw_data = render_raw_data(alert.raw_data, self.llm)
             prompt_vars = {
                 "alert_id": alert.alert_id,
                 "rule_id": alert.rule_id,
@@ -63,11 +228,10 @@ class TriageAgent:
                 "source_ip": alert.assets.source_ip or "N/A",
                 "destination_ip": alert.assets.destination_ip or "N/A",
                 "user": alert.assets.user or "N/A",
-                "raw_data": json.dumps(alert.raw_data, indent=2) if alert.raw_data else "No additional data"
+                "raw_data": raw_data.text
             }
+            state.prompt_tokens_saved["triage"] = raw_data.tokens_saved
 
-            # Create chain and invoke with timeout
-            chain = self.prompt_template | self.llm
             if not state.enable_ai:
                 # Fallback to mock data
                 mock_data = {
@@ -99,13 +263,13 @@ class TriageAgent:
                 await asyncio.sleep(settings.mock_data_delay)
                 return state
             else:
-                response = await asyncio.wait_for(chain.ainvoke(prompt_vars), timeout=settings.llm_timeout_seconds)  # Set a configurable timeout
-
-            if not response or not response.content:
-                raise ValueError("LLM invocation failed or returned an empty response")
-
-            # Parse response
-            result_dict = self._parse_response(response.content)
+                if self.batcher:
+                    result_dict = await self.batcher.submit(prompt_vars)
+                else:
+                    result_dict = await ainvoke_cascade(
+                        "triage", self.cascade_llm, self.llm, self.prompt_template, prompt_vars, self._parse_response,
+                        TRIAGE_RESULT_FIELDS, on_field=field_emitter(event_callback, state.workflow_id, "triage")
+                    )
 
             # Create TriageResult
             triage_result = TriageResult(
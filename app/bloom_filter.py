@@ -0,0 +1,67 @@
+"""
+Bloom Filter - Compact probabilistic set membership for indicator prefiltering
+Sized from an expected item count and a target false-positive rate; positions
+come from one 128-bit BLAKE2b digest split into two hashes (double hashing),
+so a filter written to disk reads back identically in every process. The bit
+array can be an in-memory bytearray or a read-only buffer such as an mmap.
+"""
+
+from typing import Any, Dict, Optional
+import hashlib
+import math
+
+
+def optimal_parameters(capacity: int, fp_rate: float) -> tuple:
+    """(bits, hashes) for ``capacity`` items at ``fp_rate`` false positives"""
+    capacity = max(1, capacity)
+    fp_rate = min(max(fp_rate, 1e-9), 0.5)
+    bits = max(64, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class BloomFilter:
+    """Bloom filter over byte-string keys"""
+
+    def __init__(self, bits: int, hashes: int, buffer: Optional[Any] = None):
+        self.num_bits = bits
+        self.num_hashes = hashes
+        self._bits = buffer if buffer is not None else bytearray((bits + 7) // 8)
+        self.items = 0
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        return cls(*optimal_parameters(capacity, fp_rate))
+
+    @staticmethod
+    def _hashes(key: bytes) -> tuple:
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=16).digest(), "little")
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, key: bytes) -> None:
+        h1, h2 = self._hashes(key)
+        bits, m = self._bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % m
+            bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        h1, h2 = self._hashes(key)
+        bits, m = self._bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % m
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "size_bytes": len(self._bits),
+            "items": self.items,
+        }
@@ -0,0 +1,141 @@
+"""
+Model Cascade - Small model first, escalate to the primary model on doubt
+Stages with a confidence score (triage, decision) ask the configured cascade
+model first and only re-run on the agent's primary model when the answer cannot
+be parsed, misses required fields or is below the confidence threshold. A
+failing cascade call (timeout, provider error, unknown model) also escalates,
+so the cascade model can never take down a stage whose primary model is healthy.
+"""
+
+from typing import Dict, Any, Callable, Optional, Sequence
+from langchain.prompts import ChatPromptTemplate
+from app.config import settings
+from app.llm_gateway import ainvoke_llm, FieldCallback
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeStats:
+    """Per-stage cascade counters and latencies"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def _stage(self, stage: str) -> Dict[str, float]:
+        if stage not in self.stages:
+            self.stages[stage] = {
+                "calls": 0,
+                "accepted": 0,
+                "escalated_low_confidence": 0,
+                "escalated_parse_failure": 0,
+                "escalated_error": 0,
+                "small_seconds": 0.0,
+                "primary_seconds": 0.0,
+                "primary_calls": 0,
+            }
+        return self.stages[stage]
+
+    def record(self, stage: str, outcome: str, small_seconds: float, primary_seconds: Optional[float] = None) -> None:
+        counters = self._stage(stage)
+        counters["calls"] += 1
+        counters[outcome] += 1
+        counters["small_seconds"] += small_seconds
+        if primary_seconds is not None:
+            counters["primary_calls"] += 1
+            counters["primary_seconds"] += primary_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Escalation rate and latency saved, estimated from the primary model's observed latency"""
+        report = {}
+        for stage, c in self.stages.items():
+            escalated = c["escalated_low_confidence"] + c["escalated_parse_failure"] + c["escalated_error"]
+            avg_small = c["small_seconds"] / c["calls"] if c["calls"] else 0.0
+            avg_primary = c["primary_seconds"] / c["primary_calls"] if c["primary_calls"] else None
+            saved = None
+            if avg_primary is not None:
+                # Accepted calls skipped the primary model; escalated calls paid for the small one too
+                saved = c["accepted"] * (avg_primary - avg_small) - escalated * avg_small
+            report[stage] = {
+                "calls": int(c["calls"]),
+                "accepted": int(c["accepted"]),
+                "escalated_low_confidence": int(c["escalated_low_confidence"]),
+                "escalated_parse_failure": int(c["escalated_parse_failure"]),
+                "escalated_error": int(c["escalated_error"]),
+                "escalation_rate": round(escalated / c["calls"], 3) if c["calls"] else 0.0,
+                "avg_small_seconds": round(avg_small, 3),
+                "avg_primary_seconds": round(avg_primary, 3) if avg_primary is not None else None,
+                "latency_saved_seconds": round(saved, 3) if saved is not None else None,
+            }
+        return {"enabled": settings.cascade_enabled, "threshold": settings.cascade_confidence_threshold, "stages": report}
+
+
+def _escalation_reason(result: Dict[str, Any], required_fields: Sequence[str]) -> Optional[str]:
+    """Why a small-model result cannot be accepted, or None if it can"""
+    if any(field not in result for field in required_fields):
+        return "escalated_parse_failure"
+    try:
+        confidence = float(result.get("confidence"))
+    except (TypeError, ValueError):
+        return "escalated_parse_failure"
+    if confidence < settings.cascade_confidence_threshold:
+        return "escalated_low_confidence"
+    return None
+
+
+async def ainvoke_cascade(
+    agent: str,
+    small_llm: Optional[Any],
+    llm: Any,
+    prompt_template: ChatPromptTemplate,
+    prompt_vars: Dict[str, Any],
+    parse: Callable[[str], Dict[str, Any]],
+    required_fields: Sequence[str],
+    on_field: Optional[FieldCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Invoke the cascade model first and escalate to the primary model on doubt.
+
+    Args:
+        agent: Agent name, used for metrics and the gateway cache TTL
+        small_llm: Cascade model from get_cascade_llm, or None to call ``llm`` directly
+        llm: The agent's primary model
+        prompt_template: The agent's prompt template
+        prompt_vars: Variables used to render the prompt
+        parse: Agent parser turning response text into a result dict
+        required_fields: Fields the result must contain, including ``confidence``
+        on_field: Streaming callback; only the primary model streams, so an escalated
+            answer never contradicts fields already pushed to the UI
+
+    Returns:
+        Parsed result dict from whichever model was accepted
+    """
+    if small_llm is None:
+        return await ainvoke_llm(agent, llm, prompt_template, prompt_vars, parse, on_field=on_field)
+
+    started = time.monotonic()
+    try:
+        result = await ainvoke_llm(agent, small_llm, prompt_template, prompt_vars, parse)
+        reason = _escalation_reason(result, required_fields)
+    except ValueError as e:
+        logger.info(f"{agent} cascade model response unusable, escalating: {str(e)}")
+        reason = "escalated_parse_failure"
+    except Exception as e:
+        # Timeouts, provider errors after retries, bad model names; cancellation is not an Exception
+        logger.warning(f"{agent} cascade model call failed, escalating: {type(e).__name__}: {str(e)}")
+        reason = "escalated_error"
+    small_seconds = time.monotonic() - started
+
+    if reason is None:
+        cascade_stats.record(agent, "accepted", small_seconds)
+        return result
+
+    started = time.monotonic()
+    result = await ainvoke_llm(agent, llm, prompt_template, prompt_vars, parse, on_field=on_field)
+    cascade_stats.record(agent, reason, small_seconds, time.monotonic() - started)
+    return result
+
+
+# Global cascade counters shared by all agents
+cascade_stats = CascadeStats()
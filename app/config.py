@@ -12,7 +12,7 @@ class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
     # LLM Provider Configuration
-    llm_provider: str = "openai"  # Supported: openai, gemini
+    llm_provider: str = "openai"  # Supported: openai, gemini, simulated
     
     # OpenAI Configuration
     openai_api_key: Optional[str] = None
@@ -23,6 +23,27 @@ class Settings(BaseSettings):
     gemini_api_key: Optional[str] = Field(default=None, env="GOOGLE_API_KEY")
     gemini_model: str = "gemini-pro"
     
+    # Simulated Provider (provider="simulated": offline answers from ground truth, token-scaled latency)
+    simulated_model: str = "simulated-gpt"
+    simulated_ground_truth_path: str = "data/ground_truth.json"
+    simulated_base_latency_seconds: float = 0.3
+    simulated_prompt_seconds_per_1k_tokens: float = 0.05
+    simulated_completion_tokens_per_second: float = 60.0
+    simulated_latency_distribution: str = "lognormal"  # fixed | lognormal | bimodal
+    simulated_latency_sigma: float = 0.35
+    simulated_tail_probability: float = 0.02  # bimodal only
+    simulated_tail_multiplier: float = 5.0
+    simulated_error_rate: float = 0.0  # share of calls failing with a 503
+    simulated_rate_limit_rate: float = 0.0  # share of calls failing with a 429
+    simulated_rate_limit_retry_after_seconds: float = 1.0
+    simulated_seed: Optional[int] = None
+
+    # Model Cascade (triage/decision ask the cascade model first, escalate to the primary model on doubt)
+    cascade_enabled: bool = False
+    openai_cascade_model: str = "gpt-4o-mini"
+    gemini_cascade_model: str = "gemini-1.5-flash"
+    cascade_confidence_threshold: float = 0.8
+    
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
@@ -45,6 +66,15 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     log_file: Optional[str] = "logs/app.log"
+
+    # Prometheus Metrics (GET /metrics; histogram bucket upper bounds in seconds)
+    metrics_latency_buckets: list[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0, 120.0]
+
+    # Tracing (per-workflow spans kept in a ring buffer at /api/debug/traces; optional JSON-lines file)
+    tracing_enabled: bool = True
+    tracing_buffer_size: int = 200  # traces
+    tracing_file: Optional[str] = None  # e.g. logs/traces.jsonl
+    tracing_file_max_mb: int = 50  # rotated to <file>.1 beyond this size
     
     # Agent Configuration
     triage_temperature: float = 0.1
@@ -56,10 +86,104 @@ class Settings(BaseSettings):
     max_concurrent_alerts: int = 5
     alert_timeout_seconds: int = 300
     
+    # Threat intelligence (indexed once, shared by the fast path and investigation agent)
+    threat_intel_path: str = "data/threat_intel.json"
+    threat_intel_reload_interval_seconds: float = 5.0  # poll for file changes; 0 disables hot reload
+    ioc_store_path: str = ""  # binary IOC store built by `python -m app.ioc_ingest`; empty disables
+    threat_intel_prefilter_enabled: bool = True  # Bloom filter checked before any index probe
+    threat_intel_prefilter_fp_rate: float = 0.01
+    
+    # Fast-path triage rules (deterministic TriageResult for known patterns, no LLM call)
+    fast_path_enabled: bool = True
+    fast_path_rules_path: str = "data/fast_path_rules.json"
+    
+    # Related-alert correlation (entity/time index over alerts seen by the orchestrator)
+    correlation_enabled: bool = True
+    correlation_window_minutes: int = 60
+    correlation_bucket_minutes: int = 5
+    correlation_retention_hours: int = 24
+    correlation_max_related: int = 10
+    correlation_max_clock_skew_seconds: int = 300  # later alert timestamps are clamped to server time + this
+
+    # Incident clustering (alerts sharing a host, source IP or user share one investigation)
+    incident_clustering_enabled: bool = False
+    incident_window_minutes: int = 30
+    incident_max_members: int = 50
+
+    # Speculative investigation (run investigation concurrently with triage)
+    speculative_investigation_enabled: bool = False
+    speculative_severities: list[str] = ["critical", "high"]
+    speculative_rules: list[str] = []
+    
+    # Micro-batched triage (several alerts classified in one LLM call during storms)
+    triage_batch_enabled: bool = False
+    triage_batch_max_size: int = 8  # capped at max_concurrent_alerts, the most alerts that can be in triage at once
+    triage_batch_max_wait_ms: int = 250
+    
+    # Orchestrator Cache (compiled workflows reused per provider/model/api_key)
+    orchestrator_cache_size: int = 8
+    orchestrator_cache_ttl_seconds: int = 1800
+    
     # LLM Timeout Configuration
     llm_timeout_seconds: int = Field(default=40, env="LLM_TIMEOUT_SECONDS")
     mock_data_delay: int = Field(default=5, env="MOCK_DATA_DELAY")
     
+    # LLM Streaming (agent output parsed incrementally; completed fields pushed to the WebSocket)
+    llm_streaming_enabled: bool = True
+    
+    # LLM Client Pool (shared HTTP connections per provider/credential)
+    llm_pool_max_connections: int = 20
+    llm_pool_max_keepalive_connections: int = 10
+    llm_pool_keepalive_expiry_seconds: float = 30.0
+    
+    # LLM Rate Limiting (token buckets per provider/model; 0 disables a bucket)
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 150000
+    # Overrides keyed by "provider" or "provider:model", e.g. {"gemini": {"requests_per_minute": 60}}
+    llm_rate_limits: dict[str, dict[str, int]] = {}
+    llm_rate_limit_burst_seconds: float = 10.0
+    llm_rate_limit_retries: int = 3
+    llm_rate_limit_default_backoff_seconds: float = 5.0
+    llm_estimated_completion_tokens: int = 512
+    
+    # LLM Cost Accounting (USD per 1M tokens keyed by model name; unlisted models are costed at 0)
+    llm_pricing: dict[str, dict[str, float]] = {
+        "gpt-4-turbo-preview": {"input": 10.0, "output": 30.0},
+        "gpt-4o": {"input": 2.5, "output": 10.0},
+        "gpt-4o-mini": {"input": 0.15, "output": 0.6},
+        "gemini-pro": {"input": 0.5, "output": 1.5},
+        "gemini-1.5-flash": {"input": 0.075, "output": 0.3},
+    }
+    
+    # Prompt Compaction (alert raw_data over the token budget is summarized deterministically)
+    prompt_compaction_enabled: bool = True
+    prompt_raw_data_token_budget: int = 1000
+    # Overrides keyed by "provider" or "provider:model", e.g. {"openai:gpt-4o-mini": 600}
+    prompt_raw_data_token_budgets: dict[str, int] = {}
+    
+    # LLM Retries and Hedging (llm_timeout_seconds is the overall budget per agent call)
+    llm_attempt_timeout_seconds: Optional[float] = None  # cap per attempt; None gives each attempt the remaining budget
+    llm_max_retries: int = 2  # timeouts, connection errors and 5xx; 429s use llm_rate_limit_retries
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 8.0
+    llm_hedging_enabled: bool = False
+    llm_hedge_percentile: float = 95.0  # duplicate a request still running after this latency percentile
+    llm_hedge_min_delay_seconds: float = 0.5
+    llm_hedge_min_samples: int = 20
+    llm_latency_window: int = 200
+    
+    # LLM Response Cache (keyed by model, temperature and rendered prompt hash)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 2048
+    llm_cache_path: Optional[str] = None  # e.g. "data/llm_cache.sqlite" to persist across restarts
+    llm_cache_default_ttl_seconds: int = 900
+    llm_cache_ttl_seconds: dict[str, int] = {
+        "triage": 3600,
+        "investigation": 900,
+        "decision": 900,
+        "response": 900,
+    }
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
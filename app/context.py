@@ -82,6 +82,7 @@ class TriageResult(BaseModel):
     noise_score: float = Field(ge=0.0, le=1.0, description="Higher = more likely noise")
     requires_investigation: bool
     key_indicators: List[str] = Field(default_factory=list)
+    fast_path_rule: Optional[str] = None  # Set when a deterministic fast-path rule replaced the LLM
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
@@ -93,6 +94,8 @@ class InvestigationResult(BaseModel):
     attack_chain: List[str] = Field(default_factory=list)
     risk_score: float = Field(ge=0.0, le=10.0)
     evidence: Dict[str, Any] = Field(default_factory=dict)
+    threat_intel_version: Optional[str] = None  # Snapshot the investigation was grounded on
+    shared_from_alert_id: Optional[str] = None  # Set when reused from another alert in the same incident
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
@@ -119,6 +122,21 @@ class ResponseResult(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
+class LLMUsage(BaseModel):
+    """One LLM call made while processing an alert"""
+    agent: str
+    provider: str
+    model: str
+    rule_id: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+    cost_usd: float = 0.0
+    cached: bool = False  # served from the response cache, no provider call
+    estimated: bool = False  # provider reported no usage (e.g. streamed); tokens estimated from text
+    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
+
+
 class SOCWorkflowState(BaseModel):
     """Complete state for SOC workflow - passed between agents"""
     
@@ -143,9 +161,13 @@ class SOCWorkflowState(BaseModel):
     
     # Workflow Metadata
     workflow_id: str
+    incident_id: Optional[str] = None  # Assigned by incident clustering on entry
     started_at: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
     completed_at: Optional[str] = None
     processing_time_seconds: Optional[float] = None
+    prompt_tokens_saved: Dict[str, int] = Field(default_factory=dict)  # per agent, from prompt compaction
+    llm_usage: List[LLMUsage] = Field(default_factory=list)
+    agent_processing_seconds: Dict[str, float] = Field(default_factory=dict)
     
     # Error Handling
     errors: List[str] = Field(default_factory=list)
@@ -170,6 +192,7 @@ class WorkflowSummary(BaseModel):
     completed_at: Optional[str]
     processing_time_seconds: Optional[float]
     errors: List[str]
+    incident_id: Optional[str] = None
 
 
 class AgentMetrics(BaseModel):
@@ -179,7 +202,22 @@ class AgentMetrics(BaseModel):
     successful: int = 0
     failed: int = 0
     average_processing_time: float = 0.0
+    timed_runs: int = 0  # workflows in which the agent ran (denominator of average_processing_time)
     last_execution: Optional[str] = None
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    average_llm_latency: float = 0.0
+
+
+class UsageTotals(BaseModel):
+    """Aggregated LLM usage for one model or detection rule"""
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    average_latency: float = 0.0
 
 
 class SystemMetrics(BaseModel):
@@ -191,4 +229,7 @@ class SystemMetrics(BaseModel):
     benign: int = 0
     average_mttr: float = 0.0  # Mean Time To Respond
     agent_metrics: Dict[str, AgentMetrics] = Field(default_factory=dict)
+    total_cost_usd: float = 0.0
+    usage_by_model: Dict[str, UsageTotals] = Field(default_factory=dict)
+    usage_by_rule: Dict[str, UsageTotals] = Field(default_factory=dict)
     last_updated: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
@@ -0,0 +1,224 @@
+"""
+Correlation Index - Related alerts by shared entity and time
+Every alert entering the orchestrator is posted under its host, source IP,
+user and rule id, in time buckets of ``correlation_bucket_minutes`` keyed by
+the alert's own timestamp. A query such as "same source IP within 60 minutes"
+walks only the buckets covering the window for that one key, so its cost is
+the number of postings in those buckets, not the number of stored workflows.
+Windows are symmetric because batches and replays arrive out of order.
+Buckets older than ``correlation_retention_hours`` (relative to the newest
+alert seen) are evicted; timestamps ahead of the server clock by more than
+``correlation_max_clock_skew_seconds`` are clamped first, so one future-dated
+alert cannot evict the whole index.
+"""
+
+from typing import Dict, Any, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from app.config import settings
+from app.context import Alert
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_FIELDS = ("host", "source_ip", "user", "rule_id")
+
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """ISO 8601 timestamp as epoch seconds (naive timestamps are UTC), or None"""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def alert_epoch(alert: Alert) -> float:
+    """Alert timestamp as epoch seconds, clamped to the server clock plus the allowed skew;
+    unparseable timestamps count as now
+    """
+    timestamp = parse_timestamp(alert.timestamp)
+    now = time.time()
+    if timestamp is None:
+        return now
+    return min(timestamp, now + settings.correlation_max_clock_skew_seconds)
+
+
+def alert_entities(alert: Alert) -> Dict[str, str]:
+    """Correlation keys present on an alert; hosts and users compare case-insensitively"""
+    entities = {
+        "host": (alert.assets.host or "").lower(),
+        "source_ip": alert.assets.source_ip or "",
+        "user": (alert.assets.user or "").lower(),
+        "rule_id": alert.rule_id or "",
+    }
+    return {name: value for name, value in entities.items() if value}
+
+
+@dataclass
+class Posting:
+    """One indexed alert"""
+    alert_id: str
+    workflow_id: str
+    rule_id: str
+    severity: str
+    timestamp: float
+    entities: Dict[str, str]
+
+
+@dataclass
+class RelatedAlert:
+    """An indexed alert sharing entities with the queried one"""
+    posting: Posting
+    shared: List[str] = field(default_factory=list)  # correlation fields in common
+    offset_seconds: float = 0.0  # negative when the related alert came first
+
+    @property
+    def alert_id(self) -> str:
+        return self.posting.alert_id
+
+    @property
+    def entity_matches(self) -> int:
+        return sum(1 for name in self.shared if name != "rule_id")
+
+
+class CorrelationIndex:
+    """Inverted index (field, value) -> time bucket -> postings"""
+
+    def __init__(self, bucket_seconds: float, retention_seconds: float):
+        self.bucket_seconds = max(1.0, bucket_seconds)
+        self.retention_seconds = retention_seconds
+        self._postings: Dict[Tuple[str, str], Dict[int, List[Posting]]] = {}
+        self._bucket_keys: Dict[int, Set[Tuple[str, str]]] = {}
+        self._by_workflow: Dict[str, Posting] = {}
+        self._newest_bucket: Optional[int] = None
+        self.newest_timestamp: Optional[float] = None
+        self.queries = 0
+        self.postings_scanned = 0
+        self.related_found = 0
+        self.evicted = 0
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def add(self, alert: Alert, workflow_id: str) -> Posting:
+        """Index an alert once per workflow"""
+        if workflow_id in self._by_workflow:
+            return self._by_workflow[workflow_id]
+        posting = Posting(
+            alert_id=alert.alert_id,
+            workflow_id=workflow_id,
+            rule_id=alert.rule_id,
+            severity=str(getattr(alert.severity, "value", alert.severity)),
+            timestamp=alert_epoch(alert),
+            entities=alert_entities(alert),
+        )
+        bucket = self._bucket(posting.timestamp)
+        for key in posting.entities.items():
+            self._postings.setdefault(key, {}).setdefault(bucket, []).append(posting)
+            self._bucket_keys.setdefault(bucket, set()).add(key)
+        self._by_workflow[workflow_id] = posting
+        self.newest_timestamp = max(self.newest_timestamp or posting.timestamp, posting.timestamp)
+        if self._newest_bucket is None or bucket > self._newest_bucket:
+            self._newest_bucket = bucket
+            self._evict()
+        return posting
+
+    def _evict(self) -> None:
+        oldest = self._newest_bucket - int(self.retention_seconds // self.bucket_seconds)
+        for bucket in [b for b in self._bucket_keys if b < oldest]:
+            for key in self._bucket_keys.pop(bucket):
+                buckets = self._postings.get(key, {})
+                for posting in buckets.pop(bucket, []):
+                    if self._by_workflow.pop(posting.workflow_id, None):
+                        self.evicted += 1
+                if not buckets:
+                    self._postings.pop(key, None)
+
+    def query(self, field_name: str, value: str, at: float, window_seconds: float,
+              record_stats: bool = True) -> List[Posting]:
+        """Postings with field == value within +/- window_seconds of ``at``"""
+        buckets = self._postings.get((field_name, value))
+        if not buckets:
+            return []
+        found = []
+        for bucket in range(self._bucket(at - window_seconds), self._bucket(at + window_seconds) + 1):
+            for posting in buckets.get(bucket, ()):
+                if record_stats:
+                    self.postings_scanned += 1
+                if abs(posting.timestamp - at) <= window_seconds:
+                    found.append(posting)
+        return found
+
+    def related(self, alert: Alert, workflow_id: str, window_seconds: Optional[float] = None,
+                limit: Optional[int] = None, record_stats: bool = True) -> List[RelatedAlert]:
+        """Other alerts sharing a host, source IP, user or rule, most shared entities and nearest first.
+        Internal lookups (e.g. incident clustering) pass record_stats=False to stay out of the query stats.
+        """
+        window_seconds = settings.correlation_window_minutes * 60 if window_seconds is None else window_seconds
+        limit = settings.correlation_max_related if limit is None else limit
+        if record_stats:
+            self.queries += 1
+        at = alert_epoch(alert)
+        matches: Dict[str, RelatedAlert] = {}
+        for field_name, value in alert_entities(alert).items():
+            for posting in self.query(field_name, value, at, window_seconds, record_stats):
+                if posting.workflow_id == workflow_id or posting.alert_id == alert.alert_id:
+                    continue
+                related = matches.get(posting.workflow_id)
+                if related is None:
+                    related = matches[posting.workflow_id] = RelatedAlert(posting, offset_seconds=posting.timestamp - at)
+                related.shared.append(field_name)
+        ranked = sorted(matches.values(), key=lambda r: (-r.entity_matches, -len(r.shared), abs(r.offset_seconds)))
+        # The same alert replayed in several workflows is reported once
+        unique: Dict[str, RelatedAlert] = {}
+        for related in ranked:
+            unique.setdefault(related.alert_id, related)
+        result = list(unique.values())[:limit]
+        if record_stats:
+            self.related_found += len(result)
+        return result
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._bucket_keys.clear()
+        self._by_workflow.clear()
+        self._newest_bucket = None
+        self.newest_timestamp = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.correlation_enabled,
+            "indexed_alerts": len(self._by_workflow),
+            "keys": len(self._postings),
+            "buckets": len(self._bucket_keys),
+            "bucket_seconds": self.bucket_seconds,
+            "window_minutes": settings.correlation_window_minutes,
+            "queries": self.queries,
+            "average_postings_scanned": self.postings_scanned / self.queries if self.queries else 0.0,
+            "related_found": self.related_found,
+            "evicted": self.evicted,
+        }
+
+
+def format_related(related: List[RelatedAlert]) -> str:
+    """Compact prompt summary of related alerts"""
+    if not related:
+        return "No related alerts found in the correlation window"
+    lines = []
+    for r in related:
+        minutes = abs(r.offset_seconds) / 60
+        when = "same time" if minutes < 1 else f"{minutes:.0f} min {'earlier' if r.offset_seconds < 0 else 'later'}"
+        shared = ", ".join(f"{name}={r.posting.entities[name]}" for name in r.shared)
+        lines.append(f"- {r.alert_id} ({r.posting.rule_id}, {r.posting.severity}, {when}): shares {shared}")
+    return "\n".join(lines)
+
+
+# Global correlation index shared by the orchestrator and investigation agent
+correlation_index = CorrelationIndex(
+    bucket_seconds=settings.correlation_bucket_minutes * 60,
+    retention_seconds=settings.correlation_retention_hours * 3600,
+)
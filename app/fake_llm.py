@@ -0,0 +1,170 @@
+"""
+Fake LLM - Local stand-in chat model for offline testing
+Behaves like a provider with its own per-minute quotas: calls over quota fail
+with an HTTP 429-style error, so rate limiting can be exercised without a network.
+Latency can follow a seeded distribution with a slow tail and a share of calls
+can fail with 503s or 429s, for exercising retries and hedging deterministically.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from collections import deque
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+from app.llm_factory import estimate_tokens
+import asyncio
+import math
+import random
+import time
+
+
+class ProviderRateLimitError(Exception):
+    """429 Too Many Requests returned by the fake provider"""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ProviderUnavailableError(Exception):
+    """503 Service Unavailable returned by the fake provider"""
+    status_code = 503
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that replays canned responses and enforces provider-side quotas"""
+
+    provider: str = "fake"
+    model_name: str = "fake-model"
+    temperature: float = 0.0
+    responses: List[str] = ['{"status": "ok"}']
+    latency_seconds: float = 0.0  # fixed latency, or the median for "lognormal" / fast mode for "bimodal"
+    latency_distribution: str = "fixed"  # fixed | lognormal | bimodal
+    latency_sigma: float = 0.5  # lognormal shape
+    tail_probability: float = 0.0  # bimodal: share of calls that hit the slow mode
+    tail_latency_seconds: float = 0.0
+    error_rate: float = 0.0  # share of calls failing with a 503
+    rate_limit_rate: float = 0.0  # share of calls failing with a 429 regardless of quota
+    rate_limit_retry_after_seconds: float = 1.0
+    seed: Optional[int] = None
+    stream_chunk_chars: int = 16  # streamed responses arrive in chunks of this size, latency spread evenly
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    quota_window_seconds: float = 60.0  # shrink to make quotas bite quickly in local runs
+    call_count: int = 0
+    rate_limited_count: int = 0
+
+    _window: Any = PrivateAttr(default_factory=deque)
+    _rng: Any = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _next_response(self, messages: List[BaseMessage]) -> str:
+        return self.responses[self.call_count % len(self.responses)]
+
+    def _check_quota(self, prompt_tokens: int) -> None:
+        """Sliding window quota check, mirroring provider RPM/TPM enforcement"""
+        now = time.monotonic()
+        while self._window and now - self._window[0][0] >= self.quota_window_seconds:
+            self._window.popleft()
+
+        over_requests = self.requests_per_minute is not None and len(self._window) + 1 > self.requests_per_minute
+        used_tokens = sum(tokens for _, tokens in self._window)
+        over_tokens = self.tokens_per_minute is not None and used_tokens + prompt_tokens > self.tokens_per_minute
+        if over_requests or over_tokens:
+            self.rate_limited_count += 1
+            retry_after = self.quota_window_seconds - (now - self._window[0][0]) if self._window else 1.0
+            raise ProviderRateLimitError("Rate limit exceeded", retry_after=retry_after)
+
+        self._window.append((now, prompt_tokens))
+
+    def _sample_latency(self) -> float:
+        """Draw this call's latency from the configured distribution"""
+        if self.latency_distribution == "lognormal" and self.latency_seconds > 0:
+            return self._rng.lognormvariate(math.log(self.latency_seconds), self.latency_sigma)
+        if self.latency_distribution == "bimodal" and self._rng.random() < self.tail_probability:
+            return self.tail_latency_seconds
+        return self.latency_seconds
+
+    def _call_latency(self, prompt_tokens: int, completion_tokens: int) -> float:
+        """Latency for a call of this size (the fake provider ignores the size)"""
+        return self._sample_latency()
+
+    def _begin_call(self, messages: List[BaseMessage]) -> Tuple[str, float]:
+        """Apply quota and injected errors, then return the response and latency for this call"""
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        self._check_quota(prompt_tokens)
+        if self.rate_limit_rate and self._rng.random() < self.rate_limit_rate:
+            self.rate_limited_count += 1
+            raise ProviderRateLimitError("Rate limit exceeded", retry_after=self.rate_limit_retry_after_seconds)
+        content = self._next_response(messages)
+        latency = self._call_latency(prompt_tokens, estimate_tokens(content))
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise ProviderUnavailableError("Service unavailable")
+        self.call_count += 1
+        return content, latency
+
+    def _token_usage(self, messages: List[BaseMessage], content: str) -> Dict[str, int]:
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _build_result(self, messages: List[BaseMessage], content: str) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))],
+            llm_output={"token_usage": self._token_usage(messages, content), "model_name": self.model_name},
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content, latency = self._begin_call(messages)
+        if latency:
+            time.sleep(latency)
+        return self._build_result(messages, content)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content, latency = self._begin_call(messages)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._build_result(messages, content)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        content, latency = self._begin_call(messages)
+        size = max(1, self.stream_chunk_chars)
+        chunks = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+        for i, text in enumerate(chunks):
+            if latency:
+                await asyncio.sleep(latency / len(chunks))
+            # Like OpenAI with stream usage enabled, the usage arrives on the last chunk
+            metadata = {"token_usage": self._token_usage(messages, content)} if i == len(chunks) - 1 else {}
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text, response_metadata=metadata))
@@ -0,0 +1,172 @@
+"""
+Fast Path - Deterministic rule-based triage for well-understood alert patterns
+Declarative rules (data/fast_path_rules.json) are evaluated before the triage
+agent; a matching rule emits a TriageResult directly and skips the LLM call.
+"""
+
+from typing import Dict, Any, List, Optional
+from app.context import Alert, TriageResult, Verdict
+from app.config import settings
+from app.threat_intel import ThreatIntelStore, candidate_ips, get_threat_intel_store
+from datetime import datetime
+import json
+import logging
+import operator
+
+logger = logging.getLogger(__name__)
+
+_OPERATORS = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda value, expected: value in expected,
+    "not_in": lambda value, expected: value not in expected,
+    "contains": lambda value, expected: isinstance(value, str) and expected in value,
+}
+
+
+def _lookup(data: Any, path: str) -> Any:
+    """Resolve a dotted path (e.g. ``evidence_stats.total_events``) in nested dicts"""
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def _check(value: Any, condition: Dict[str, Any]) -> bool:
+    """Apply a single {"op": ..., "value": ...} condition; missing values never match"""
+    if value is None:
+        return False
+    try:
+        return bool(_OPERATORS[condition["op"]](value, condition["value"]))
+    except TypeError:
+        return False
+
+
+class FastPathRule:
+    """One declarative fast-path rule.
+
+    Match keys (all optional, all must hold):
+        rule_id: list of SIEM rule ids
+        severity: list of alert severities
+        entities: {asset field: expected value | list of values | null (must be absent)}
+        thresholds: [{"field": dotted raw_data path, "op": ..., "value": ...}]
+        evidence_all: {evidence_sample field: condition} that every evidence row must satisfy
+        threat_intel: "hit" or "miss" for the alert's source IPs
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec["name"]
+        self.description = spec.get("description", "")
+        self.match = spec.get("match", {})
+        self.result = spec["result"]
+        self.hits = 0
+
+    def matches(self, alert: Alert, threat_intel_hit: bool) -> bool:
+        match = self.match
+        severity = getattr(alert.severity, "value", alert.severity)
+
+        if "rule_id" in match and alert.rule_id not in match["rule_id"]:
+            return False
+        if "severity" in match and severity not in match["severity"]:
+            return False
+
+        for field, expected in match.get("entities", {}).items():
+            value = getattr(alert.assets, field, None)
+            if expected is None:
+                if value is not None:
+                    return False
+            elif isinstance(expected, list):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+
+        for condition in match.get("thresholds", []):
+            if not _check(_lookup(alert.raw_data, condition["field"]), condition):
+                return False
+
+        if "evidence_all" in match:
+            rows = alert.raw_data.get("evidence_sample") or []
+            if not rows:
+                return False
+            for row in rows:
+                for field, condition in match["evidence_all"].items():
+                    if not isinstance(row, dict) or not _check(row.get(field), condition):
+                        return False
+
+        if "threat_intel" in match and (match["threat_intel"] == "hit") != threat_intel_hit:
+            return False
+
+        return True
+
+    def build_result(self) -> TriageResult:
+        return TriageResult(
+            verdict=Verdict(self.result["verdict"]),
+            confidence=self.result["confidence"],
+            reasoning=self.result["reasoning"],
+            noise_score=self.result["noise_score"],
+            requires_investigation=self.result["requires_investigation"],
+            key_indicators=self.result.get("key_indicators", []) + [f"Fast-path rule: {self.name}"],
+            fast_path_rule=self.name,
+            timestamp=datetime.utcnow().isoformat()
+        )
+
+
+class FastPathEngine:
+    """Evaluates fast-path rules in file order and counts hits per rule"""
+
+    def __init__(self, rules_path: str, threat_intel_path: Optional[str] = None):
+        self.rules = self._load_rules(rules_path)
+        self.threat_intel_path = threat_intel_path
+        self.evaluations = 0
+        self.misses = 0
+
+    @staticmethod
+    def _load_rules(path: str) -> List[FastPathRule]:
+        try:
+            with open(path, "r") as f:
+                return [FastPathRule(spec) for spec in json.load(f).get("rules", [])]
+        except FileNotFoundError:
+            logger.warning(f"Fast-path rules file not found: {path}")
+            return []
+
+    @property
+    def threat_intel(self) -> ThreatIntelStore:
+        return get_threat_intel_store(self.threat_intel_path)
+
+    def _threat_intel_hit(self, alert: Alert) -> bool:
+        # Exact indicators and listed CIDR ranges both count as a hit
+        store = self.threat_intel
+        return any(store.is_listed(ip) for ip in candidate_ips(alert))
+
+    def evaluate(self, alert: Alert) -> Optional[TriageResult]:
+        """Return a TriageResult from the first matching rule, or None to use the LLM"""
+        self.evaluations += 1
+        threat_intel_hit = self._threat_intel_hit(alert)
+        for rule in self.rules:
+            if rule.matches(alert, threat_intel_hit):
+                rule.hits += 1
+                logger.info(f"Fast-path rule '{rule.name}' matched alert {alert.alert_id}")
+                return rule.build_result()
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-rule hit counters; each hit is one triage LLM call saved"""
+        hits = sum(rule.hits for rule in self.rules)
+        return {
+            "enabled": settings.fast_path_enabled,
+            "evaluations": self.evaluations,
+            "llm_calls_saved": hits,
+            "misses": self.misses,
+            "rules": {rule.name: rule.hits for rule in self.rules},
+        }
+
+
+# Global fast-path engine
+fast_path_engine = FastPathEngine(settings.fast_path_rules_path)
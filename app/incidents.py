@@ -0,0 +1,215 @@
+"""
+Incident Clustering - One investigation per group of related alerts
+Alerts entering the orchestrator join an open incident when they share a host,
+source IP or user with one of its members within ``incident_window_minutes``
+(looked up in the correlation index); otherwise they start their own. The
+first member that needs an investigation runs it, members reaching that stage
+while it is in flight await it, and later members reuse the finished result
+unless they are more severe than the alert that was investigated. Triage,
+decision and response still run per alert, since verdict and priority depend
+on the member's own rule and severity, and an alert that shares nothing is a
+single-member incident that runs exactly as an unclustered workflow would.
+"""
+
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+from dataclasses import dataclass, field
+from app.config import settings
+from app.context import Alert, AlertStatus, InvestigationResult, SOCWorkflowState
+from app.correlation import alert_epoch, correlation_index
+import asyncio
+import hashlib
+import heapq
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_RANK = {"info": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+
+
+def severity_rank(alert: Alert) -> int:
+    return SEVERITY_RANK.get(str(getattr(alert.severity, "value", alert.severity)).lower(), 0)
+
+
+@dataclass
+class Incident:
+    """A group of alerts sharing entities, with its single-flight investigation"""
+    incident_id: str
+    profile: Tuple[bool, str, str, str]  # (enable_ai, provider, model, api key hash) - members share one AI config
+    last_alert_at: float
+    members: Dict[str, str] = field(default_factory=dict)  # workflow_id -> alert_id, in arrival order
+    investigation: Optional[InvestigationResult] = None
+    investigated_alert_id: Optional[str] = None
+    investigated_rank: int = -1
+    investigation_task: Optional[asyncio.Future] = None
+
+    def is_founder(self, workflow_id: str) -> bool:
+        return next(iter(self.members), None) == workflow_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "incident_id": self.incident_id,
+            "members": [{"workflow_id": w, "alert_id": a} for w, a in self.members.items()],
+            "investigated_alert_id": self.investigated_alert_id,
+            "risk_score": self.investigation.risk_score if self.investigation else None,
+        }
+
+
+class IncidentClusterer:
+    """Assigns workflows to incidents and single-flights their investigation"""
+
+    def __init__(self, window_seconds: float, max_members: int):
+        self.window_seconds = window_seconds
+        self.max_members = max(1, max_members)
+        self._incidents: Dict[str, Incident] = {}
+        self._by_workflow: Dict[str, str] = {}  # members of open incidents, for joining
+        self._running: Dict[str, Incident] = {}  # workflows still in flight, whether or not their incident is open
+        # (last_alert_at, incident_id) min-heap; entries superseded by a later member are skipped when popped
+        self._expiry: List[Tuple[float, str]] = []
+        self._newest_alert_at: Optional[float] = None
+        self.created = 0
+        self.clustered_alerts = 0
+        self.investigations = 0
+        self.shared_investigations = 0
+        self.reinvestigations = 0
+
+    def get(self, incident_id: Optional[str]) -> Optional[Incident]:
+        """Open incident by id"""
+        return self._incidents.get(incident_id) if incident_id else None
+
+    def incident_for(self, workflow_id: str) -> Optional[Incident]:
+        """Incident of a running workflow; still returned after the incident closes to new members"""
+        return self._running.get(workflow_id)
+
+    def release(self, workflow_id: str) -> None:
+        """Forget a finished workflow's incident reference"""
+        self._running.pop(workflow_id, None)
+
+    def assign(self, state: SOCWorkflowState) -> Incident:
+        """Put the workflow in the incident of its closest related alert, or a new one.
+        The alert must already be in the correlation index.
+        """
+        incident = self._running.get(state.workflow_id)
+        if incident is not None:
+            return incident
+        key_hash = hashlib.sha256(state.api_key.encode("utf-8")).hexdigest() if state.api_key else ""
+        profile = (state.enable_ai, state.ai_provider or "", state.ai_model or "", key_hash)
+        alert_at = alert_epoch(state.alert)
+        self._expire(alert_at)
+
+        # Ranked by shared entities, so rule-only matches (which never cluster) come last
+        related_alerts = correlation_index.related(state.alert, state.workflow_id, window_seconds=self.window_seconds,
+                                                   record_stats=False)
+        for related in related_alerts:
+            if not related.entity_matches:
+                break
+            candidate = self.get(self._by_workflow.get(related.posting.workflow_id))
+            if candidate is not None and candidate.profile == profile and len(candidate.members) < self.max_members:
+                incident = candidate
+                self.clustered_alerts += 1
+                logger.info(f"Alert {state.alert.alert_id} joined incident {incident.incident_id} via {related.alert_id} ({', '.join(related.shared)})")
+                break
+        if incident is None:
+            incident = Incident(incident_id=f"INC-{uuid.uuid4().hex[:12]}", profile=profile, last_alert_at=alert_at)
+            self._incidents[incident.incident_id] = incident
+            self.created += 1
+
+        incident.members[state.workflow_id] = state.alert.alert_id
+        if len(incident.members) == 1 or alert_at > incident.last_alert_at:
+            incident.last_alert_at = alert_at
+            heapq.heappush(self._expiry, (incident.last_alert_at, incident.incident_id))
+        self._by_workflow[state.workflow_id] = incident.incident_id
+        self._running[state.workflow_id] = incident
+        state.incident_id = incident.incident_id
+        return incident
+
+    def _expire(self, alert_at: float) -> None:
+        """Close incidents with no member within the incident window of the newest alert (by alert time).
+        A closed incident only stops taking new members; running members still reach it through incident_for.
+        """
+        self._newest_alert_at = max(self._newest_alert_at or alert_at, alert_at)
+        cutoff = self._newest_alert_at - self.window_seconds
+        while self._expiry and self._expiry[0][0] < cutoff:
+            last_alert_at, incident_id = heapq.heappop(self._expiry)
+            incident = self._incidents.get(incident_id)
+            if incident is None or incident.last_alert_at != last_alert_at:
+                continue  # already closed, or a later member re-queued it
+            del self._incidents[incident_id]
+            for workflow_id in incident.members:
+                self._by_workflow.pop(workflow_id, None)
+
+    def track_investigation(self, incident: Incident, alert: Alert, task: asyncio.Future) -> None:
+        """Make an investigation running for ``alert`` the incident's in-flight one; its result is
+        published when ``task`` completes. Speculation passes a future it only completes once triage
+        keeps the result, and cancels otherwise.
+        """
+        incident.investigation_task = task
+        self.investigations += 1
+        task.add_done_callback(lambda done: self._investigated(incident, alert, done))
+
+    def _investigated(self, incident: Incident, alert: Alert, task: asyncio.Future) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result().investigation_result
+        if result is not None and result.shared_from_alert_id is None:
+            incident.investigation = result
+            incident.investigated_alert_id = alert.alert_id
+            incident.investigated_rank = severity_rank(alert)
+
+    async def investigate(self, incident: Incident, state: SOCWorkflowState,
+                          run: Callable[[], Awaitable[SOCWorkflowState]]) -> SOCWorkflowState:
+        """Reuse the incident's investigation, or run ``run`` as the incident's investigation"""
+        # Re-checked after waking: another member may have started a new run (e.g. after a failure)
+        while incident.investigation_task is not None and not incident.investigation_task.done():
+            await asyncio.wait([incident.investigation_task])
+        if incident.investigation is not None and severity_rank(state.alert) <= incident.investigated_rank:
+            self.shared_investigations += 1
+            state.status = AlertStatus.INVESTIGATING
+            state.investigation_result = self._fan_out(incident, state)
+            return state
+        if incident.investigation is not None:
+            logger.info(f"Re-investigating incident {incident.incident_id}: {state.alert.alert_id} is more severe than {incident.investigated_alert_id}")
+            self.reinvestigations += 1
+        task = asyncio.ensure_future(run())
+        self.track_investigation(incident, state.alert, task)
+        # Shielded so members waiting on it are not cancelled with this workflow
+        return await asyncio.shield(task)
+
+    def _fan_out(self, incident: Incident, state: SOCWorkflowState) -> InvestigationResult:
+        related = [incident.investigated_alert_id] + incident.investigation.related_alerts
+        return incident.investigation.model_copy(update={
+            "related_alerts": list(dict.fromkeys(a for a in related if a != state.alert.alert_id)),
+            "shared_from_alert_id": incident.investigated_alert_id,
+        })
+
+    def clear(self) -> None:
+        self._incidents.clear()
+        self._by_workflow.clear()
+        self._running.clear()
+        self._expiry.clear()
+        self._newest_alert_at = None
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Largest open incidents first"""
+        incidents = sorted(self._incidents.values(), key=lambda i: (-len(i.members), -i.last_alert_at))
+        return [incident.to_dict() for incident in incidents[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.incident_clustering_enabled and settings.correlation_enabled,
+            "open_incidents": len(self._incidents),
+            "multi_alert_incidents": sum(1 for i in self._incidents.values() if len(i.members) > 1),
+            "created": self.created,
+            "clustered_alerts": self.clustered_alerts,
+            "investigations": self.investigations,
+            "shared_investigations": self.shared_investigations,
+            "reinvestigations": self.reinvestigations,
+            "window_minutes": settings.incident_window_minutes,
+        }
+
+
+# Global incident clusterer shared by all orchestrators
+incident_clusterer = IncidentClusterer(
+    window_seconds=settings.incident_window_minutes * 60,
+    max_members=settings.incident_max_members,
+)
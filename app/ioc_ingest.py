@@ -0,0 +1,126 @@
+"""
+IOC Ingestion - Build the binary IOC store from bulk indicator feeds
+Reads CSV, NDJSON and STIX 2.x style feeds (bundle JSON or one object per
+line) and writes the memory-mapped store read by app.ioc_store. Only the
+metadata fields listed in --fields are kept so identical metadata interns to
+one record; the feed name is always recorded as "feed".
+
+    python -m app.ioc_ingest feeds/abuse.csv feeds/intel.ndjson -o data/iocs.bin
+    python -m app.ioc_ingest feeds/stix_bundle.json --format stix -o data/iocs.bin
+"""
+
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from pathlib import Path
+from app.config import settings
+from app.ioc_store import IOCStoreWriter
+import argparse
+import csv
+import json
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIELDS = ["type", "confidence", "description", "threat_type", "tags", "source"]
+INDICATOR_COLUMNS = ("indicator", "ioc", "value", "ip", "domain", "observable")
+
+_STIX_OBSERVABLE = re.compile(r"(ipv4-addr|ipv6-addr|domain-name):value\s*=\s*'([^']+)'")
+
+
+def _indicator_and_metadata(row: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+    for column in INDICATOR_COLUMNS:
+        if row.get(column):
+            return str(row[column]), {k: v for k, v in row.items() if k != column}
+    return None, row
+
+
+def _from_stix(obj: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Indicators in a STIX indicator's pattern, with its name/confidence/labels as metadata"""
+    if obj.get("type") != "indicator" or "pattern" not in obj:
+        return
+    metadata = {
+        "description": obj.get("description") or obj.get("name"),
+        "confidence": obj.get("confidence"),
+        "tags": obj.get("labels") or obj.get("indicator_types"),
+        "first_seen": obj.get("valid_from"),
+    }
+    for _, value in _STIX_OBSERVABLE.findall(obj["pattern"]):
+        yield value, metadata
+
+
+def _read_csv(f) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    # Comment lines (abuse.ch style "# ...") precede the header in many feeds
+    reader = csv.reader(line for line in f if not line.startswith("#"))
+    header = [column.strip().lower() for column in next(reader, [])]
+    indicator_column = next((header.index(c) for c in INDICATOR_COLUMNS if c in header), None)
+    if indicator_column is None:
+        raise ValueError(f"CSV feed has no indicator column (expected one of {', '.join(INDICATOR_COLUMNS)})")
+    columns = [(i, name) for i, name in enumerate(header) if i != indicator_column and name]
+    for row in reader:
+        if len(row) <= indicator_column:
+            yield None, {}
+            continue
+        yield row[indicator_column], {name: row[i].strip() for i, name in columns if i < len(row)}
+
+
+def read_feed(path: str, feed_format: Optional[str] = None) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """(indicator, metadata) pairs from one feed file; the indicator is None for unusable rows"""
+    suffix = Path(path).suffix.lower()
+    feed_format = feed_format or {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "stix"}.get(suffix, "csv")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if feed_format == "csv":
+            yield from _read_csv(f)
+        elif feed_format == "ndjson":
+            for line in f:
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                if obj.get("type") == "indicator" and "pattern" in obj:
+                    yield from _from_stix(obj)
+                else:
+                    yield _indicator_and_metadata(obj)
+        elif feed_format == "stix":
+            data = json.load(f)
+            for obj in data.get("objects", []) if isinstance(data, dict) else data:
+                yield from _from_stix(obj)
+        else:
+            raise ValueError(f"Unknown feed format: {feed_format}")
+
+
+def ingest(feeds: List[str], output: str, fields: List[str] = DEFAULT_FIELDS, feed_format: Optional[str] = None,
+           bloom_fp_rate: Optional[float] = None) -> Dict[str, Any]:
+    """Read every feed and write the IOC store; returns the store header"""
+    writer = IOCStoreWriter(bloom_fp_rate=bloom_fp_rate or settings.threat_intel_prefilter_fp_rate)
+    for path in feeds:
+        feed_name = Path(path).stem
+        writer.feeds.append(feed_name)
+        started, added = time.monotonic(), 0
+        for indicator, metadata in read_feed(path, feed_format):
+            if indicator is None:
+                writer.skipped += 1
+                continue
+            kept = {k: metadata[k] for k in fields if metadata.get(k) not in (None, "", [])}
+            added += writer.add(indicator, {**kept, "feed": feed_name})
+        logger.info(f"Read {added} indicators from {path} in {time.monotonic() - started:.1f}s")
+    return writer.write(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("feeds", nargs="+", help="feed files (.csv, .ndjson/.jsonl, .json STIX bundle)")
+    parser.add_argument("-o", "--output", required=True, help="IOC store to write (replaced atomically)")
+    parser.add_argument("--format", choices=["csv", "ndjson", "stix"], help="override format detection by extension")
+    parser.add_argument("--bloom-fp-rate", type=float, help="prefilter false-positive rate (default: THREAT_INTEL_PREFILTER_FP_RATE)")
+    parser.add_argument("--fields", default=",".join(DEFAULT_FIELDS), help="metadata fields to keep (comma-separated)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    started = time.monotonic()
+    header = ingest(args.feeds, args.output, [f.strip() for f in args.fields.split(",") if f.strip()], args.format, args.bloom_fp_rate)
+    size = Path(args.output).stat().st_size
+    logger.info(f"Wrote {args.output} ({size / 1e6:.1f} MB, version {header['version']}) in {time.monotonic() - started:.1f}s: {header['counts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+IOC Store - Compact, memory-mapped binary store for bulk IOC feeds
+Written by ``python -m app.ioc_ingest`` and opened read-only with mmap, so
+opening is near-instant and the pages are shared by every worker process on
+the host. Exact IPv4/IPv6 indicators and domain hashes are stored as sorted
+packed keys, CIDR ranges as sorted disjoint [first, last] segments; all are
+searched with bisect directly on the mapped memory. Each key points to an
+interned group of interned metadata records, so millions of indicators that
+share a feed, confidence and description cost one JSON record. A Bloom filter
+over the exact IP and domain keys is written alongside and checked before
+probing them.
+
+File layout: magic, u32 header length, JSON header (counts, section offsets,
+byte order, content version, prefilter parameters), then 8-byte aligned
+sections. Format 1 stores (written before the prefilter existed) have no
+bloom section and are still read, without a prefilter.
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from app.bloom_filter import BloomFilter
+import hashlib
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SOCIOC\x00\x01"
+FORMAT_VERSION = 2
+READABLE_FORMAT_VERSIONS = (1, 2)  # 1: no bloom section
+
+# Section name -> array typecode ("16" = packed 16-byte big-endian IPv6 values)
+SECTIONS = (
+    ("v4_keys", "I"), ("v4_groups", "I"),
+    ("v6_keys", "16"), ("v6_groups", "I"),
+    ("domain_keys", "Q"), ("domain_groups", "I"),
+    ("v4_range_first", "I"), ("v4_range_last", "I"), ("v4_range_groups", "I"),
+    ("v6_range_first", "16"), ("v6_range_last", "16"), ("v6_range_groups", "I"),
+    ("group_offsets", "I"), ("group_members", "I"),
+    ("record_offsets", "Q"), ("record_blob", "B"),
+    ("bloom", "B"),
+)
+
+
+def parse_ip(ip: str) -> Optional[Tuple[int, int]]:
+    """(version, integer value) of an IP address, or None if it is not one"""
+    for family, version in ((socket.AF_INET, 4), (socket.AF_INET6, 6)):
+        try:
+            return version, int.from_bytes(socket.inet_pton(family, ip), "big")
+        except (OSError, ValueError, TypeError):
+            continue
+    return None
+
+
+def parse_cidr(cidr: str) -> Optional[Tuple[int, int, int]]:
+    """(version, first address, end address exclusive) of a CIDR range; host bits are ignored"""
+    address, _, prefix = cidr.partition("/")
+    parsed = parse_ip(address)
+    if parsed is None or not prefix.isdigit():
+        return None
+    version, value = parsed
+    bits = 32 if version == 4 else 128
+    length = int(prefix)
+    if length > bits:
+        return None
+    size = 1 << (bits - length)
+    start = value & ~(size - 1)
+    return version, start, start + size
+
+
+def normalize_domain(domain: str) -> str:
+    return domain.strip().lower().rstrip(".")
+
+
+def domain_key(domain: str) -> int:
+    """64-bit key for a (normalized) domain"""
+    return int.from_bytes(hashlib.blake2b(normalize_domain(domain).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# Global prefilter counters, kept across store reloads
+prefilter_stats = {
+    "rejected": 0,  # key-array probes skipped
+    "passed": 0,
+    "false_positives": 0,  # passed the filter but the key was not in the store
+}
+
+
+class IndicatorPrefilter:
+    """Bloom filter over exact IPs and domains, checked before probing the packed key arrays"""
+
+    def __init__(self, bloom: BloomFilter):
+        self.bloom = bloom
+
+    @staticmethod
+    def _ip_key(version: int, value: int) -> bytes:
+        return ((version << 128) | value).to_bytes(17, "big")
+
+    @staticmethod
+    def _domain_key(domain: str) -> bytes:
+        return b"d" + normalize_domain(domain).encode("utf-8")
+
+    def add_ip(self, version: int, value: int) -> None:
+        self.bloom.add(self._ip_key(version, value))
+
+    def add_domain(self, domain: str) -> None:
+        self.bloom.add(self._domain_key(domain))
+
+    def might_contain_ip(self, version: int, value: int) -> bool:
+        """False means the IP is not an exact indicator; True may be a false positive"""
+        return self._ip_key(version, value) in self.bloom
+
+    def might_contain_domain(self, domain: str) -> bool:
+        return self._domain_key(domain) in self.bloom
+
+    def stats(self) -> Dict[str, Any]:
+        return self.bloom.stats()
+
+
+class _Packed16(Sequence):
+    """Sorted 16-byte big-endian values viewed as a sequence of bytes (bytes order == numeric order)"""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+
+    def __len__(self) -> int:
+        return len(self._view) // 16
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._view[i * 16:(i + 1) * 16].tobytes()
+
+
+class IOCStore:
+    """Read-only view of a binary IOC store"""
+
+    def __init__(self, path: str, use_prefilter: bool = True):
+        self.path = path
+        self.use_prefilter = use_prefilter
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an IOC store")
+        try:
+            self._map_sections()
+        except (struct.error, KeyError, TypeError) as e:
+            # Truncated or hand-edited file: report it like any other unreadable store
+            raise ValueError(f"{path} is a corrupt IOC store ({type(e).__name__}: {e}); re-run app.ioc_ingest") from e
+
+    def _map_sections(self) -> None:
+        (header_length,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header: Dict[str, Any] = json.loads(self._mmap[start:start + header_length])
+        self.format_version = self.header.get("format_version")
+        if self.format_version not in READABLE_FORMAT_VERSIONS:
+            raise ValueError(f"{self.path} has unsupported IOC store format {self.format_version}; re-run app.ioc_ingest")
+        if self.header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{self.path} was written on a {self.header.get('byteorder')}-endian host; re-run the ingestion here")
+        self.version: str = self.header["version"]
+        self.size_bytes = len(self._mmap)
+
+        view = memoryview(self._mmap)
+        sections = {}
+        for name, typecode in SECTIONS:
+            if name == "bloom" and self.format_version < 2:
+                continue
+            offset, length = self.header["sections"][name]
+            if offset + length > self.size_bytes:
+                raise ValueError(f"{self.path} is truncated: section {name} ends past the end of the file; re-run app.ioc_ingest")
+            raw = view[offset:offset + length]
+            sections[name] = _Packed16(raw) if typecode == "16" else raw.cast(typecode)
+        self._s = sections
+        self.prefilter: Optional[IndicatorPrefilter] = None
+        if "bloom" in sections:
+            bloom = self.header["bloom"]
+            self.prefilter = IndicatorPrefilter(BloomFilter(bloom["bits"], bloom["hashes"], buffer=sections["bloom"]))
+            self.prefilter.bloom.items = bloom["items"]
+        elif self.use_prefilter:
+            logger.info(f"{self.path} is a format {self.format_version} IOC store without a prefilter; re-run app.ioc_ingest to add one")
+            self.use_prefilter = False
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return self.header["counts"]
+
+    def _records(self, group: int) -> List[Dict[str, Any]]:
+        offsets, members = self._s["group_offsets"], self._s["group_members"]
+        record_offsets, blob = self._s["record_offsets"], self._s["record_blob"]
+        return [
+            json.loads(blob[record_offsets[r]:record_offsets[r + 1]].tobytes())
+            for r in members[offsets[group]:offsets[group + 1]]
+        ]
+
+    @staticmethod
+    def _find(keys: Sequence, key) -> int:
+        i = bisect_left(keys, key)
+        return i if i < len(keys) and keys[i] == key else -1
+
+    @staticmethod
+    def _find_range(first: Sequence, last: Sequence, key) -> int:
+        i = bisect_right(first, key) - 1
+        return i if i >= 0 and key <= last[i] else -1
+
+    def _ip_groups(self, ip: str, parsed: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+        """(exact group, range group) for an IP; -1 where there is no match"""
+        parsed = parsed or parse_ip(ip)
+        return self._parsed_ip_groups(*parsed) if parsed else (-1, -1)
+
+    def _parsed_ip_groups(self, version: int, value: int) -> Tuple[int, int]:
+        s = self._s
+        # CIDR segments are few; the prefilter only guards the (large) exact key arrays
+        probe_exact = not self.use_prefilter or self._prefilter_passes(self.prefilter.might_contain_ip(version, value))
+        if version == 4:
+            exact = self._find(s["v4_keys"], value) if probe_exact else -1
+            segment = self._find_range(s["v4_range_first"], s["v4_range_last"], value)
+            groups = (s["v4_groups"][exact] if exact >= 0 else -1), (s["v4_range_groups"][segment] if segment >= 0 else -1)
+        else:
+            key = value.to_bytes(16, "big")
+            exact = self._find(s["v6_keys"], key) if probe_exact else -1
+            segment = self._find_range(s["v6_range_first"], s["v6_range_last"], key)
+            groups = (s["v6_groups"][exact] if exact >= 0 else -1), (s["v6_range_groups"][segment] if segment >= 0 else -1)
+        if probe_exact and exact < 0 and self.use_prefilter:
+            prefilter_stats["false_positives"] += 1
+        return groups
+
+    @staticmethod
+    def _prefilter_passes(might_contain: bool) -> bool:
+        prefilter_stats["passed" if might_contain else "rejected"] += 1
+        return might_contain
+
+    def contains_ip(self, ip: str, parsed: Optional[Tuple[int, int]] = None) -> bool:
+        """``parsed`` (from parse_ip) skips re-parsing when the caller already has it"""
+        exact, ranged = self._ip_groups(ip, parsed)
+        return exact >= 0 or ranged >= 0
+
+    def lookup_ip(self, ip: str, parsed: Optional[Tuple[int, int]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """(exact records, CIDR range records) for an IP; range records carry their "indicator" CIDR"""
+        exact, ranged = self._ip_groups(ip, parsed)
+        return (self._records(exact) if exact >= 0 else []), (self._records(ranged) if ranged >= 0 else [])
+
+    def lookup_domain(self, domain: str) -> List[Dict[str, Any]]:
+        if self.use_prefilter and not self._prefilter_passes(self.prefilter.might_contain_domain(domain)):
+            return []
+        i = self._find(self._s["domain_keys"], domain_key(domain))
+        if i < 0:
+            if self.use_prefilter:
+                prefilter_stats["false_positives"] += 1
+            return []
+        return self._records(self._s["domain_groups"][i])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "size_bytes": self.size_bytes,
+            "created_at": self.header.get("created_at"),
+            "feeds": self.header.get("feeds", []),
+            **self.counts,
+            "format_version": self.format_version,
+            "prefilter": {**self.prefilter.stats(), "target_fp_rate": self.header["bloom"]["fp_rate"]} if self.prefilter else None,
+        }
+
+
+class IOCStoreWriter:
+    """Collects indicators in memory, then writes a sorted, interned IOC store"""
+
+    def __init__(self, bloom_fp_rate: float = 0.01):
+        self.bloom_fp_rate = bloom_fp_rate
+        self._record_ids: Dict[str, int] = {}
+        self._record_cache: Dict[tuple, int] = {}
+        self._exact: Dict[Tuple[int, int], set] = {}
+        self._domains: Dict[int, set] = {}
+        self._domain_names: List[str] = []
+        self._ranges: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+        self.feeds: List[str] = []
+        self.skipped = 0
+
+    def _record(self, metadata: Dict[str, Any]) -> int:
+        # Feeds repeat the same metadata millions of times; skip re-encoding it when the items are hashable
+        key = tuple(sorted(metadata.items()))
+        try:
+            return self._record_cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            key = None
+        encoded = json.dumps(metadata, sort_keys=True, separators=(",", ":"), default=str)
+        record_id = self._record_ids.setdefault(encoded, len(self._record_ids))
+        if key is not None:
+            self._record_cache[key] = record_id
+        return record_id
+
+    def add(self, indicator: str, metadata: Dict[str, Any]) -> bool:
+        """Add an IP, CIDR or domain indicator; False if it is none of these"""
+        indicator = indicator.strip()
+        if not indicator:
+            self.skipped += 1
+            return False
+        if "/" in indicator:
+            parsed_range = parse_cidr(indicator)
+            if parsed_range is None:
+                self.skipped += 1
+                return False
+            version, first, end = parsed_range
+            self._ranges[version].append((first, end - 1, self._record({**metadata, "indicator": indicator})))
+            return True
+        parsed = parse_ip(indicator)
+        if parsed is not None:
+            self._exact.setdefault(parsed, set()).add(self._record(metadata))
+            return True
+        if "." in indicator and " " not in indicator:
+            key = domain_key(indicator)
+            if key not in self._domains:
+                self._domain_names.append(indicator)
+            self._domains.setdefault(key, set()).add(self._record(metadata))
+            return True
+        self.skipped += 1
+        return False
+
+    @staticmethod
+    def _segments(ranges: List[Tuple[int, int, int]]) -> List[Tuple[int, int, Tuple[int, ...]]]:
+        """Flatten possibly overlapping [first, last] ranges into disjoint segments with every covering record"""
+        events: Dict[int, List[Tuple[int, int]]] = {}
+        for first, last, record in ranges:
+            events.setdefault(first, []).append((1, record))
+            events.setdefault(last + 1, []).append((-1, record))
+        points = sorted(events)
+        active: Dict[int, int] = {}
+        segments = []
+        for i, point in enumerate(points):
+            for delta, record in events[point]:
+                active[record] = active.get(record, 0) + delta
+                if not active[record]:
+                    del active[record]
+            if active and i + 1 < len(points):
+                segments.append((point, points[i + 1] - 1, tuple(sorted(active))))
+        return segments
+
+    def write(self, path: str) -> Dict[str, Any]:
+        """Write the store atomically (temp file + rename) and return its header"""
+        group_ids: Dict[Tuple[int, ...], int] = {}
+
+        def group(records) -> int:
+            return group_ids.setdefault(tuple(sorted(records)), len(group_ids))
+
+        v4 = sorted((value, group(records)) for (version, value), records in self._exact.items() if version == 4)
+        v6 = sorted((value, group(records)) for (version, value), records in self._exact.items() if version == 6)
+        domains = sorted((key, group(records)) for key, records in self._domains.items())
+        r4 = [(first, last, group(records)) for first, last, records in self._segments(self._ranges[4])]
+        r6 = [(first, last, group(records)) for first, last, records in self._segments(self._ranges[6])]
+
+        group_offsets, group_members = array("I", [0]), array("I")
+        for members in group_ids:  # dict preserves id order
+            group_members.extend(members)
+            group_offsets.append(len(group_members))
+        records = [encoded.encode("utf-8") for encoded in self._record_ids]
+        record_offsets = array("Q", [0])
+        for encoded in records:
+            record_offsets.append(record_offsets[-1] + len(encoded))
+
+        prefilter = IndicatorPrefilter(BloomFilter.for_capacity(len(self._exact) + len(self._domains), self.bloom_fp_rate))
+        for version, value in self._exact:
+            prefilter.add_ip(version, value)
+        for domain in self._domain_names:
+            prefilter.add_domain(domain)
+
+        packed16 = lambda values: b"".join(value.to_bytes(16, "big") for value in values)
+        sections = {
+            "v4_keys": array("I", (k for k, _ in v4)).tobytes(), "v4_groups": array("I", (g for _, g in v4)).tobytes(),
+            "v6_keys": packed16(k for k, _ in v6), "v6_groups": array("I", (g for _, g in v6)).tobytes(),
+            "domain_keys": array("Q", (k for k, _ in domains)).tobytes(), "domain_groups": array("I", (g for _, g in domains)).tobytes(),
+            "v4_range_first": array("I", (f for f, _, _ in r4)).tobytes(), "v4_range_last": array("I", (l for _, l, _ in r4)).tobytes(),
+            "v4_range_groups": array("I", (g for _, _, g in r4)).tobytes(),
+            "v6_range_first": packed16(f for f, _, _ in r6), "v6_range_last": packed16(l for _, l, _ in r6),
+            "v6_range_groups": array("I", (g for _, _, g in r6)).tobytes(),
+            "group_offsets": group_offsets.tobytes(), "group_members": group_members.tobytes(),
+            "record_offsets": record_offsets.tobytes(), "record_blob": b"".join(records),
+            "bloom": prefilter.bloom.to_bytes(),
+        }
+        digest = hashlib.sha256()
+        for name, _ in SECTIONS:
+            digest.update(sections[name])
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "version": digest.hexdigest()[:12],
+            "created_at": datetime.utcnow().isoformat(),
+            "feeds": self.feeds,
+            "bloom": {**prefilter.stats(), "fp_rate": self.bloom_fp_rate},
+            "counts": {
+                "ipv4": len(v4), "ipv6": len(v6), "domains": len(domains),
+                "ipv4_range_segments": len(r4), "ipv6_range_segments": len(r6),
+                "records": len(records), "groups": len(group_ids), "skipped": self.skipped,
+            },
+            "sections": {},
+        }
+        # Section offsets depend on the header length, which depends on the offsets; repeat until stable
+        encoded_header = b""
+        while len(json.dumps(header).encode("utf-8")) != len(encoded_header):
+            encoded_header = json.dumps(header).encode("utf-8")
+            offset = len(MAGIC) + 4 + len(encoded_header)
+            for name, _ in SECTIONS:
+                offset = (offset + 7) & ~7
+                header["sections"][name] = [offset, len(sections[name])]
+                offset += len(sections[name])
+        encoded_header = json.dumps(header).encode("utf-8")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(encoded_header)) + encoded_header)
+            for name, _ in SECTIONS:
+                offset = header["sections"][name][0]
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(sections[name])
+        os.replace(tmp_path, path)
+        return header
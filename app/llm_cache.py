@@ -0,0 +1,169 @@
+"""
+LLM Response Cache - Content-addressed cache for agent LLM responses
+Keys are derived from (model, temperature, rendered prompt) so byte-identical
+prompts produced by re-fired SIEM rules are answered without a provider call.
+"""
+
+from typing import Optional, Dict, Any, Tuple
+from collections import OrderedDict
+from app.config import settings
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _SQLiteStore:
+    """Optional on-disk store so cached responses survive restarts"""
+
+    def __init__(self, path: str):
+        from pathlib import Path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, agent TEXT NOT NULL, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] <= time.time():
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row
+
+    def put(self, key: str, agent: str, content: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, agent, content, expires_at) VALUES (?, ?, ?, ?)",
+                (key, agent, content, expires_at),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+
+class LLMResponseCache:
+    """In-memory LRU of LLM responses with per-agent TTLs and an optional SQLite store"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: Dict[str, int],
+        default_ttl_seconds: int,
+        disk_path: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.default_ttl_seconds = default_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._store = _SQLiteStore(disk_path) if enabled and disk_path else None
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(llm: Any, rendered_prompt: str) -> str:
+        """Hash (model, temperature, rendered prompt) into a cache key"""
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+        temperature = getattr(llm, "temperature", None)
+        material = json.dumps([str(model), temperature, rendered_prompt], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _count(self, agent: str, field: str) -> None:
+        counters = self._counters.setdefault(agent, {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0})
+        counters[field] += 1
+
+    async def get(self, agent: str, key: str) -> Optional[str]:
+        """Look up a cached response, checking memory before disk"""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            content, expires_at = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self._count(agent, "hits")
+                return content
+            del self._entries[key]
+
+        if self._store is not None:
+            row = await asyncio.to_thread(self._store.get, key)
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                self._count(agent, "disk_hits")
+                return row[0]
+
+        self._count(agent, "misses")
+        return None
+
+    async def put(self, agent: str, key: str, content: str) -> None:
+        """Store a response under the agent's TTL"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds.get(agent, self.default_ttl_seconds)
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, content, expires_at)
+        self._count(agent, "stores")
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.put, key, agent, content, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk write failed: {str(e)}")
+
+    def _remember(self, key: str, content: str, expires_at: float) -> None:
+        self._entries[key] = (content, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses (memory and disk)"""
+        self._entries.clear()
+        if self._store is not None:
+            self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per agent plus cache occupancy"""
+        totals = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        for counters in self._counters.values():
+            for field in totals:
+                totals[field] += counters[field]
+        lookups = totals["hits"] + totals["disk_hits"] + totals["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_store": self._store is not None,
+            "hit_rate": (totals["hits"] + totals["disk_hits"]) / lookups if lookups else 0.0,
+            "totals": totals,
+            "agents": self._counters,
+        }
+
+
+# Global response cache shared by all agents
+response_cache = LLMResponseCache(
+    max_entries=settings.llm_cache_max_entries,
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+    default_ttl_seconds=settings.llm_cache_default_ttl_seconds,
+    disk_path=settings.llm_cache_path,
+    enabled=settings.llm_cache_enabled,
+)
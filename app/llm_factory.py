@@ -1,12 +1,141 @@
 """
 LLM Factory - Centralized LLM provider management
-Supports multiple LLM providers (OpenAI, Gemini, etc.)
+Supports multiple LLM providers (OpenAI, Gemini, and an offline simulated provider)
 """
 
-from typing import Optional, Any
+from typing import Optional, Any, Dict, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from app.config import settings
+import hashlib
+import weakref
+import httpx
+import openai
+
+
+class _PooledTransport(httpx.AsyncHTTPTransport):
+    """Async transport that records request and connection counts for pool sizing"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests_total = 0
+        self.connections_opened = 0
+        self._seen_connections = weakref.WeakSet()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests_total += 1
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self._observe_connections()
+
+    def _observe_connections(self) -> None:
+        for conn in self._pool.connections:
+            if conn not in self._seen_connections:
+                self._seen_connections.add(conn)
+                self.connections_opened += 1
+
+    def stats(self) -> Dict[str, int]:
+        connections = [c for c in self._pool.connections if not c.is_closed()]
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "requests": self.requests_total,
+            "connections_opened": self.connections_opened,
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "handshakes_avoided": max(0, self.requests_total - self.connections_opened),
+        }
+
+
+class LLMClientPool:
+    """Long-lived provider clients shared by every agent and workflow.
+
+    OpenAI clients get one ``httpx.AsyncClient`` per credential so each stage
+    reuses warm TCP/TLS connections. Gemini manages its own gRPC channel, so
+    chat model instances are shared instead.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive_connections: int, keepalive_expiry: float):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._openai_clients: Dict[Tuple[str, str], Tuple[openai.OpenAI, openai.AsyncOpenAI, _PooledTransport]] = {}
+        self._gemini_models: Dict[Tuple[str, str, float, bool], ChatGoogleGenerativeAI] = {}
+        self._gemini_reuses = 0
+
+    @staticmethod
+    def _credential_id(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    def openai_clients(self, api_key: str, base_url: Optional[str] = None) -> Tuple[openai.OpenAI, openai.AsyncOpenAI]:
+        """Return the shared (sync, async) OpenAI clients for a credential"""
+        key = (self._credential_id(api_key), base_url or "")
+        entry = self._openai_clients.get(key)
+        if entry is None:
+            transport = _PooledTransport(limits=self.limits)
+            async_http = httpx.AsyncClient(transport=transport, limits=self.limits)
+            sync_client = openai.OpenAI(api_key=api_key, base_url=base_url)
+            async_client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=async_http)
+            entry = (sync_client, async_client, transport)
+            self._openai_clients[key] = entry
+        return entry[0], entry[1]
+
+    def gemini_model(self, api_key: str, model: str, temperature: float, stream: bool) -> ChatGoogleGenerativeAI:
+        """Return a shared Gemini chat model for a credential and generation config"""
+        key = (self._credential_id(api_key), model, temperature, stream)
+        llm = self._gemini_models.get(key)
+        if llm is None:
+            llm = ChatGoogleGenerativeAI(
+                model=model,
+                temperature=temperature,
+                google_api_key=api_key,
+                stream=stream,
+                convert_system_message_to_human=True
+            )
+            self._gemini_models[key] = llm
+        else:
+            self._gemini_reuses += 1
+        return llm
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics (in-use, idle, handshakes avoided) per provider/credential"""
+        openai_stats = {}
+        for (credential_id, base_url), (_, _, transport) in self._openai_clients.items():
+            label = f"{credential_id}@{base_url}" if base_url else credential_id
+            openai_stats[label] = transport.stats()
+
+        totals = {"requests": 0, "connections_opened": 0, "in_use": 0, "idle": 0, "handshakes_avoided": 0}
+        for entry in openai_stats.values():
+            for field in totals:
+                totals[field] += entry[field]
+
+        return {
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            },
+            "openai": {"clients": openai_stats, "totals": totals},
+            "gemini": {"models": len(self._gemini_models), "reuses": self._gemini_reuses},
+        }
+
+    async def aclose(self) -> None:
+        """Close all pooled HTTP clients"""
+        for sync_client, async_client, _ in self._openai_clients.values():
+            await async_client.close()
+            sync_client.close()
+        self._openai_clients.clear()
+        self._gemini_models.clear()
+
+
+# Global client pool shared across orchestrators
+client_pool = LLMClientPool(
+    max_connections=settings.llm_pool_max_connections,
+    max_keepalive_connections=settings.llm_pool_max_keepalive_connections,
+    keepalive_expiry=settings.llm_pool_keepalive_expiry_seconds,
+)
 
 
 def get_llm(
@@ -25,8 +154,11 @@ def get_llm(
         provider: LLM provider to use (overrides default from settings)
         stream: Whether to enable streaming responses
         
+    OpenAI models share pooled HTTP clients from ``client_pool``; Gemini models
+    are shared per credential and generation config.
+        
     Returns:
-        LLM instance (ChatOpenAI or ChatGoogleGenerativeAI)
+        LLM instance (ChatOpenAI, ChatGoogleGenerativeAI or SimulatedChatModel)
         
     Raises:
         ValueError: If provider is not supported or API key is missing
@@ -39,11 +171,18 @@ def get_llm(
         if not api_key:
             raise ValueError("OPENAI_API_KEY is not set")
 
+        sync_client, async_client = client_pool.openai_clients(api_key)
+        # Streamed responses only carry usage when asked for (langchain-openai >= 0.1.9);
+        # older releases drop the usage chunk and the gateway falls back to estimates
+        usage_options = {"stream_usage": True} if stream and "stream_usage" in ChatOpenAI.__fields__ else {}
         return ChatOpenAI(
             model=model or settings.openai_model,
             temperature=temperature,
             api_key=api_key,
-            stream=stream
+            streaming=stream,
+            client=sync_client.chat.completions,
+            async_client=async_client.chat.completions,
+            **usage_options,
         )
 
     elif provider == "gemini":
@@ -51,18 +190,57 @@ def get_llm(
         if not api_key:
             raise ValueError("GEMINI_API_KEY is not set")
 
-        return ChatGoogleGenerativeAI(
+        return client_pool.gemini_model(
+            api_key=api_key,
             model=model or settings.gemini_model,
             temperature=temperature,
-            google_api_key=api_key,
-            stream=stream,
-            convert_system_message_to_human=True
+            stream=stream
         )
 
+    elif provider == "simulated":
+        # Imported here: the simulated model builds on app.fake_llm, which imports this module
+        from app.simulated_llm import create_simulated_llm
+        return create_simulated_llm(temperature=temperature, model=model)
+
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
 
 
+def get_cascade_llm(
+    temperature: float = 0.7,
+    model: Optional[str] = None,
+    provider: Optional[str] = None,
+    api_key: Optional[str] = None
+):
+    """
+    Get the small, fast model used as the first step of a model cascade.
+
+    Args:
+        temperature: Temperature setting for the LLM
+        model: The agent's primary model (overrides default from settings)
+        provider: LLM provider to use (overrides default from settings)
+        api_key: API key for the provider
+
+    Returns:
+        LLM instance for the provider's cascade model, or None when the cascade is
+        disabled or the primary model already is the cascade model
+    """
+    if not settings.cascade_enabled:
+        return None
+
+    provider = (provider or settings.llm_provider).lower()
+    if provider == "openai":
+        primary, small = model or settings.openai_model, settings.openai_cascade_model
+    elif provider == "gemini":
+        primary, small = model or settings.gemini_model, settings.gemini_cascade_model
+    else:
+        return None
+
+    if not small or small == primary:
+        return None
+    return get_llm(temperature=temperature, model=small, provider=provider, api_key=api_key)
+
+
 def get_current_provider() -> str:
     """Get the currently configured LLM provider"""
     return settings.llm_provider
@@ -76,5 +254,28 @@ def get_current_model() -> str:
         return settings.openai_model
     elif provider == "gemini":
         return settings.gemini_model
+    elif provider == "simulated":
+        return settings.simulated_model
     else:
         return "unknown"
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool statistics for the shared LLM clients"""
+    return client_pool.stats()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for budgeting before a call"""
+    return max(1, len(text) // 4)
+
+
+def get_llm_identity(llm: Any) -> Tuple[str, str]:
+    """Get the (provider, model) an LLM instance talks to"""
+    if isinstance(llm, ChatOpenAI):
+        return "openai", llm.model_name
+    if isinstance(llm, ChatGoogleGenerativeAI):
+        return "gemini", llm.model
+    provider = getattr(llm, "provider", None) or type(llm).__name__.lower()
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or "unknown"
+    return provider, model
@@ -0,0 +1,259 @@
+"""
+LLM Gateway - Single entry point for agent LLM calls
+Renders the agent prompt, serves repeated prompts from the response cache,
+waits for the provider's rate-limit budget and invokes the model with the
+configured timeout. Transient failures are retried with backoff and slow calls
+may be hedged (see app.llm_policy). Callers that pass ``on_field`` get the
+response streamed and each top-level JSON field reported as soon as it is complete.
+"""
+
+from typing import Dict, Any, Callable, Optional, Tuple
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.messages import BaseMessage
+from langchain_core.prompt_values import PromptValue
+from app.config import settings
+from app.llm_cache import response_cache
+from app.llm_factory import estimate_tokens, get_llm_identity
+from app.llm_usage import record_llm_call
+from app.prometheus import errors_total, llm_call_duration, llm_in_flight
+from app.llm_policy import backoff_delay, first_completed, hedge_delay, is_retryable_error, latency_tracker, policy_stats
+from app.rate_limiter import Reservation, rate_limiters, is_rate_limit_error, retry_after_seconds
+from app.streaming_json import IncrementalJSONParser
+from app.tracing import tracer
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+FieldCallback = Callable[[str, Any], None]
+
+
+async def _agenerate(llm: Any, prompt_value: PromptValue) -> Tuple[str, Dict[str, int]]:
+    """Call the model and return its text plus the token usage the provider reported"""
+    result = await llm.agenerate_prompt([prompt_value])
+    message: BaseMessage = result.generations[0][0].message
+    return message.content, (result.llm_output or {}).get("token_usage") or {}
+
+
+def _chunk_usage(chunk: Any) -> Dict[str, int]:
+    """Token usage carried by a streamed chunk, in the token_usage shape; empty when it has none.
+    Providers that report streamed usage put it on the last chunk, either as LangChain's
+    usage_metadata or in response_metadata (OpenAI-style token_usage, Gemini-style usage_metadata).
+    """
+    usage = getattr(chunk, "usage_metadata", None)
+    if usage:
+        return {
+            "prompt_tokens": usage.get("input_tokens", 0),
+            "completion_tokens": usage.get("output_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+    metadata = getattr(chunk, "response_metadata", None) or {}
+    if metadata.get("token_usage"):
+        return dict(metadata["token_usage"])
+    usage = metadata.get("usage_metadata")
+    if usage:
+        return {
+            "prompt_tokens": usage.get("prompt_token_count", 0),
+            "completion_tokens": usage.get("candidates_token_count", 0),
+            "total_tokens": usage.get("total_token_count", 0),
+        }
+    return {}
+
+
+async def _astream(llm: Any, prompt_value: PromptValue, on_field: FieldCallback) -> Tuple[str, Dict[str, int]]:
+    """Stream the model's text, reporting JSON fields as they complete.
+    Returns the usage the provider reported on the stream, or an empty dict when it reported none.
+    """
+    parser = IncrementalJSONParser()
+    parts = []
+    token_usage: Dict[str, int] = {}
+    async for chunk in llm.astream(prompt_value):
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        parts.append(text)
+        token_usage = _chunk_usage(chunk) or token_usage
+        for field, value in parser.feed(text):
+            on_field(field, value)
+    return "".join(parts), token_usage
+
+
+async def _request(
+    llm: Any,
+    prompt_value: PromptValue,
+    on_field: Optional[FieldCallback],
+    reservation: Reservation,
+) -> Tuple[str, Dict[str, int], Reservation, float]:
+    """One provider request; returns its text, reported usage, the budget it used and its latency"""
+    started = time.monotonic()
+    llm_in_flight.inc()
+    try:
+        if on_field:
+            content, token_usage = await _astream(llm, prompt_value, on_field)
+        else:
+            content, token_usage = await _agenerate(llm, prompt_value)
+    finally:
+        llm_in_flight.dec()
+    return content, token_usage, reservation, time.monotonic() - started
+
+
+def field_emitter(
+    event_callback: Optional[Callable[[str, Dict[str, Any]], None]],
+    workflow_id: str,
+    stage: str,
+) -> Optional[FieldCallback]:
+    """Build an on_field callback that forwards streamed fields as agent_output events"""
+    if event_callback is None or not settings.llm_streaming_enabled:
+        return None
+
+    def on_field(field: str, value: Any) -> None:
+        event_callback(workflow_id, {
+            "type": "agent_output",
+            "stage": stage,
+            "field": field,
+            "value": value,
+            "details": f"{field}: {json.dumps(value)}",
+        })
+
+    return on_field
+
+
+async def lookup_cached(
+    agent: str,
+    llm: Any,
+    prompt_template: ChatPromptTemplate,
+    prompt_vars: Dict[str, Any],
+    parse: Callable[[str], Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Return the parsed cached response for a prompt without calling the model, or None"""
+    cache_key = response_cache.make_key(llm, prompt_template.invoke(prompt_vars).to_string())
+    cached = await response_cache.get(agent, cache_key)
+    return parse(cached) if cached is not None else None
+
+
+async def remember(
+    agent: str,
+    llm: Any,
+    prompt_template: ChatPromptTemplate,
+    prompt_vars: Dict[str, Any],
+    content: str,
+) -> None:
+    """Cache a response obtained outside ainvoke_llm (e.g. split out of a batched call)"""
+    cache_key = response_cache.make_key(llm, prompt_template.invoke(prompt_vars).to_string())
+    await response_cache.put(agent, cache_key, content)
+
+
+async def ainvoke_llm(
+    agent: str,
+    llm: Any,
+    prompt_template: ChatPromptTemplate,
+    prompt_vars: Dict[str, Any],
+    parse: Callable[[str], Dict[str, Any]],
+    on_field: Optional[FieldCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Invoke an agent's LLM and parse the response.
+
+    Args:
+        agent: Agent name (triage, investigation, decision, response); selects the cache TTL
+        llm: Chat model from get_llm
+        prompt_template: The agent's prompt template
+        prompt_vars: Variables used to render the prompt
+        parse: Agent parser turning response text into a result dict
+        on_field: Optional callback; when set the response is streamed and called with
+            each top-level JSON field as soon as it is complete (not called on cache hits)
+
+    Returns:
+        Parsed result dict
+
+    Raises:
+        ValueError: If the LLM returns an empty response or it cannot be parsed
+        asyncio.TimeoutError: If no attempt finished within llm_timeout_seconds
+    """
+    call_started = time.monotonic()
+    with tracer.span("llm.render_prompt", agent=agent):
+        prompt_value = prompt_template.invoke(prompt_vars)
+        prompt_text = prompt_value.to_string()
+        cache_key = response_cache.make_key(llm, prompt_text)
+    provider, model = get_llm_identity(llm)
+
+    cached = await response_cache.get(agent, cache_key)
+    if cached is not None:
+        record_llm_call(agent, provider, model, 0, 0, time.monotonic() - call_started, cached=True)
+        with tracer.span("llm.parse", agent=agent, cached=True):
+            return parse(cached)
+
+    limiter = rate_limiters.get(provider, model)
+    latency_key = (agent, provider, model)
+    estimated_tokens = estimate_tokens(prompt_text) + settings.llm_estimated_completion_tokens
+    deadline = time.monotonic() + settings.llm_timeout_seconds
+
+    def start_hedge():
+        # Hedges only use spare budget and never stream, so fields are reported once
+        hedge_reservation = limiter.try_acquire(estimated_tokens)
+        return _request(llm, prompt_value, None, hedge_reservation) if hedge_reservation else None
+
+    streamed_fields = False
+    if on_field:
+        stream_field = on_field
+
+        def on_field(field: str, value: Any) -> None:
+            nonlocal streamed_fields
+            streamed_fields = True
+            stream_field(field, value)
+
+    attempt_timeout = settings.llm_attempt_timeout_seconds or settings.llm_timeout_seconds
+    rate_limited = failures = 0
+    waited = 0.0
+    with tracer.span("llm.call", agent=agent, provider=provider, model=model, streamed=on_field is not None) as span:
+        while True:
+            reservation = await limiter.acquire(estimated_tokens)
+            waited += reservation.waited_seconds
+            timeout = max(0.0, min(attempt_timeout, deadline - time.monotonic()))
+            try:
+                content, token_usage, reservation, latency = await first_completed(
+                    _request(llm, prompt_value, on_field, reservation), start_hedge, hedge_delay(latency_key), timeout
+                )
+                break
+            except Exception as e:
+                errors_total.inc("llm", type(e).__name__)
+                if streamed_fields:
+                    # Fields already reached the client; a retry would report them a second time
+                    raise
+                if is_rate_limit_error(e) and rate_limited < settings.llm_rate_limit_retries:
+                    limiter.on_rate_limited(retry_after_seconds(e))
+                    rate_limited += 1
+                    continue
+                remaining = deadline - time.monotonic()
+                if not is_retryable_error(e) or failures >= settings.llm_max_retries or remaining <= 0:
+                    raise
+                failures += 1
+                policy_stats.retries += 1
+                delay = min(backoff_delay(failures), remaining)
+                logger.warning(f"{agent} LLM call failed ({type(e).__name__}); retry {failures} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            finally:
+                if span:
+                    span.attributes.update(retries=failures, rate_limited=rate_limited, rate_limit_wait_ms=round(waited * 1000, 3))
+
+        latency_tracker.record(latency_key, latency)
+        llm_call_duration.observe(time.monotonic() - call_started, agent, provider, model)
+        prompt_tokens = token_usage.get("prompt_tokens") or estimate_tokens(prompt_text)
+        completion_tokens = token_usage.get("completion_tokens") or (estimate_tokens(content) if content else 0)
+        record_llm_call(
+            agent, provider, model, prompt_tokens, completion_tokens, time.monotonic() - call_started,
+            estimated="prompt_tokens" not in token_usage,
+        )
+        if span:
+            span.attributes.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, provider_latency_ms=round(latency * 1000, 3))
+    if not content:
+        limiter.reconcile(reservation, prompt_tokens)
+        raise ValueError("LLM invocation failed or returned an empty response")
+    limiter.reconcile(reservation, token_usage.get("total_tokens") or prompt_tokens + completion_tokens)
+
+    # Only cache responses the agent could parse
+    with tracer.span("llm.parse", agent=agent, cached=False):
+        result = parse(content)
+    await response_cache.put(agent, cache_key, content)
+    return result
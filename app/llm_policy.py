@@ -0,0 +1,177 @@
+"""
+LLM Call Policy - Retries with backoff and hedged requests for agent LLM calls
+Retryable provider errors are retried with exponential backoff and full jitter.
+When hedging is enabled, a request still running after the recent p95 latency
+for its agent/model gets a duplicate; the first response wins and the other is
+cancelled.
+"""
+
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple, TypeVar
+from collections import deque
+from app.config import settings
+import asyncio
+import logging
+import math
+import random
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+_RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "ConnectError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+}
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """True for transient failures worth retrying (timeouts, connection errors, 5xx)"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status in _RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in _RETRYABLE_ERROR_NAMES
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry number (1-based)"""
+    cap = min(settings.llm_backoff_max_seconds, settings.llm_backoff_base_seconds * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per agent and provider/model"""
+
+    def __init__(self, window: int):
+        self.window = max(1, window)
+        self._samples: Dict[Tuple[str, str, str], deque] = {}
+
+    def record(self, key: Tuple[str, str, str], seconds: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, key: Tuple[str, str, str], pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until enough samples were seen"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < settings.llm_hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for key, samples in self._samples.items():
+            delay = hedge_delay(key)
+            stats[":".join(key)] = {
+                "samples": len(samples),
+                "p50_seconds": round(sorted(samples)[len(samples) // 2], 3),
+                "p95_seconds": round(self.percentile(key, 95) or 0.0, 3) if len(samples) >= settings.llm_hedge_min_samples else None,
+                "hedge_after_seconds": round(delay, 3) if delay is not None else None,
+            }
+        return stats
+
+
+class PolicyStats:
+    """Counters for retries and hedged requests"""
+
+    def __init__(self):
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hedging_enabled": settings.llm_hedging_enabled,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "hedges_skipped_rate_limited": self.hedges_skipped,
+        }
+
+
+def hedge_delay(key: Tuple[str, str, str]) -> Optional[float]:
+    """Delay before sending a duplicate request, or None when hedging is off or unwarmed"""
+    if not settings.llm_hedging_enabled:
+        return None
+    observed = latency_tracker.percentile(key, settings.llm_hedge_percentile)
+    if observed is None:
+        return None
+    return max(settings.llm_hedge_min_delay_seconds, observed)
+
+
+async def first_completed(
+    primary: Awaitable[T],
+    start_hedge: Callable[[], Optional[Awaitable[T]]],
+    delay: Optional[float],
+    timeout: float,
+) -> T:
+    """
+    Await ``primary``, racing it against a duplicate started after ``delay`` seconds.
+
+    Args:
+        primary: The original request
+        start_hedge: Returns the duplicate request, or None if it cannot be sent now
+        delay: Seconds to wait before hedging; None disables hedging
+        timeout: Overall deadline for this attempt
+
+    Returns:
+        The first successful result; the other request is cancelled
+
+    Raises:
+        asyncio.TimeoutError: If neither request finished before the deadline
+        Exception: The first request's error if every request failed
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = {asyncio.ensure_future(primary)}
+    hedge = None
+    error: Optional[BaseException] = None
+    try:
+        if delay is not None and delay < timeout:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                duplicate = start_hedge()
+                if duplicate is None:
+                    policy_stats.hedges_skipped += 1
+                else:
+                    policy_stats.hedges += 1
+                    hedge = asyncio.ensure_future(duplicate)
+                    pending.add(hedge)
+
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        policy_stats.hedges_won += 1
+                    return task.result()
+                error = error or task.exception()
+
+        if error is not None and not pending:
+            raise error
+        policy_stats.timeouts += 1
+        raise asyncio.TimeoutError(f"LLM call did not finish within {timeout:.1f}s")
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# Global latency tracker and counters shared by all agents
+latency_tracker = LatencyTracker(settings.llm_latency_window)
+policy_stats = PolicyStats()
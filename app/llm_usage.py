@@ -0,0 +1,86 @@
+"""
+LLM Usage - Per-workflow token, cost and latency accounting
+process_alert opens a usage scope for the workflow; every LLM call made inside
+it (by any agent, including speculative and cascaded calls) is recorded with
+its tokens, latency and estimated cost, and the orchestrator nodes add each
+agent's processing time. A batched triage call is recorded once, in the scope
+of the workflow that flushed the batch.
+"""
+
+from typing import Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.config import settings
+from app.context import LLMUsage
+import time
+
+
+class UsageScope:
+    """LLM calls and agent timings collected for one workflow"""
+
+    def __init__(self, rule_id: Optional[str]):
+        self.rule_id = rule_id
+        self.calls: List[LLMUsage] = []
+        self.agent_seconds: Dict[str, float] = {}
+
+
+_current_scope: ContextVar[Optional[UsageScope]] = ContextVar("llm_usage_scope", default=None)
+
+
+@contextmanager
+def usage_scope(rule_id: Optional[str]):
+    """Collect usage for the calls made inside the block (and tasks it spawns)"""
+    scope = UsageScope(rule_id)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost from settings.llm_pricing (per 1M tokens); unknown models cost 0"""
+    pricing = settings.llm_pricing.get(model)
+    if not pricing:
+        return 0.0
+    return (prompt_tokens * pricing.get("input", 0.0) + completion_tokens * pricing.get("output", 0.0)) / 1_000_000
+
+
+def record_llm_call(
+    agent: str,
+    provider: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency_seconds: float,
+    cached: bool = False,
+    estimated: bool = False,
+) -> None:
+    """Record one LLM call in the current workflow's scope (no-op outside a workflow)"""
+    scope = _current_scope.get()
+    if scope is None:
+        return
+    scope.calls.append(LLMUsage(
+        agent=agent,
+        provider=provider,
+        model=model,
+        rule_id=scope.rule_id,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency_seconds=round(latency_seconds, 4),
+        cost_usd=0.0 if cached else estimate_cost(model, prompt_tokens, completion_tokens),
+        cached=cached,
+        estimated=estimated,
+    ))
+
+
+@contextmanager
+def agent_timer(agent: str):
+    """Add the block's wall time to the agent's processing time in the current scope"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.agent_seconds[agent] = scope.agent_seconds.get(agent, 0.0) + time.monotonic() - started
@@ -16,7 +16,7 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, Response
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 import logging
@@ -25,13 +25,28 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 import tempfile
+import time
 
 
 from app.context import (
     Alert, SOCWorkflowState, WorkflowSummary, SystemMetrics, 
-    AgentMetrics, AlertStatus, Verdict, Priority
+    AgentMetrics, AlertStatus, Verdict, Priority, LLMUsage, UsageTotals
 )
-from app.orchestrator import get_orchestrator
+from app.orchestrator import get_orchestrator, speculation_stats
+from app.llm_factory import client_pool, get_pool_stats
+from app.llm_cache import response_cache
+from app.rate_limiter import rate_limiters
+from app.llm_policy import latency_tracker, policy_stats
+from app.cascade import cascade_stats
+from app.prompt_compaction import compaction_stats
+from app.scheduler import AlertScheduler
+from app import prometheus
+from app.tracing import tracer
+from app.fast_path import fast_path_engine
+from app.threat_intel import get_threat_intel_manager
+from app.correlation import CORRELATION_FIELDS, correlation_index, parse_timestamp
+from app.incidents import incident_clusterer
+from agents.triage_agent import batch_stats as triage_batch_stats
 from app.config import settings
 
 # Configure logging (console + optional file)
@@ -79,6 +94,11 @@ app.add_middleware(
     allow_headers=settings.cors_allow_headers,
 )
 
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """Close pooled LLM HTTP clients on shutdown"""
+    await client_pool.aclose()
+
 # In-memory storage for demo (in production, use database)
 workflows: Dict[str, SOCWorkflowState] = {}
 system_metrics = SystemMetrics()
@@ -153,6 +173,8 @@ def _normalize_alert_payload(raw: Dict[str, Any]) -> Dict[str, Any]:
 
     - Ensure `timestamp` exists; derive from `evidence_sample[0].time_utc` if present.
     - Normalize `severity` casing and values to allowed: critical/high/medium/low/info.
+    - Map SIEM-native fields (`title`, `tactics`/`techniques`, `entities`) onto
+      `rule_name`, `mitre` and `assets`, and keep the remaining fields as `raw_data`.
     """
     normalized = dict(raw)
 
@@ -183,6 +205,29 @@ def _normalize_alert_payload(raw: Dict[str, Any]) -> Dict[str, Any]:
         sev_key = sev.strip().lower()
         normalized["severity"] = sev_map.get(sev_key, sev_key)
 
+    # Map SIEM-native fields onto the Alert model
+    if not normalized.get("rule_name") and normalized.get("title"):
+        normalized["rule_name"] = normalized["title"]
+    if "mitre" not in normalized and ("tactics" in normalized or "techniques" in normalized):
+        normalized["mitre"] = {
+            "tactics": normalized.get("tactics") or [],
+            "techniques": normalized.get("techniques") or [],
+        }
+    entities = normalized.get("entities")
+    if "assets" not in normalized and isinstance(entities, dict):
+        normalized["assets"] = {
+            field: entities[field]
+            for field in ("host", "source_ip", "destination_ip", "user")
+            if isinstance(entities.get(field), str)
+        }
+    if "raw_data" not in normalized:
+        extra = {
+            k: v for k, v in raw.items()
+            if k not in Alert.model_fields and k not in ("title", "tactics", "techniques")
+        }
+        if extra:
+            normalized["raw_data"] = extra
+
     return normalized
 
 
@@ -218,9 +263,8 @@ async def upload_alert(file: UploadFile = File(...)):
             workflow_id = str(uuid.uuid4())
             initial_state = SOCWorkflowState(alert=alert, workflow_id=workflow_id)
             workflows[workflow_id] = initial_state
-            # Start processing asynchronously
-            import asyncio
-            asyncio.create_task(process_workflow(workflow_id, initial_state))
+            # Queue for processing (admission bounded by max_concurrent_alerts)
+            await scheduler.submit(workflow_id, initial_state)
             # Notify
             await manager.broadcast(workflow_id, {"type": "status", "stage": "submitted", "status": "processing"})
             submitted.append({"workflow_id": workflow_id, "alert_id": alert.alert_id})
@@ -311,8 +355,8 @@ async def process_alert(request: ProcessAlertRequest, background_tasks: Backgrou
         # Store workflow
         workflows[workflow_id] = initial_state
         
-        # Process in background
-        background_tasks.add_task(process_workflow, workflow_id, initial_state)
+        # Queue for processing (admission bounded by max_concurrent_alerts)
+        await scheduler.submit(workflow_id, initial_state)
 
         # Notify clients that workflow was created
         await manager.broadcast(workflow_id, {"type": "status", "stage": "submitted", "status": "processing"})
@@ -337,8 +381,8 @@ async def process_workflow(workflow_id: str, state: SOCWorkflowState):
         logger.info(f"Starting background processing for workflow {workflow_id}")
         
         # Process through orchestrator
-        orchestrator = get_orchestrator(event_callback=_event_callback, ai_provider=state.ai_provider, ai_model=state.ai_model, api_key=state.api_key)
-        final_state = await orchestrator.process_alert(state)
+        orchestrator = get_orchestrator(ai_provider=state.ai_provider, ai_model=state.ai_model, api_key=state.api_key)
+        final_state = await orchestrator.process_alert(state, event_callback=_event_callback)
         
         # Update stored workflow
         workflows[workflow_id] = final_state
@@ -358,15 +402,60 @@ async def process_workflow(workflow_id: str, state: SOCWorkflowState):
         
     except Exception as e:
         logger.error(f"Error processing workflow {workflow_id}: {str(e)}")
+        prometheus.errors_total.inc("process_workflow", type(e).__name__)
         state.errors.append(f"Workflow processing error: {str(e)}")
         state.status = AlertStatus.FAILED
         workflows[workflow_id] = state
         await manager.broadcast(workflow_id, {"type": "final", "status": "failed", "error": str(e)})
 
 
+# Global admission scheduler; enforces settings.max_concurrent_alerts
+scheduler = AlertScheduler(max_concurrency=settings.max_concurrent_alerts, handler=process_workflow)
+
+# Scheduler gauges are read at scrape time, so the hot path pays nothing for them
+prometheus.registry.gauge(
+    "soc_scheduler_queue_depth", "Workflows waiting for a scheduler worker",
+    callback=lambda: {(): scheduler.stats()["queue_depth"]},
+)
+prometheus.registry.gauge(
+    "soc_workflows_in_flight", "Workflows currently running in the scheduler",
+    callback=lambda: {(): scheduler.running},
+)
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    """Start the alert scheduler worker pool"""
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    """Stop the alert scheduler worker pool"""
+    await scheduler.stop()
+
+
+@app.on_event("startup")
+async def start_threat_intel_watcher():
+    """Watch the threat intel file and hot-swap rebuilt snapshots"""
+    get_threat_intel_manager().start()
+
+
+@app.on_event("shutdown")
+async def stop_threat_intel_watcher():
+    """Stop watching the threat intel file"""
+    await get_threat_intel_manager().stop()
+
+
 def update_system_metrics(state: SOCWorkflowState):
     """Update system metrics based on completed workflow"""
     system_metrics.total_alerts_processed += 1
+    prometheus.alerts_processed.inc(
+        state.status,
+        state.decision_result.final_verdict if state.decision_result else "none",
+        state.decision_result.priority if state.decision_result else "none",
+        state.alert.rule_id or "unknown",
+    )
     
     if state.decision_result:
         verdict = state.decision_result.final_verdict
@@ -397,10 +486,41 @@ def update_system_metrics(state: SOCWorkflowState):
             agent_metrics.failed += 1
         
         agent_metrics.last_execution = datetime.utcnow().isoformat()
+        
+        agent_seconds = state.agent_processing_seconds.get(agent_name.replace("_agent", ""))
+        if agent_seconds is not None:
+            # Running average over the workflows in which the agent actually ran
+            agent_metrics.timed_runs += 1
+            agent_metrics.average_processing_time += (agent_seconds - agent_metrics.average_processing_time) / agent_metrics.timed_runs
+    
+    # Aggregate LLM token, cost and latency usage by agent, model and rule
+    for usage in state.llm_usage:
+        agent_name = f"{usage.agent.split('_')[0]}_agent"
+        if agent_name not in system_metrics.agent_metrics:
+            system_metrics.agent_metrics[agent_name] = AgentMetrics(agent_name=agent_name)
+        agent_metrics = system_metrics.agent_metrics[agent_name]
+        agent_metrics.llm_calls += 1
+        agent_metrics.prompt_tokens += usage.prompt_tokens
+        agent_metrics.completion_tokens += usage.completion_tokens
+        agent_metrics.cost_usd += usage.cost_usd
+        agent_metrics.average_llm_latency += (usage.latency_seconds - agent_metrics.average_llm_latency) / agent_metrics.llm_calls
+        
+        _add_usage(system_metrics.usage_by_model.setdefault(f"{usage.provider}:{usage.model}", UsageTotals()), usage)
+        _add_usage(system_metrics.usage_by_rule.setdefault(usage.rule_id or "unknown", UsageTotals()), usage)
+        system_metrics.total_cost_usd += usage.cost_usd
     
     system_metrics.last_updated = datetime.utcnow().isoformat()
 
 
+def _add_usage(totals: UsageTotals, usage: LLMUsage):
+    """Add one LLM call to a usage aggregate"""
+    totals.llm_calls += 1
+    totals.prompt_tokens += usage.prompt_tokens
+    totals.completion_tokens += usage.completion_tokens
+    totals.cost_usd += usage.cost_usd
+    totals.average_latency += (usage.latency_seconds - totals.average_latency) / totals.llm_calls
+
+
 @app.get("/api/alerts/status/{workflow_id}", response_model=WorkflowStatusResponse)
 async def get_workflow_status(workflow_id: str, include_details: bool = False):
     """
@@ -426,7 +546,8 @@ async def get_workflow_status(workflow_id: str, include_details: bool = False):
         started_at=state.started_at,
         completed_at=state.completed_at,
         processing_time_seconds=state.processing_time_seconds,
-        errors=state.errors
+        errors=state.errors,
+        incident_id=state.incident_id
     )
     
     details = None
@@ -437,6 +558,9 @@ async def get_workflow_status(workflow_id: str, include_details: bool = False):
             "investigation": state.investigation_result.model_dump() if state.investigation_result else None,
             "decision": state.decision_result.model_dump() if state.decision_result else None,
             "response": state.response_result.model_dump() if state.response_result else None,
+            "prompt_tokens_saved": state.prompt_tokens_saved,
+            "llm_usage": [usage.model_dump() for usage in state.llm_usage],
+            "agent_processing_seconds": state.agent_processing_seconds,
             "warnings": state.warnings
         }
     
@@ -502,7 +626,8 @@ async def list_workflows(
             started_at=state.started_at,
             completed_at=state.completed_at,
             processing_time_seconds=state.processing_time_seconds,
-            errors=state.errors
+            errors=state.errors,
+            incident_id=state.incident_id
         )
         
         filtered_workflows.append(summary)
@@ -525,6 +650,126 @@ async def get_system_metrics():
     
     return system_metrics
 
+
+@app.get("/metrics")
+async def get_prometheus_metrics():
+    """Prometheus text-format metrics: node/LLM latency histograms, gauges and counters"""
+    return Response(content=prometheus.registry.render(), media_type=prometheus.CONTENT_TYPE)
+
+
+@app.get("/api/debug/traces")
+async def list_traces(limit: int = 50):
+    """List the most recent workflow traces (newest first, without spans)"""
+    return {"enabled": tracer.enabled, "traces": tracer.buffer.recent(limit)}
+
+
+@app.get("/api/debug/traces/{workflow_id}")
+async def get_trace(workflow_id: str):
+    """Get the span tree of a recent workflow: nodes, prompt rendering, LLM calls, parsing, threat intel"""
+    trace = tracer.buffer.get(workflow_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (tracing disabled or evicted from the buffer)")
+    return trace
+
+
+@app.get("/api/scheduler")
+async def get_scheduler_stats():
+    """Get alert scheduler queue depth, running count and wait times"""
+    return scheduler.stats()
+
+@app.get("/api/speculation")
+async def get_speculation_stats():
+    """Get speculative investigation statistics (latency saved vs. wasted)"""
+    return speculation_stats.to_dict()
+
+@app.get("/api/fast-path")
+async def get_fast_path_stats():
+    """Get fast-path rule hit counters (triage LLM calls saved)"""
+    return fast_path_engine.stats()
+
+@app.get("/api/threat-intel")
+async def get_threat_intel_stats():
+    """Get the current threat intel snapshot version, index sizes and reload counters"""
+    return get_threat_intel_manager().stats()
+
+@app.post("/api/threat-intel/reload")
+async def reload_threat_intel():
+    """Rebuild the threat intel snapshot now instead of waiting for the next poll"""
+    manager = get_threat_intel_manager()
+    reloaded = await manager.reload(force=True)
+    return {"reloaded": reloaded, "version": manager.snapshot.version, "last_error": manager.last_error}
+
+@app.get("/api/correlation")
+async def get_correlation_stats():
+    """Get correlation index size and query statistics"""
+    return correlation_index.stats()
+
+@app.get("/api/correlation/query")
+async def query_correlation(field: str, value: str, window_minutes: int = 60, at: Optional[str] = None):
+    """
+    Alerts with one shared entity (host, source_ip, user or rule_id) within a time window
+    
+    ``at`` is an ISO timestamp; it defaults to the newest indexed alert, since alert
+    times follow the SIEM clock rather than this server's.
+    """
+    if field not in CORRELATION_FIELDS:
+        raise HTTPException(status_code=400, detail=f"field must be one of {', '.join(CORRELATION_FIELDS)}")
+    reference = parse_timestamp(at) if at else (correlation_index.newest_timestamp or time.time())
+    if reference is None:
+        raise HTTPException(status_code=400, detail="at must be an ISO 8601 timestamp")
+    value = value.lower() if field in ("host", "user") else value
+    postings = correlation_index.query(field, value, reference, window_minutes * 60)
+    return {
+        "field": field,
+        "value": value,
+        "window_minutes": window_minutes,
+        "alerts": [
+            {"alert_id": p.alert_id, "workflow_id": p.workflow_id, "rule_id": p.rule_id, "severity": p.severity,
+             "timestamp": datetime.utcfromtimestamp(p.timestamp).isoformat()}
+            for p in sorted(postings, key=lambda p: p.timestamp)
+        ],
+    }
+
+@app.get("/api/incidents")
+async def get_incidents(limit: int = 20):
+    """Get incident clustering statistics and the largest open incidents"""
+    return {**incident_clusterer.stats(), "incidents": incident_clusterer.recent(limit)}
+
+@app.get("/api/triage/batching")
+async def get_triage_batch_stats():
+    """Get micro-batched triage statistics"""
+    return {"enabled": settings.triage_batch_enabled, **triage_batch_stats}
+
+@app.get("/api/llm/pool")
+async def get_llm_pool_stats():
+    """Get shared LLM client pool statistics (in-use, idle, handshakes avoided)"""
+    return get_pool_stats()
+
+@app.get("/api/llm/rate-limits")
+async def get_llm_rate_limit_stats():
+    """Get per-provider/model rate limiter statistics"""
+    return rate_limiters.stats()
+
+@app.get("/api/llm/retries")
+async def get_llm_retry_stats():
+    """Get retry/hedging counters and observed latency per agent and model"""
+    return {**policy_stats.to_dict(), "latency": latency_tracker.stats()}
+
+@app.get("/api/llm/cascade")
+async def get_llm_cascade_stats():
+    """Get per-stage model cascade escalation rate and latency saved"""
+    return cascade_stats.to_dict()
+
+@app.get("/api/llm/compaction")
+async def get_prompt_compaction_stats():
+    """Get prompt compaction counters (prompts compacted, estimated tokens saved)"""
+    return compaction_stats
+
+@app.get("/api/llm/cache")
+async def get_llm_cache_stats():
+    """Get LLM response cache hit/miss statistics"""
+    return response_cache.stats()
+
 @app.post("/api/alerts/batch")
 async def process_batch(request: ProcessBatchRequest, background_tasks: BackgroundTasks):
     """
@@ -553,9 +798,8 @@ async def process_batch(request: ProcessBatchRequest, background_tasks: Backgrou
                     api_key=request.api_key
                 )
                 workflows[workflow_id] = initial_state
-                # Start processing asynchronously
-                import asyncio
-                asyncio.create_task(process_workflow(workflow_id, initial_state))
+                # Queue for processing (admission bounded by max_concurrent_alerts)
+                await scheduler.submit(workflow_id, initial_state)
                 # Notify
                 await manager.broadcast(workflow_id, {"type": "status", "stage": "submitted", "status": "processing"})
                 submitted.append({"workflow_id": workflow_id, "alert_id": alert.alert_id})
@@ -609,6 +853,8 @@ async def get_ground_truth():
 async def clear_workflows():
     """Clear all workflows (for testing/demo purposes)"""
     workflows.clear()
+    correlation_index.clear()
+    incident_clusterer.clear()
     
     # Reset metrics
     global system_metrics
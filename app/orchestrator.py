@@ -3,28 +3,66 @@ SOC Workflow Orchestrator using LangGraph
 Coordinates the multi-agent workflow for alert processing
 """
 
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+from collections import OrderedDict
+from functools import partial
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from app.context import SOCWorkflowState, AlertStatus
+from app.config import settings
+from app.correlation import correlation_index
+from app.fast_path import fast_path_engine
+from app.incidents import incident_clusterer
+from app.llm_usage import agent_timer, usage_scope
+from app.prometheus import errors_total, node_duration, node_in_flight, workflow_duration
+from app.tracing import tracer
 from agents.triage_agent import create_triage_agent
 from agents.investigation_agent import create_investigation_agent
 from agents.decision_agent import create_decision_agent
 from agents.response_agent import create_response_agent
+import asyncio
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+class SpeculationStats:
+    """Counters for speculative investigation: latency saved when kept vs. work wasted when discarded"""
+
+    def __init__(self):
+        self.started = 0
+        self.kept = 0
+        self.discarded = 0
+        self.failed = 0
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.speculative_investigation_enabled,
+            "started": self.started,
+            "kept": self.kept,
+            "discarded": self.discarded,
+            "failed": self.failed,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "wasted_seconds": round(self.wasted_seconds, 3),
+        }
+
+
+speculation_stats = SpeculationStats()
+
+
 class SOCOrchestrator:
     """Orchestrates the SOC agent workflow using LangGraph"""
     
-    def __init__(self, event_callback: Callable[[str, Dict[str, Any]], None] | None = None, ai_provider=None, ai_model=None, api_key=None):
+    def __init__(self, ai_provider=None, ai_model=None, api_key=None):
         # Initialize agents
         self.triage_agent = create_triage_agent(ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
         self.investigation_agent = create_investigation_agent(ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
         self.decision_agent = create_decision_agent(ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
         self.response_agent = create_response_agent(ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
-        self.event_callback = event_callback
         
         # Build workflow graph
         self.workflow = self._build_workflow()
@@ -37,10 +75,10 @@ class SOCOrchestrator:
         workflow = StateGraph(SOCWorkflowState)
         
         # Add nodes
-        workflow.add_node("triage", self._triage_node)
-        workflow.add_node("investigate", self._investigation_node)
-        workflow.add_node("decide", self._decision_node)
-        workflow.add_node("respond", self._response_node)
+        workflow.add_node("triage", self._timed_node("triage", self._triage_node))
+        workflow.add_node("investigate", self._timed_node("investigation", self._investigation_node))
+        workflow.add_node("decide", self._timed_node("decision", self._decision_node))
+        workflow.add_node("respond", self._timed_node("response", self._response_node))
         
         # Define edges
         workflow.set_entry_point("triage")
@@ -81,95 +119,223 @@ class SOCOrchestrator:
         
         return workflow
 
-    def _to_plain(self, obj: Any) -> Any:
-        """Convert Pydantic models, Enums, and complex structures to plain Python types.
-        Ensures LangGraph receives a pure dict with lists/scalars only.
-        """
-        try:
-            from enum import Enum
-            from pydantic import BaseModel
-        except Exception:
-            # Fallback imports not strictly necessary but keep function safe
-            BaseModel = tuple()
-            class Enum:  # type: ignore
-                pass
-
-        if isinstance(obj, BaseModel):
-            # Force deep conversion via JSON to avoid any nested BaseModel leakage
+    @staticmethod
+    def _timed_node(name: str, node: Callable[[SOCWorkflowState, RunnableConfig], Awaitable[Dict[str, Any]]]):
+        """Wrap a node in a trace span and export its duration and in-flight count to /metrics"""
+        async def timed(state: SOCWorkflowState, config: RunnableConfig) -> Dict[str, Any]:
+            node_in_flight.inc(name)
+            started = time.monotonic()
+            outcome = "error"
             try:
-                import json as _json
-                if hasattr(obj, "model_dump_json"):
-                    return self._to_plain(_json.loads(obj.model_dump_json()))
-                elif hasattr(obj, "json"):
-                    return self._to_plain(_json.loads(obj.json()))
-            except Exception:
-                # Fallback to dict-based deep conversion
-                if hasattr(obj, "model_dump"):
-                    return {k: self._to_plain(v) for k, v in obj.model_dump(mode="python").items()}
-                else:
-                    return {k: self._to_plain(v) for k, v in obj.dict().items()}
-        if isinstance(obj, Enum):
-            return getattr(obj, "value", str(obj))
-        if isinstance(obj, dict):
-            return {self._to_plain(k): self._to_plain(v) for k, v in obj.items()}
-        if isinstance(obj, (list, tuple, set)):
-            return [self._to_plain(v) for v in obj]
-        # Primitive or unknown - return as-is
-        return obj
-    
-    async def _triage_node(self, state: SOCWorkflowState) -> SOCWorkflowState:
+                with tracer.span(f"node.{name}") as span:
+                    updates = await node(state, config)
+                    outcome = "failed" if updates.get("status") == AlertStatus.FAILED else "ok"
+                    if span:
+                        span.set_attribute("outcome", outcome)
+                return updates
+            finally:
+                node_in_flight.dec(name)
+                node_duration.observe(time.monotonic() - started, name, outcome)
+        return timed
+
+    @staticmethod
+    def _get_event_callback(config: Optional[RunnableConfig]) -> Callable[[str, Dict[str, Any]], None] | None:
+        """Resolve the per-workflow event callback passed at invoke time.
+        The compiled graph is shared between workflows, so the callback travels in the run config.
+        """
+        if not config:
+            return None
+        return config.get("configurable", {}).get("event_callback")
+
+    @staticmethod
+    def _state_payload(state: SOCWorkflowState) -> Dict[str, Any]:
+        """Shallow field dict used as the LangGraph input.
+        Nested models are handed over by reference; pydantic does not revalidate model
+        instances, so the alert and its evidence are never re-serialized between nodes.
+        """
+        # A pydantic model's __dict__ holds exactly its fields; copying it allocates the dict once
+        return state.__dict__.copy()
+
+    @staticmethod
+    def _final_state(result: Dict[str, Any]) -> SOCWorkflowState:
+        """Rebuild the final state from LangGraph channel values without revalidation.
+        Every value was produced by the agents or came from an already validated state.
+        """
+        return SOCWorkflowState.model_construct(**result)
+
+    async def _triage_node(self, state: SOCWorkflowState, config: RunnableConfig) -> SOCWorkflowState:
         """Triage agent node"""
+        event_callback = self._get_event_callback(config)
         logger.info(f"Executing triage for alert {state.alert.alert_id}")
         state.current_agent = "triage"
-        if self.event_callback:
-            self.event_callback(state.workflow_id, {"stage": "triage", "status": "started"})
+        if event_callback:
+            event_callback(state.workflow_id, {"stage": "triage", "status": "started"})
+        speculative_state = None
         try:
-            result_state = await self.triage_agent.execute(state, self.event_callback)
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "triage", "status": "completed", "result": result_state.triage_result.model_dump() if result_state.triage_result else None})
+            # Deterministic fast path for well-understood patterns skips the LLM
+            with agent_timer("triage"), tracer.span("fast_path.evaluate") as span:
+                fast_result = fast_path_engine.evaluate(state.alert) if settings.fast_path_enabled else None
+                if span:
+                    span.set_attribute("matched", fast_result is not None)
+            if fast_result is not None:
+                state.status = AlertStatus.TRIAGING
+                state.triage_result = fast_result
+                result_state = state
+            else:
+                speculation = self._start_speculation(state)
+                triage_callback = event_callback
+
+                if speculation:
+                    def triage_callback(workflow_id: str, event: Dict[str, Any]) -> None:
+                        # A streamed requires_investigation=false makes the speculation moot before triage finishes
+                        nonlocal speculation
+                        if speculation and event.get("field") == "requires_investigation" and event.get("value") is False:
+                            self._discard_speculation(speculation)
+                            speculation = None
+                        if event_callback:
+                            event_callback(workflow_id, event)
+
+                triage_started = time.monotonic()
+                try:
+                    with agent_timer("triage"):
+                        result_state = await self.triage_agent.execute(state, triage_callback)
+                except BaseException:
+                    if speculation:
+                        self._discard_speculation(speculation)
+                    raise
+                if speculation:
+                    speculative_state = await self._resolve_speculation(
+                        speculation, result_state, time.monotonic() - triage_started
+                    )
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "triage", "status": "completed", "result": result_state.triage_result.model_dump() if result_state.triage_result else None})
             # Return dict updates for LangGraph
-            return {
+            updates = {
                 "status": result_state.status,
                 "current_agent": result_state.current_agent,
-                "triage_result": self._to_plain(result_state.triage_result) if result_state.triage_result else None,
+                "triage_result": result_state.triage_result,
+                "prompt_tokens_saved": result_state.prompt_tokens_saved,
                 "errors": result_state.errors,
                 "warnings": result_state.warnings,
             }
+            if speculative_state is not None:
+                updates["investigation_result"] = speculative_state.investigation_result
+                updates["prompt_tokens_saved"] = {**result_state.prompt_tokens_saved, **speculative_state.prompt_tokens_saved}
+                updates["warnings"] = result_state.warnings + speculative_state.warnings
+                if event_callback:
+                    event_callback(state.workflow_id, {"stage": "investigation", "status": "completed", "speculative": True, "result": speculative_state.investigation_result.model_dump()})
+            return updates
         except Exception as e:
             logger.error(f"Triage node error: {str(e)}")
+            errors_total.inc("triage", type(e).__name__)
             state.errors.append(f"Triage error: {str(e)}")
             state.status = AlertStatus.FAILED
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "triage", "status": "failed", "error": str(e)})
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "triage", "status": "failed", "error": str(e)})
             return {
                 "status": state.status,
                 "current_agent": state.current_agent,
                 "errors": state.errors,
             }
     
-    async def _investigation_node(self, state: SOCWorkflowState) -> SOCWorkflowState:
+    def _start_speculation(self, state: SOCWorkflowState) -> Optional[Tuple[asyncio.Task, float, Optional[asyncio.Future]]]:
+        """Start investigation alongside triage for configured severities/rules"""
+        if not settings.speculative_investigation_enabled or not state.enable_ai:
+            return None
+        severity = getattr(state.alert.severity, "value", state.alert.severity)
+        if severity not in settings.speculative_severities and state.alert.rule_id not in settings.speculative_rules:
+            return None
+
+        incident = incident_clusterer.incident_for(state.workflow_id)
+        if incident is not None and not incident.is_founder(state.workflow_id):
+            # Later incident members reuse the founder's investigation instead of speculating
+            return None
+
+        speculation_stats.started += 1
+        # Investigation mutates status/warnings, so it works on its own shallow copy
+        speculative = state.model_copy(update={"warnings": [], "errors": []})
+        task = asyncio.create_task(self._speculate(speculative))
+        # Incident members wait on ``published``, which only carries the result once triage keeps it
+        published = None
+        if incident is not None:
+            published = asyncio.get_running_loop().create_future()
+            incident_clusterer.track_investigation(incident, state.alert, published)
+        return task, time.monotonic(), published
+
+    async def _speculate(self, state: SOCWorkflowState) -> SOCWorkflowState:
+        with tracer.span("speculation.investigation"):
+            return await self.investigation_agent.execute(state)
+
+    def _discard_speculation(self, speculation: Tuple[asyncio.Task, float, Optional[asyncio.Future]]) -> None:
+        """Cancel a speculative investigation that triage made unnecessary"""
+        task, started_at, published = speculation
+        task.cancel()
+        if published is not None:
+            published.cancel()
+        speculation_stats.discarded += 1
+        speculation_stats.wasted_seconds += time.monotonic() - started_at
+
+    async def _resolve_speculation(self, speculation: Tuple[asyncio.Task, float, Optional[asyncio.Future]], triage_state: SOCWorkflowState, triage_seconds: float) -> Optional[SOCWorkflowState]:
+        """Keep the speculative investigation if triage wants one, otherwise cancel it.
+        Returns the investigated state, or None to fall back to the regular investigate node.
+        """
+        triage = triage_state.triage_result
+        if not triage or not triage.requires_investigation:
+            self._discard_speculation(speculation)
+            return None
+
+        task, started_at, published = speculation
+        speculative_state = None
+        try:
+            speculative_state = await task
+        except Exception as e:
+            logger.warning(f"Speculative investigation failed for alert {triage_state.alert.alert_id}: {str(e)}")
+            speculation_stats.failed += 1
+            speculation_stats.wasted_seconds += time.monotonic() - started_at
+            return None
+        finally:
+            # Incident members waiting on the speculation investigate themselves instead
+            if published is not None and speculative_state is None:
+                published.cancel()
+
+        # Sequential cost would be triage + investigation; overlapping saves the shorter of the two
+        investigation_seconds = time.monotonic() - started_at
+        speculation_stats.kept += 1
+        speculation_stats.saved_seconds += min(triage_seconds, investigation_seconds)
+        if published is not None:
+            published.set_result(speculative_state)
+        return speculative_state if speculative_state.investigation_result else None
+
+    async def _investigation_node(self, state: SOCWorkflowState, config: RunnableConfig) -> SOCWorkflowState:
         """Investigation agent node"""
+        event_callback = self._get_event_callback(config)
         logger.info(f"Executing investigation for alert {state.alert.alert_id}")
         state.current_agent = "investigation"
-        if self.event_callback:
-            self.event_callback(state.workflow_id, {"stage": "investigation", "status": "started"})
+        if event_callback:
+            event_callback(state.workflow_id, {"stage": "investigation", "status": "started"})
         try:
-            result_state = await self.investigation_agent.execute(state, self.event_callback)
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "investigation", "status": "completed", "result": result_state.investigation_result.model_dump() if result_state.investigation_result else None})
+            run = partial(self.investigation_agent.execute, state, event_callback)
+            incident = incident_clusterer.incident_for(state.workflow_id)
+            with agent_timer("investigation"):
+                result_state = await (incident_clusterer.investigate(incident, state, run) if incident else run())
+            if event_callback:
+                shared = bool(result_state.investigation_result and result_state.investigation_result.shared_from_alert_id)
+                event_callback(state.workflow_id, {"stage": "investigation", "status": "completed", "shared": shared, "incident_id": state.incident_id, "result": result_state.investigation_result.model_dump() if result_state.investigation_result else None})
             return {
                 "status": result_state.status,
                 "current_agent": result_state.current_agent,
-                "investigation_result": self._to_plain(result_state.investigation_result) if result_state.investigation_result else None,
+                "investigation_result": result_state.investigation_result,
+                "prompt_tokens_saved": result_state.prompt_tokens_saved,
                 "warnings": result_state.warnings,
                 "errors": result_state.errors,
             }
         except Exception as e:
             logger.error(f"Investigation node error: {str(e)}")
+            errors_total.inc("investigation", type(e).__name__)
             state.errors.append(f"Investigation error: {str(e)}")
             state.status = AlertStatus.FAILED
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "investigation", "status": "failed", "error": str(e)})
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "investigation", "status": "failed", "error": str(e)})
             return {
                 "status": state.status,
                 "current_agent": state.current_agent,
@@ -177,58 +343,64 @@ class SOCOrchestrator:
                 "errors": state.errors,
             }
     
-    async def _decision_node(self, state: SOCWorkflowState) -> SOCWorkflowState:
+    async def _decision_node(self, state: SOCWorkflowState, config: RunnableConfig) -> SOCWorkflowState:
         """Decision agent node"""
+        event_callback = self._get_event_callback(config)
         logger.info(f"Executing decision for alert {state.alert.alert_id}")
         state.current_agent = "decision"
-        if self.event_callback:
-            self.event_callback(state.workflow_id, {"stage": "decision", "status": "started"})
+        if event_callback:
+            event_callback(state.workflow_id, {"stage": "decision", "status": "started"})
         try:
-            result_state = await self.decision_agent.execute(state, self.event_callback)
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "decision", "status": "completed", "result": result_state.decision_result.model_dump() if result_state.decision_result else None})
+            with agent_timer("decision"):
+                result_state = await self.decision_agent.execute(state, event_callback)
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "decision", "status": "completed", "result": result_state.decision_result.model_dump() if result_state.decision_result else None})
             return {
                 "status": result_state.status,
                 "current_agent": result_state.current_agent,
-                "decision_result": self._to_plain(result_state.decision_result) if result_state.decision_result else None,
+                "decision_result": result_state.decision_result,
                 "errors": result_state.errors,
             }
         except Exception as e:
             logger.error(f"Decision node error: {str(e)}")
+            errors_total.inc("decision", type(e).__name__)
             state.errors.append(f"Decision error: {str(e)}")
             state.status = AlertStatus.FAILED
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "decision", "status": "failed", "error": str(e)})
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "decision", "status": "failed", "error": str(e)})
             return {
                 "status": state.status,
                 "current_agent": state.current_agent,
                 "errors": state.errors,
             }
     
-    async def _response_node(self, state: SOCWorkflowState) -> SOCWorkflowState:
+    async def _response_node(self, state: SOCWorkflowState, config: RunnableConfig) -> SOCWorkflowState:
         """Response agent node"""
+        event_callback = self._get_event_callback(config)
         logger.info(f"Executing response for alert {state.alert.alert_id}")
         state.current_agent = "response"
-        if self.event_callback:
-            self.event_callback(state.workflow_id, {"stage": "response", "status": "started"})
+        if event_callback:
+            event_callback(state.workflow_id, {"stage": "response", "status": "started"})
         try:
-            result_state = await self.response_agent.execute(state, self.event_callback)
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "response", "status": "completed", "result": result_state.response_result.model_dump() if result_state.response_result else None})
+            with agent_timer("response"):
+                result_state = await self.response_agent.execute(state, event_callback)
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "response", "status": "completed", "result": result_state.response_result.model_dump() if result_state.response_result else None})
             return {
                 "status": result_state.status,
                 "current_agent": result_state.current_agent,
-                "response_result": self._to_plain(result_state.response_result) if result_state.response_result else None,
+                "response_result": result_state.response_result,
                 "completed_at": result_state.completed_at,
                 "processing_time_seconds": result_state.processing_time_seconds,
                 "errors": result_state.errors,
             }
         except Exception as e:
             logger.error(f"Response node error: {str(e)}")
+            errors_total.inc("response", type(e).__name__)
             state.errors.append(f"Response error: {str(e)}")
             state.status = AlertStatus.FAILED
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {"stage": "response", "status": "failed", "error": str(e)})
+            if event_callback:
+                event_callback(state.workflow_id, {"stage": "response", "status": "failed", "error": str(e)})
             return {
                 "status": state.status,
                 "current_agent": state.current_agent,
@@ -242,9 +414,9 @@ class SOCOrchestrator:
         if state.status == AlertStatus.FAILED:
             return "decide"
         
-        # If triage says investigation needed, investigate
+        # If triage says investigation needed, investigate (unless speculation already did)
         if state.triage_result and state.triage_result.requires_investigation:
-            return "investigate"
+            return "decide" if state.investigation_result else "investigate"
         
         # Otherwise, skip investigation
         return "decide"
@@ -267,52 +439,46 @@ class SOCOrchestrator:
             return END
         return "respond"
     
-    async def process_alert(self, state: SOCWorkflowState) -> SOCWorkflowState:
+    async def process_alert(self, state: SOCWorkflowState, event_callback: Callable[[str, Dict[str, Any]], None] | None = None) -> SOCWorkflowState:
         """
         Process a single alert through the complete workflow
         
         Args:
             state: Initial SOCWorkflowState with alert data
+            event_callback: Optional callback for streaming progress of this workflow
             
         Returns:
             Final SOCWorkflowState with all agent results
         """
         logger.info(f"Starting workflow for alert {state.alert.alert_id}")
+        if settings.correlation_enabled:
+            # Indexed on entry so alerts arriving together can see each other
+            correlation_index.add(state.alert, state.workflow_id)
+            if settings.incident_clustering_enabled:
+                incident_clusterer.assign(state)
         
         try:
             # Run the workflow
-            print(f"[DEBUG] Calling ainvoke: alert_id={state.alert.alert_id}, workflow_id={state.workflow_id}, status={state.status}")
-            # Convert state to a plain dict (no Pydantic models or Enums)
-            input_payload = self._to_plain(state)
-            
-            if not isinstance(input_payload, dict):
-                raise TypeError(f"Expected dict for ainvoke input, got {type(input_payload)}")
-            
-            result = await self.app.ainvoke(input_payload)
-            
-            # Convert result back to SOCWorkflowState
-            if isinstance(result, dict):
-                try:
-                    # Use model_validate for Pydantic v2, parse_obj for v1
-                    if hasattr(SOCWorkflowState, "model_validate"):
-                        final_state = SOCWorkflowState.model_validate(result)
-                    else:
-                        final_state = SOCWorkflowState(**result)
-                except Exception as e:
-                    logger.error(f"Error converting result to SOCWorkflowState: {str(e)}")
-                    raise
-            elif isinstance(result, SOCWorkflowState):
-                # Already a SOCWorkflowState object
-                final_state = result
-            else:
-                raise TypeError(f"Unexpected result type from ainvoke: {type(result)}")
-            print(f"[DEBUG] ainvoke returned: decision_verdict={getattr(final_state.decision_result, 'final_verdict', None)}, priority={getattr(final_state.decision_result, 'priority', None)}, status={final_state.status}, errors={final_state.errors}")
+            started = time.monotonic()
+            with tracer.trace(
+                "workflow", state.workflow_id,
+                alert_id=state.alert.alert_id, rule_id=state.alert.rule_id, severity=getattr(state.alert.severity, "value", state.alert.severity),
+            ) as root, usage_scope(state.alert.rule_id) as usage:
+                result = await self.app.ainvoke(self._state_payload(state), config={"configurable": {"event_callback": event_callback}})
+                final_state = self._final_state(result)
+                if root:
+                    root.set_attribute("status", getattr(final_state.status, "value", final_state.status))
+                    root.set_attribute("verdict", getattr(final_state.decision_result, "final_verdict", None))
+                    root.set_attribute("priority", getattr(final_state.decision_result, "priority", None))
+            final_state.llm_usage = usage.calls
+            final_state.agent_processing_seconds = {agent: round(seconds, 3) for agent, seconds in usage.agent_seconds.items()}
+            workflow_duration.observe(time.monotonic() - started, final_state.status)
             
             logger.info(f"Workflow completed for alert {state.alert.alert_id}")
             logger.info(f"Final verdict: {final_state.decision_result.final_verdict if final_state.decision_result else 'None'}")
             logger.info(f"Final priority: {final_state.decision_result.priority if final_state.decision_result else 'None'}")
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {
+            if event_callback:
+                event_callback(state.workflow_id, {
                     "stage": "final",
                     "status": "completed" if final_state.status != AlertStatus.FAILED else "failed",
                     "verdict": final_state.decision_result.final_verdict if final_state.decision_result else None,
@@ -324,28 +490,85 @@ class SOCOrchestrator:
             
         except Exception as e:
             logger.error(f"Workflow error for alert {state.alert.alert_id}: {str(e)}")
+            errors_total.inc("workflow", type(e).__name__)
             state.errors.append(f"Workflow error: {str(e)}")
             state.status = AlertStatus.FAILED
-            if self.event_callback:
-                self.event_callback(state.workflow_id, {
+            if event_callback:
+                event_callback(state.workflow_id, {
                     "stage": "final",
                     "status": "failed",
                     "message": "Please retry the alert processing.",
                     "error": str(e)
                 })
             return state
+        finally:
+            incident_clusterer.release(state.workflow_id)
 
 
-# Global orchestrator instance
-_orchestrator_instance = None
+class OrchestratorRegistry:
+    """Bounded LRU registry of compiled orchestrators keyed by AI configuration.
 
+    Building an orchestrator creates four LLM clients, reads four prompt files, loads
+    threat intel and compiles the LangGraph workflow, so instances are reused across
+    workflows that share (provider, model, api_key). Entries idle for longer than
+    ``idle_ttl_seconds`` are dropped on the next lookup.
+    """
 
-def get_orchestrator(event_callback: Callable[[str, Dict[str, Any]], None] | None = None, ai_provider=None, ai_model=None, api_key=None) -> SOCOrchestrator:
-    """Get or create global orchestrator instance"""
-    global _orchestrator_instance
-    
-    # For now, create a new instance each time to support different AI configs
-    # In production, you might want to cache based on config
-    _orchestrator_instance = SOCOrchestrator(event_callback=event_callback, ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
-    
-    return _orchestrator_instance
+    def __init__(self, max_size: int, idle_ttl_seconds: float):
+        self.max_size = max(1, max_size)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[SOCOrchestrator, float]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(ai_provider=None, ai_model=None, api_key=None) -> Tuple[str, str, str]:
+        """Build a cache key; the API key is hashed so it is never held as a dict key"""
+        provider = (ai_provider or settings.llm_provider).lower()
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else ""
+        return provider, ai_model or "", key_hash
+
+    def get(self, ai_provider=None, ai_model=None, api_key=None) -> SOCOrchestrator:
+        """Return a cached orchestrator for the configuration, building it on a miss"""
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        key = self.make_key(ai_provider, ai_model, api_key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            orchestrator = entry[0]
+            self._entries[key] = (orchestrator, now)
+            self._entries.move_to_end(key)
+            return orchestrator
+
+        logger.info(f"Building orchestrator for provider={key[0]} model={key[1] or 'default'}")
+        orchestrator = SOCOrchestrator(ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
+        self._entries[key] = (orchestrator, now)
+        while len(self._entries) > self.max_size:
+            evicted_key, _ = self._entries.popitem(last=False)
+            logger.info(f"Evicted orchestrator for provider={evicted_key[0]} model={evicted_key[1] or 'default'}")
+        return orchestrator
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_ttl_seconds <= 0:
+            return
+        expired = [k for k, (_, last_used) in self._entries.items() if now - last_used > self.idle_ttl_seconds]
+        for k in expired:
+            del self._entries[k]
+
+    def clear(self) -> None:
+        """Drop all cached orchestrators"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global orchestrator registry
+_orchestrator_registry = OrchestratorRegistry(
+    max_size=settings.orchestrator_cache_size,
+    idle_ttl_seconds=settings.orchestrator_cache_ttl_seconds,
+)
+
+
+def get_orchestrator(ai_provider=None, ai_model=None, api_key=None) -> SOCOrchestrator:
+    """Get a cached orchestrator for the given AI configuration"""
+    return _orchestrator_registry.get(ai_provider=ai_provider, ai_model=ai_model, api_key=api_key)
@@ -0,0 +1,201 @@
+"""
+Prometheus Exporter - Counters, gauges and latency histograms in text format
+A dependency-free subset of the Prometheus client: metrics are plain dicts keyed
+by label values and histograms keep per-bucket counts, so recording is a dict
+lookup, a bisect and a few additions and can stay on in production. GET /metrics
+renders the registry in the text exposition format (version 0.0.4).
+"""
+
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from app.config import settings
+import math
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    """Base class: a named metric family with fixed label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple("" if value is None else str(getattr(value, "value", value)) for value in labels)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines for every label set"""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; optionally read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, *labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: Any, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        values = self._callback() if self._callback else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set (buckets are upper bounds, +Inf is implicit)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Optional[Sequence[float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets or settings.metrics_latency_buckets)) + (math.inf,)
+        # label key -> [per-bucket counts..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered collection of metric families rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Text exposition format for every registered metric"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the SOC pipeline's metric families
+registry = MetricsRegistry()
+
+node_duration = registry.histogram(
+    "soc_node_duration_seconds", "Orchestrator node execution time", ("node", "outcome")
+)
+node_in_flight = registry.gauge(
+    "soc_node_in_flight", "Orchestrator nodes currently executing", ("node",)
+)
+workflow_duration = registry.histogram(
+    "soc_workflow_duration_seconds", "End-to-end workflow time from graph start to final state", ("status",)
+)
+llm_call_duration = registry.histogram(
+    "soc_llm_call_duration_seconds", "LLM call time including rate-limit waits and retries", ("agent", "provider", "model")
+)
+llm_in_flight = registry.gauge(
+    "soc_llm_requests_in_flight", "Provider requests currently outstanding (hedges included)"
+)
+alerts_processed = registry.counter(
+    "soc_alerts_processed_total", "Completed workflows by outcome", ("status", "verdict", "priority", "rule_id")
+)
+errors_total = registry.counter(
+    "soc_errors_total", "Errors by component and exception type", ("component", "exception")
+)
@@ -0,0 +1,171 @@
+"""
+Prompt Compaction - Token-budgeted rendering of alert raw_data for agent prompts
+raw_data that fits the model's budget is inlined unchanged. Larger payloads have
+their row lists (e.g. 135 near-identical evidence_sample rows) replaced by a
+deterministic summary: row count, time span, constant fields, per-field value
+dictionaries or top-N values with distinct counts, and a few representative rows.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from app.config import settings
+from app.llm_factory import estimate_tokens, get_llm_identity
+import json
+
+_TIME_FIELDS = ("time_utc", "timestamp", "@timestamp", "time", "event_time")
+
+# (top values per field, representative rows) tried in order until the summary fits
+_SUMMARY_LEVELS: Tuple[Tuple[int, int], ...] = ((10, 5), (5, 3), (3, 2), (1, 1), (0, 0))
+
+
+@dataclass
+class CompactionResult:
+    """Rendered raw_data for a prompt and what compaction saved"""
+    text: str
+    original_tokens: int
+    tokens: int
+    compacted: bool
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.tokens)
+
+
+def _hashable(value: Any) -> Any:
+    return value if isinstance(value, (str, int, float, bool, type(None))) else json.dumps(value, sort_keys=True)
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    """ISO 8601 timestamp; naive ones are taken as UTC so they compare with aware ones"""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _time_span(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    field = next((f for f in _TIME_FIELDS if any(f in row for row in rows)), None)
+    if field is None:
+        return None
+    times = sorted(str(row[field]) for row in rows if row.get(field) is not None)
+    if not times:
+        return None
+    parsed = [(_parse_time(t), t) for t in times]
+    if all(p for p, _ in parsed):
+        # Chronological order; string order is only right when every row uses the same format
+        parsed.sort(key=lambda item: item[0])
+        span = {"field": field, "first": parsed[0][1], "last": parsed[-1][1]}
+        span["duration_seconds"] = round((parsed[-1][0] - parsed[0][0]).total_seconds(), 3)
+        return span
+    return {"field": field, "first": times[0], "last": times[-1]}
+
+
+def summarize_rows(rows: List[Dict[str, Any]], top_n: int, sample_rows: int) -> Dict[str, Any]:
+    """Deterministic summary of a list of homogeneous dict rows"""
+    fields: List[str] = []
+    for row in rows:
+        fields.extend(f for f in row if f not in fields)
+
+    time_span = _time_span(rows)
+    constant_fields: Dict[str, Any] = {}
+    value_counts: Dict[str, Dict[str, int]] = {}
+    top_values: Dict[str, Dict[str, Any]] = {}
+    for field in fields:
+        counts = Counter(_hashable(row[field]) for row in rows if field in row)
+        if len(counts) == 1 and sum(counts.values()) == len(rows):
+            constant_fields[field] = next(iter(counts))
+        elif time_span and field == time_span["field"]:
+            continue
+        elif len(counts) <= max(top_n, 1):
+            # Low cardinality: the full value dictionary is cheaper than repeating values per row
+            value_counts[field] = {str(value): count for value, count in counts.most_common()}
+        elif counts.most_common(1)[0][1] > 1:
+            top_values[field] = {"distinct": len(counts), "top": {str(v): c for v, c in counts.most_common(top_n)}}
+        else:
+            # Every value is unique (e.g. a spray across accounts): counts carry no information
+            top_values[field] = {"distinct": len(counts), "examples": list(counts)[:top_n]}
+
+    if sample_rows >= len(rows):
+        picks = list(range(len(rows)))
+    elif sample_rows == 1:
+        picks = [0]
+    else:
+        # Evenly spaced, always including the first and last row
+        picks = sorted({round(i * (len(rows) - 1) / (sample_rows - 1)) for i in range(sample_rows)})
+
+    summary: Dict[str, Any] = {"row_count": len(rows)}
+    if time_span:
+        summary["time_span"] = time_span
+    summary["constant_fields"] = constant_fields
+    if value_counts:
+        summary["value_counts"] = value_counts
+    if top_values:
+        summary["top_values"] = top_values
+    if picks:
+        summary["representative_rows"] = [
+            {k: v for k, v in rows[i].items() if k not in constant_fields} for i in picks
+        ]
+    return summary
+
+
+def _compact(raw_data: Dict[str, Any], top_n: int, sample_rows: int) -> Dict[str, Any]:
+    compacted = {}
+    for key, value in raw_data.items():
+        if isinstance(value, list) and len(value) > 3 and all(isinstance(row, dict) for row in value):
+            compacted[f"{key}_summary"] = summarize_rows(value, top_n, sample_rows)
+        else:
+            compacted[key] = value
+    return compacted
+
+
+def token_budget_for(llm: Any) -> int:
+    """raw_data token budget for a model; overrides keyed by "provider:model" or "provider" """
+    provider, model = get_llm_identity(llm)
+    overrides = settings.prompt_raw_data_token_budgets
+    return overrides.get(f"{provider}:{model}", overrides.get(provider, settings.prompt_raw_data_token_budget))
+
+
+def render_raw_data(raw_data: Optional[Dict[str, Any]], llm: Any) -> CompactionResult:
+    """
+    Render alert raw_data for a prompt within the model's token budget.
+
+    Args:
+        raw_data: The alert's raw_data
+        llm: The model the prompt is for; selects the budget
+
+    Returns:
+        CompactionResult with the text to inline and the tokens saved
+    """
+    if not raw_data:
+        return CompactionResult("No additional data", 0, 0, False)
+
+    text = json.dumps(raw_data, indent=2)
+    original_tokens = estimate_tokens(text)
+    budget = token_budget_for(llm)
+    if not settings.prompt_compaction_enabled or original_tokens <= budget:
+        return CompactionResult(text, original_tokens, original_tokens, False)
+
+    for top_n, sample_rows in _SUMMARY_LEVELS:
+        compact_text = json.dumps(_compact(raw_data, top_n, sample_rows), indent=1, default=str)
+        if estimate_tokens(compact_text) <= budget:
+            break
+    tokens = estimate_tokens(compact_text)
+    if tokens >= original_tokens:
+        return CompactionResult(text, original_tokens, original_tokens, False)
+
+    compaction_stats["compacted_prompts"] += 1
+    compaction_stats["tokens_saved"] += original_tokens - tokens
+    if tokens > budget:
+        compaction_stats["over_budget"] += 1
+    return CompactionResult(compact_text, original_tokens, tokens, True)
+
+
+# Compaction counters (shared across agents)
+compaction_stats = {
+    "compacted_prompts": 0,
+    "tokens_saved": 0,
+    "over_budget": 0,
+}
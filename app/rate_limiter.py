@@ -0,0 +1,179 @@
+"""
+Rate Limiter - Per-provider/model request and token budgets for LLM calls
+Token buckets for requests-per-minute and tokens-per-minute are charged with an
+estimate before each call and reconciled with the real usage afterwards, so
+bursts queue locally instead of turning into provider 429s.
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from app.config import settings
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket that may go into debt; callers wait until the debt is repaid"""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now and return how long the caller must wait before using it"""
+        self._refill()
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def available(self) -> float:
+        """Current balance (negative while callers are queued on debt)"""
+        self._refill()
+        return self.tokens
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+@dataclass
+class Reservation:
+    """Budget taken for a single LLM call"""
+    estimated_tokens: int
+    waited_seconds: float
+
+
+class ProviderRateLimiter:
+    """Request and token buckets for one provider/model"""
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int, burst_seconds: float):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute > 0 else None
+        self.blocked_until = 0.0
+        self.calls = 0
+        self.throttled = 0
+        self.rate_limited = 0
+        self.total_wait_seconds = 0.0
+        self.estimated_tokens = 0
+        self.actual_tokens = 0
+
+    async def acquire(self, estimated_tokens: int) -> Reservation:
+        """Reserve one request and the estimated tokens, sleeping if the budget is exhausted"""
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+
+        self.calls += 1
+        self.estimated_tokens += estimated_tokens
+        if wait > 0:
+            self.throttled += 1
+            self.total_wait_seconds += wait
+            await asyncio.sleep(wait)
+        return Reservation(estimated_tokens=estimated_tokens, waited_seconds=wait)
+
+    def try_acquire(self, estimated_tokens: int) -> Optional[Reservation]:
+        """Reserve budget only if it is available right now (used for optional hedged requests)"""
+        if self.blocked_until > time.monotonic():
+            return None
+        if self.requests and self.requests.available() < 1:
+            return None
+        if self.tokens and self.tokens.available() < estimated_tokens:
+            return None
+        if self.requests:
+            self.requests.reserve(1)
+        if self.tokens:
+            self.tokens.reserve(estimated_tokens)
+        self.calls += 1
+        self.estimated_tokens += estimated_tokens
+        return Reservation(estimated_tokens=estimated_tokens, waited_seconds=0.0)
+
+    def reconcile(self, reservation: Reservation, actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket with the usage reported for the call"""
+        if actual_tokens is None:
+            return
+        self.actual_tokens += actual_tokens
+        if self.tokens:
+            self.tokens.adjust(actual_tokens - reservation.estimated_tokens)
+
+    def on_rate_limited(self, retry_after: Optional[float]) -> None:
+        """Provider returned 429: hold all callers until the provider's retry-after passes"""
+        self.rate_limited += 1
+        delay = retry_after if retry_after is not None else settings.llm_rate_limit_default_backoff_seconds
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        logger.warning(f"Rate limited by {self.name}; pausing calls for {delay:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "rate_limited_responses": self.rate_limited,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "estimated_tokens": self.estimated_tokens,
+            "actual_tokens": self.actual_tokens,
+            "requests_available": round(self.requests.available(), 2) if self.requests else None,
+            "tokens_available": round(self.tokens.available(), 2) if self.tokens else None,
+        }
+
+
+class RateLimiterRegistry:
+    """Lazily creates one ProviderRateLimiter per provider/model"""
+
+    def __init__(self):
+        self._limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+
+    @staticmethod
+    def _limits_for(provider: str, model: str) -> Tuple[int, int]:
+        overrides = settings.llm_rate_limits.get(f"{provider}:{model}") or settings.llm_rate_limits.get(provider) or {}
+        return (
+            overrides.get("requests_per_minute", settings.llm_requests_per_minute),
+            overrides.get("tokens_per_minute", settings.llm_tokens_per_minute),
+        )
+
+    def get(self, provider: str, model: str) -> ProviderRateLimiter:
+        key = (provider, model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            rpm, tpm = self._limits_for(provider, model)
+            limiter = ProviderRateLimiter(f"{provider}:{model}", rpm, tpm, settings.llm_rate_limit_burst_seconds)
+            self._limiters[key] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {limiter.name: limiter.stats() for limiter in self._limiters.values()}
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for provider quota errors (OpenAI RateLimitError, Gemini ResourceExhausted, HTTP 429)"""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    return type(error).__name__ in ("RateLimitError", "ResourceExhausted")
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Extract a retry-after hint from a rate limit error, if the provider sent one"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Global limiter registry shared by all agents
+rate_limiters = RateLimiterRegistry()
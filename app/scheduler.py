@@ -0,0 +1,97 @@
+"""
+Alert Scheduler - Global admission control for alert workflows
+Runs at most ``max_concurrent_alerts`` pipelines at once and admits queued
+alerts in severity order (critical first, FIFO within a severity).
+"""
+
+from typing import Dict, Any, Callable, Awaitable, List, Optional
+from collections import deque
+from app.context import SOCWorkflowState, AlertSeverity
+import asyncio
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_RANK = {
+    AlertSeverity.CRITICAL.value: 0,
+    AlertSeverity.HIGH.value: 1,
+    AlertSeverity.MEDIUM.value: 2,
+    AlertSeverity.LOW.value: 3,
+    AlertSeverity.INFO.value: 4,
+}
+
+
+class AlertScheduler:
+    """Bounded worker pool pulling workflows from a severity-ordered queue"""
+
+    def __init__(self, max_concurrency: int, handler: Callable[[str, SOCWorkflowState], Awaitable[None]], wait_window: int = 1000):
+        self.max_concurrency = max(1, max_concurrency)
+        self._handler = handler
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._waits: deque = deque(maxlen=wait_window)
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.max_wait_seconds = 0.0
+
+    @staticmethod
+    def priority_for(state: SOCWorkflowState) -> int:
+        """Queue rank for a workflow; lower runs first"""
+        severity = getattr(state.alert.severity, "value", state.alert.severity)
+        return SEVERITY_RANK.get(severity, len(SEVERITY_RANK))
+
+    def start(self) -> None:
+        """Start the worker pool on the running event loop (idempotent)"""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_concurrency)]
+        logger.info(f"Alert scheduler started with {self.max_concurrency} workers")
+
+    async def stop(self) -> None:
+        """Cancel workers; queued workflows are dropped"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(self, workflow_id: str, state: SOCWorkflowState) -> None:
+        """Queue a workflow for processing"""
+        self.start()
+        self.submitted += 1
+        await self._queue.put((self.priority_for(state), next(self._seq), time.monotonic(), workflow_id, state))
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            _, _, enqueued_at, workflow_id, state = await self._queue.get()
+            wait = time.monotonic() - enqueued_at
+            self._waits.append(wait)
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.running += 1
+            try:
+                await self._handler(workflow_id, state)
+            except Exception as e:
+                logger.error(f"Scheduler worker {index} failed workflow {workflow_id}: {str(e)}")
+            finally:
+                self.running -= 1
+                self.completed += 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running count and recent wait times"""
+        waits = sorted(self._waits)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "average_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+            "p95_wait_seconds": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
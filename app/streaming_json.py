@@ -0,0 +1,108 @@
+"""
+Streaming JSON - Incremental parser for agent LLM output
+Consumes response text chunk by chunk and reports each top-level field of the
+first JSON object as soon as its value is complete, so verdicts and flags can
+be surfaced before the model finishes writing long reasoning text.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+
+class IncrementalJSONParser:
+    """Reports completed top-level fields of a streamed JSON object.
+
+    Text before the opening brace (prose, markdown fences) is ignored. String,
+    object and array values are reported when they close; numbers, booleans and
+    null when the following ``,`` or ``}`` arrives. Values that fail to decode are
+    skipped - the agent's own parser still validates the complete response.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "object"  # object -> key -> colon -> value -> key ...
+        self._key: Optional[str] = None
+        self._start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the (field, value) pairs completed by it"""
+        completed: List[Tuple[str, Any]] = []
+        self._text += chunk
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._start is not None:
+                        if self._expect == "key":
+                            self._key = self._decode(self._start, i + 1)
+                            self._start = None
+                            self._expect = "colon"
+                        elif self._expect == "value":
+                            self._emit(i + 1, completed)
+                continue
+
+            if self._expect == "object":
+                if ch == "{":
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect in ("key", "value") and self._start is None:
+                    self._start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._expect == "value" and self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._start is not None:
+                    self._emit(i + 1, completed)
+                elif self._depth == 0:
+                    if self._start is not None:
+                        self._emit(i, completed)
+                    self.done = True
+            elif self._depth != 1:
+                continue
+            elif ch == ":":
+                self._expect = "value"
+            elif ch == ",":
+                if self._start is not None:
+                    self._emit(i, completed)
+                self._expect = "key"
+            elif not ch.isspace() and self._expect == "value" and self._start is None:
+                self._start = i
+        return completed
+
+    def _decode(self, start: int, end: int) -> Any:
+        return json.loads(self._text[start:end])
+
+    def _emit(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        start, key = self._start, self._key
+        self._start = None
+        self._key = None
+        self._expect = "next"
+        if key is None:
+            return
+        try:
+            value = self._decode(start, end)
+        except json.JSONDecodeError:
+            return
+        self.fields[key] = value
+        completed.append((key, value))
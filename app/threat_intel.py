@@ -0,0 +1,468 @@
+"""
+Threat Intel Store - Indexed threat intelligence shared by all agents
+Each snapshot indexes one version of the file: exact indicator IPs go into a
+hash map, CIDR ranges (``malicious_ips`` entries with a prefix and
+attack-pattern ``indicators.source_ips``) into sorted, disjoint integer
+intervals searched with bisect, and techniques into an inverted index that
+links parent and sub-techniques (T1110 <-> T1110.003) to attack patterns,
+threat actors and ``mitre_techniques``. IP lookups are O(1) / O(log n) in the
+indicator count. Bulk feeds live in the memory-mapped binary IOC store
+(app.ioc_store, ``ioc_store_path``), which a snapshot consults alongside the
+JSON indexes; its Bloom filter prefilter rejects the many entities that
+match no indicator before the mapped key arrays are probed. Snapshots are
+never mutated: the manager watches the file, builds a new snapshot in a
+worker thread and swaps the reference, so callers holding the old one keep a
+consistent view.
+"""
+
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from app.config import settings
+from app.context import Alert
+from app.ioc_store import IOCStore, parse_cidr, parse_ip, prefilter_stats
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RangeMatch:
+    """An IP falling inside a listed CIDR range"""
+    cidr: str
+    source: str  # "malicious_ips" or "attack_patterns"
+    entry: Dict[str, Any]
+
+
+@dataclass
+class IPMatches:
+    """Threat intel for one IP"""
+    ip: str
+    exact: List[Dict[str, Any]] = field(default_factory=list)
+    ranges: List[RangeMatch] = field(default_factory=list)
+
+    @property
+    def hit(self) -> bool:
+        return bool(self.exact or self.ranges)
+
+
+@dataclass
+class TechniqueMatches:
+    """Threat intel linked to a set of techniques (parents and sub-techniques included)"""
+    patterns: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)  # (matched technique, pattern)
+    actors: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    techniques: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)  # (technique id, mitre entry)
+
+
+def parent_technique(technique: str) -> Optional[str]:
+    """T1110.003 -> T1110; None for a top-level technique"""
+    return technique.split(".", 1)[0] if "." in technique else None
+
+
+def candidate_ips(alert: Alert) -> List[str]:
+    """Source IP plus the SIEM's candidate source IPs for an alert"""
+    ips = [alert.assets.source_ip] + list(((alert.raw_data or {}).get("entities") or {}).get("candidate_source_ips") or [])
+    return [ip for ip in dict.fromkeys(ips) if ip]
+
+
+def candidate_domains(alert: Alert) -> List[str]:
+    """Domains the SIEM extracted for an alert"""
+    entities = (alert.raw_data or {}).get("entities") or {}
+    domains = [entities.get("domain")] + list(entities.get("domains") or [])
+    return [domain for domain in dict.fromkeys(domains) if domain]
+
+
+_EVIDENCE_HOST_FIELDS = ("host", "hostname", "computer", "domain", "fqdn")
+
+
+def _internal_ranges(*cidrs: str) -> Dict[int, List[Tuple[int, int]]]:
+    ranges: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+    for cidr in cidrs:
+        version, start, end = parse_cidr(cidr)
+        ranges[version].append((start, end))
+    return ranges
+
+
+# Loopback, private, link-local, CGNAT and multicast space by IP version; feeds list public indicators
+_INTERNAL_RANGES = _internal_ranges(
+    "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16", "172.16.0.0/12",
+    "192.168.0.0/16", "224.0.0.0/3", "::1/128", "fc00::/7", "fe80::/10", "ff00::/8",
+)
+
+# Event schema (its key tuple) -> (IP fields, host fields); evidence events of one rule share a few schemas
+_evidence_fields: Dict[Tuple[str, ...], Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+
+def is_internal_ip(ip: str) -> bool:
+    """True for private/loopback/link-local/multicast addresses (and unparseable ones)"""
+    parsed = parse_ip(ip)
+    if parsed is None:
+        return True
+    value = parsed[1]
+    for start, end in _INTERNAL_RANGES[parsed[0]]:
+        if start <= value < end:
+            return True
+    return False
+
+
+def _evidence_fields_for(keys: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    fields = (
+        tuple(k for k in keys if k == "ip" or k.endswith("_ip")),
+        tuple(k for k in keys if k in _EVIDENCE_HOST_FIELDS),
+    )
+    if len(_evidence_fields) < 4096:
+        _evidence_fields[keys] = fields
+    return fields
+
+
+def evidence_entities(alert: Alert, ips: bool = True, domains: bool = True) -> Tuple[List[str], List[str]]:
+    """(public IPs, domains) from the alert's assets and every evidence_sample event, deduplicated.
+    Pass ips/domains=False to skip a kind the store has no indicators for.
+    """
+    ip_values = dict.fromkeys((alert.assets.source_ip, alert.assets.destination_ip)) if ips else {}
+    domain_values = dict.fromkeys((alert.assets.host,)) if domains else {}
+    cached = _evidence_fields.get
+    for event in (alert.raw_data or {}).get("evidence_sample") or ():
+        if not isinstance(event, dict):
+            continue
+        keys = tuple(event)
+        ip_fields, host_fields = cached(keys) or _evidence_fields_for(keys)
+        if ips:
+            for key in ip_fields:
+                ip_values[event[key]] = None
+        if domains:
+            for key in host_fields:
+                domain_values[event[key]] = None
+    return (
+        [ip for ip in ip_values if isinstance(ip, str) and ip and not is_internal_ip(ip)],
+        # Bare hostnames (no dot) cannot match a domain indicator
+        [d for d in domain_values if isinstance(d, str) and "." in d],
+    )
+
+
+class _IntervalIndex:
+    """Possibly overlapping integer ranges flattened into disjoint sorted segments"""
+
+    def __init__(self, ranges: List[Tuple[int, int, RangeMatch]]):
+        # Sweep over range boundaries; each segment carries every range covering it
+        boundaries = sorted({start for start, _, _ in ranges} | {end for _, end, _ in ranges})
+        opening: Dict[int, List[RangeMatch]] = {}
+        closing: Dict[int, List[RangeMatch]] = {}
+        for start, end, match in ranges:
+            opening.setdefault(start, []).append(match)
+            closing.setdefault(end, []).append(match)
+
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.matches: List[Tuple[RangeMatch, ...]] = []
+        active: Dict[int, RangeMatch] = {}
+        for i, point in enumerate(boundaries):
+            for match in closing.get(point, ()):
+                active.pop(id(match), None)
+            for match in opening.get(point, ()):
+                active[id(match)] = match
+            if active and i + 1 < len(boundaries):
+                self.starts.append(point)
+                self.ends.append(boundaries[i + 1])
+                self.matches.append(tuple(active.values()))
+
+    def lookup(self, value: int) -> Tuple[RangeMatch, ...]:
+        i = bisect_right(self.starts, value) - 1
+        if i >= 0 and value < self.ends[i]:
+            return self.matches[i]
+        return ()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class ThreatIntelStore:
+    """Immutable indexes over one version of a threat intel document"""
+
+    def __init__(self, data: Dict[str, Any], source: str = "<memory>", version: Optional[str] = None, iocs: Optional[IOCStore] = None):
+        started = time.monotonic()
+        self.source = source
+        self.data = data
+        self.iocs = iocs
+        self.ioc_error: Optional[str] = None  # set by from_file when the IOC store could not be opened
+        self.version = version or "empty"
+        self.last_updated = data.get("last_updated")
+
+        self._exact: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        ranges: Dict[int, List[Tuple[int, int, RangeMatch]]] = {4: [], 6: []}
+        invalid = 0
+        for entry in data.get("malicious_ips", []):
+            indicator = str(entry.get("ip", ""))
+            if "/" in indicator:
+                parsed_range = parse_cidr(indicator)
+                if parsed_range:
+                    version, start, end = parsed_range
+                    ranges[version].append((start, end, RangeMatch(indicator, "malicious_ips", entry)))
+                    continue
+            else:
+                parsed = parse_ip(indicator)
+                if parsed:
+                    self._exact.setdefault(parsed, []).append(entry)
+                    continue
+            invalid += 1
+        for pattern in data.get("attack_patterns", []):
+            for cidr in (pattern.get("indicators") or {}).get("source_ips") or []:
+                parsed_range = parse_cidr(cidr)
+                if parsed_range is None:
+                    invalid += 1
+                    continue
+                version, start, end = parsed_range
+                ranges[version].append((start, end, RangeMatch(cidr, "attack_patterns", pattern)))
+        self._ranges = {version: _IntervalIndex(items) for version, items in ranges.items()}
+        self.range_count = sum(len(items) for items in ranges.values())
+
+        # Exact technique -> entries, and parent technique -> entries listing one of its sub-techniques
+        self._patterns = self._technique_index(data.get("attack_patterns", []), "techniques")
+        self._actors = self._technique_index(data.get("threat_actors", []), "common_ttps")
+        self._mitre: Dict[str, Dict[str, Any]] = data.get("mitre_techniques", {}) or {}
+
+        self.invalid_indicators = invalid
+        self.build_seconds = time.monotonic() - started
+        if invalid:
+            logger.warning(f"Skipped {invalid} invalid IP indicators in {source}")
+
+    @staticmethod
+    def _technique_index(entries: List[Dict[str, Any]], key: str) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]:
+        exact: Dict[str, List[Dict[str, Any]]] = {}
+        by_parent: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            for technique in entry.get(key) or []:
+                exact.setdefault(technique, []).append(entry)
+                parent = parent_technique(technique)
+                if parent:
+                    by_parent.setdefault(parent, []).append(entry)
+        return exact, by_parent
+
+    @classmethod
+    def from_file(cls, path: str, ioc_path: Optional[str] = None) -> "ThreatIntelStore":
+        """Index a threat intel file (plus the IOC store, if built); the version hashes both"""
+        with open(path, "rb") as f:
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:12]
+        iocs, ioc_error = None, None
+        if ioc_path:
+            try:
+                iocs = IOCStore(ioc_path, use_prefilter=settings.threat_intel_prefilter_enabled)
+                version = f"{version}+{iocs.version}"
+            except (OSError, ValueError) as e:
+                # A missing or unreadable IOC store must not take the JSON indicators down with it
+                ioc_error = f"IOC store {ioc_path} unavailable, using {path} only: {type(e).__name__}: {str(e)}"
+                logger.warning(ioc_error)
+        store = cls(json.loads(raw), source=path, version=version, iocs=iocs)
+        store.ioc_error = ioc_error
+        logger.info(f"Indexed threat intel from {path}: {store.stats()}")
+        return store
+
+    def lookup_ip(self, ip: str) -> IPMatches:
+        """Exact and CIDR matches for an IP (invalid IPs match nothing)"""
+        matches = IPMatches(ip=ip)
+        parsed = parse_ip(ip)
+        if parsed is None:
+            return matches
+        matches.exact = list(self._exact.get(parsed, []))
+        matches.ranges = list(self._ranges[parsed[0]].lookup(parsed[1]))
+        if self.iocs:
+            exact, ranged = self.iocs.lookup_ip(ip, parsed)
+            matches.exact.extend(exact)
+            matches.ranges.extend(RangeMatch(record.get("indicator", ""), "ioc_feed", record) for record in ranged)
+        return matches
+
+    def is_listed(self, ip: str) -> bool:
+        parsed = parse_ip(ip)
+        if parsed is None:
+            return False
+        if parsed in self._exact or self._ranges[parsed[0]].lookup(parsed[1]):
+            return True
+        return bool(self.iocs and self.iocs.contains_ip(ip, parsed))
+
+    @property
+    def has_ip_indicators(self) -> bool:
+        counts = self.iocs.counts if self.iocs else {}
+        return bool(self._exact or self.range_count or counts.get("ipv4") or counts.get("ipv6")
+                    or counts.get("ipv4_range_segments") or counts.get("ipv6_range_segments"))
+
+    @property
+    def has_domain_indicators(self) -> bool:
+        return bool(self.iocs and self.iocs.counts.get("domains"))
+
+    def lookup_domain(self, domain: str) -> List[Dict[str, Any]]:
+        """IOC feed records for a domain"""
+        return self.iocs.lookup_domain(domain) if self.iocs else []
+
+    def _related(self, index, technique: str) -> Iterable[Dict[str, Any]]:
+        exact, by_parent = index
+        yield from exact.get(technique, ())
+        yield from by_parent.get(technique, ())  # sub-techniques of a parent
+        parent = parent_technique(technique)
+        if parent:
+            yield from exact.get(parent, ())  # parent of a sub-technique
+
+    def lookup_techniques(self, techniques: Iterable[str]) -> TechniqueMatches:
+        """Patterns, actors and MITRE entries related to the techniques, each listed once"""
+        result = TechniqueMatches()
+        seen_patterns, seen_actors, seen_mitre = set(), set(), set()
+        for technique in techniques:
+            for pattern in self._related(self._patterns, technique):
+                if id(pattern) not in seen_patterns:
+                    seen_patterns.add(id(pattern))
+                    result.patterns.append((technique, pattern))
+            for actor in self._related(self._actors, technique):
+                if id(actor) not in seen_actors:
+                    seen_actors.add(id(actor))
+                    result.actors.append((technique, actor))
+            for technique_id in (technique, parent_technique(technique)):
+                if technique_id and technique_id in self._mitre and technique_id not in seen_mitre:
+                    seen_mitre.add(technique_id)
+                    result.techniques.append((technique_id, self._mitre[technique_id]))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "last_updated": self.last_updated,
+            "exact_ips": len(self._exact),
+            "cidr_ranges": self.range_count,
+            "range_segments": sum(len(index) for index in self._ranges.values()),
+            "attack_patterns": len(self.data.get("attack_patterns", [])),
+            "threat_actors": len(self.data.get("threat_actors", [])),
+            "mitre_techniques": len(self._mitre),
+            "invalid_indicators": self.invalid_indicators,
+            "build_seconds": round(self.build_seconds, 3),
+            "ioc_store": self.iocs.stats() if self.iocs else None,
+            "ioc_store_error": self.ioc_error,
+        }
+
+
+class ThreatIntelManager:
+    """Holds the current snapshot of one threat intel file and swaps in rebuilt ones"""
+
+    def __init__(self, path: str, poll_interval_seconds: float, ioc_path: Optional[str] = None):
+        self.path = path
+        self.ioc_path = ioc_path
+        self.poll_interval_seconds = poll_interval_seconds
+        self._signature = self._file_signature()
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_reload_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        try:
+            self._snapshot = ThreatIntelStore.from_file(path, ioc_path)
+            self.last_error = self._snapshot.ioc_error
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {str(e)}"
+            logger.warning(f"Threat intel from {path} unavailable, starting empty: {self.last_error}")
+            self._snapshot = ThreatIntelStore({}, source=path)
+
+    @property
+    def snapshot(self) -> ThreatIntelStore:
+        """Current snapshot; hold on to it for a consistent view across several lookups"""
+        return self._snapshot
+
+    def _file_signature(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        signature = []
+        for path in (self.path, self.ioc_path):
+            try:
+                stat = os.stat(path) if path else None
+            except OSError:
+                stat = None
+            signature.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+        return tuple(signature)
+
+    async def reload(self, force: bool = False) -> bool:
+        """Rebuild the snapshot off the event loop if the file changed; True if a new version was swapped in"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature and not force:
+                return False
+            self._signature = signature
+            try:
+                store = await asyncio.to_thread(ThreatIntelStore.from_file, self.path, self.ioc_path)
+            except Exception as e:
+                # Missing or half-written file: keep serving the current snapshot until the file changes again
+                self.failed_reloads += 1
+                self.last_error = f"{type(e).__name__}: {str(e)}"
+                logger.warning(f"Threat intel reload from {self.path} failed, keeping version {self._snapshot.version}: {self.last_error}")
+                return False
+            self.last_error = store.ioc_error
+            if store.version == self._snapshot.version:
+                return False
+            previous, self._snapshot = self._snapshot.version, store
+            self.reloads += 1
+            self.last_reload_at = time.time()
+            logger.info(f"Threat intel {self.path} reloaded: version {previous} -> {store.version}")
+            return True
+
+    def start(self) -> None:
+        """Start polling the file on the running event loop (idempotent; disabled when the interval is 0)"""
+        if self._task is None and self.poll_interval_seconds > 0:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval_seconds)
+            await self.reload()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "ioc_store_path": self.ioc_path,
+            "watching": self._task is not None,
+            "poll_interval_seconds": self.poll_interval_seconds,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+            "snapshot": self._snapshot.stats(),
+            "prefilter": get_prefilter_stats(),
+        }
+
+
+def get_prefilter_stats() -> Dict[str, Any]:
+    """IOC store prefilter counters with the observed false-positive rate"""
+    negatives = prefilter_stats["rejected"] + prefilter_stats["false_positives"]
+    return {
+        "enabled": settings.threat_intel_prefilter_enabled,
+        "checks": prefilter_stats["rejected"] + prefilter_stats["passed"],
+        **prefilter_stats,
+        "observed_fp_rate": prefilter_stats["false_positives"] / negatives if negatives else 0.0,
+    }
+
+
+# Global managers keyed by path, shared by the fast path and every orchestrator's agents
+_managers: Dict[str, ThreatIntelManager] = {}
+
+
+def get_threat_intel_manager(path: Optional[str] = None) -> ThreatIntelManager:
+    """Shared manager for a threat intel file, indexed on first use"""
+    path = path or settings.threat_intel_path
+    manager = _managers.get(path)
+    if manager is None:
+        manager = _managers[path] = ThreatIntelManager(
+            path, settings.threat_intel_reload_interval_seconds, settings.ioc_store_path or None
+        )
+    return manager
+
+
+def get_threat_intel_store(path: Optional[str] = None) -> ThreatIntelStore:
+    """Current snapshot of a threat intel file"""
+    return get_threat_intel_manager(path).snapshot
@@ -0,0 +1,234 @@
+"""
+Tracing - Lightweight spans for workflows, orchestrator nodes and LLM calls
+process_alert opens a trace per workflow (the trace id is the workflow id);
+nodes, prompt rendering, LLM calls, parsing and threat-intel lookups open child
+spans. The active span lives in a ContextVar, so tasks spawned inside a span
+(speculative investigation, hedged requests) are parented correctly. Spans
+outside a trace are no-ops. Finished traces go to an in-memory ring buffer
+(GET /api/debug/traces) and, if configured, a size-capped JSON-lines file
+written from a background thread so the event loop never blocks on disk.
+"""
+
+from typing import Dict, Any, Iterator, List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from app.config import settings
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "started_at", "_start", "duration_ms", "status", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_offset_ms": round((self.started_at - self.trace.root.started_at) * 1000, 3),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Finished spans of one workflow, exported when the root span ends"""
+
+    __slots__ = ("trace_id", "root", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        spans = sorted(self.spans, key=lambda s: s.started_at)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": datetime.fromtimestamp(self.root.started_at, tz=timezone.utc).isoformat(),
+            "duration_ms": self.root.duration_ms,
+            "status": self.root.status,
+            "span_count": len(spans),
+            "spans": [span.to_dict() for span in spans],
+        }
+
+
+class RingBufferExporter:
+    """Keeps the most recent traces in memory, keyed by trace id"""
+
+    def __init__(self, max_traces: int):
+        self.max_traces = max(1, max_traces)
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        self._traces[trace["trace_id"]] = trace
+        self._traces.move_to_end(trace["trace_id"])
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        return self._traces.get(trace_id)
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Newest-first trace summaries (without spans)"""
+        traces = list(self._traces.values())[-limit:] if limit > 0 else []
+        return [{k: v for k, v in trace.items() if k != "spans"} for trace in reversed(traces)]
+
+    def clear(self) -> None:
+        self._traces.clear()
+
+
+class JsonLinesExporter:
+    """Appends one JSON line per finished trace to a local file from a writer thread.
+    The file is rotated to ``<name>.1`` when it would exceed ``max_bytes``. If the
+    disk falls behind, traces beyond ``max_pending`` are dropped and counted.
+    """
+
+    def __init__(self, path: str, max_bytes: int, max_pending: int = 1000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(1, max_bytes)
+        self.dropped = 0
+        self._pending: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        try:
+            self._pending.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self) -> None:
+        f, size = None, 0
+        while True:
+            trace = self._pending.get()
+            try:
+                line = (json.dumps(trace, default=str) + "\n").encode("utf-8")
+                if f is None:
+                    f = open(self.path, "ab")
+                    size = f.tell()
+                if size and size + len(line) > self.max_bytes:
+                    f.close()
+                    os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+                    f, size = open(self.path, "ab"), 0
+                f.write(line)
+                f.flush()
+                size += len(line)
+            except Exception as e:
+                logger.warning(f"Writing trace to {self.path} failed: {str(e)}")
+                if f is not None:
+                    f.close()
+                f = None
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporters"""
+
+    def __init__(self, enabled: bool, buffer_size: int, file_path: Optional[str], file_max_bytes: int):
+        self.enabled = enabled
+        self.buffer = RingBufferExporter(buffer_size)
+        self.exporters: List[Any] = [self.buffer]
+        if file_path:
+            try:
+                self.exporters.append(JsonLinesExporter(file_path, file_max_bytes))
+            except OSError as e:
+                logger.warning(f"Trace file {file_path} unavailable, keeping traces in memory only: {str(e)}")
+
+    @contextmanager
+    def trace(self, name: str, trace_id: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Root span of a new trace; exported when the block exits"""
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(trace_id)
+        root = trace.root = Span(trace, name, None, attributes)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.status, root.error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            root.finish()
+            self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Child of the active span; a no-op when no trace is active"""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status, span.error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    def _export(self, trace: Trace) -> None:
+        data = trace.to_dict()
+        for exporter in self.exporters:
+            try:
+                exporter.export(data)
+            except Exception as e:
+                logger.warning(f"Trace exporter {type(exporter).__name__} failed: {str(e)}")
+
+
+def current_span() -> Optional[Span]:
+    """The active span, e.g. to attach attributes discovered mid-operation"""
+    return _current_span.get()
+
+
+# Global tracer shared by the orchestrator, agents and LLM gateway
+tracer = Tracer(
+    enabled=settings.tracing_enabled,
+    buffer_size=settings.tracing_buffer_size,
+    file_path=settings.tracing_file,
+    file_max_bytes=settings.tracing_file_max_mb * 1024 * 1024,
+)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Retry/hedging check against the local fake provider (no network)
+
+Sends the same sequence of LLM calls through the gateway at a seeded
+FakeChatModel whose latency has a slow tail (and optionally injected 503s),
+once with hedging disabled and once enabled, and reports p50/p95/p99 latency,
+failures and how many duplicate requests hedging cost.
+
+    python benchmarks/hedging_check.py --requests 400 --tail-probability 0.05 --tail-latency 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _configure_env() -> None:
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+    os.environ.setdefault("LOG_FILE", "")
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1)]
+
+
+async def _run(args, model_name: str, hedging: bool) -> dict:
+    from langchain.prompts import ChatPromptTemplate
+    from app.config import settings
+    from app.fake_llm import FakeChatModel
+    from app.llm_gateway import ainvoke_llm
+    from app.llm_policy import policy_stats
+
+    settings.llm_hedging_enabled = hedging
+    llm = FakeChatModel(
+        model_name=model_name,
+        latency_seconds=args.latency,
+        latency_distribution="bimodal",
+        tail_probability=args.tail_probability,
+        tail_latency_seconds=args.tail_latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    prompt = ChatPromptTemplate.from_messages([("human", "alert {i}")])
+    before = policy_stats.to_dict()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def call(i: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await ainvoke_llm("triage", llm, prompt, {"i": i}, json.loads)
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(call(i) for i in range(args.requests)))
+    after = policy_stats.to_dict()
+    return {
+        "hedging": hedging,
+        "requests": args.requests,
+        "failed": failures,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "retries": after["retries"] - before["retries"],
+        "hedges": after["hedges"] - before["hedges"],
+        "hedges_won": after["hedges_won"] - before["hedges_won"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="fast-mode latency in seconds")
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=1.0, help="slow-mode latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls failing with a 503")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    _configure_env()
+    from app.config import settings
+    # Hedge after the observed p95, but never sooner than twice the fast mode
+    settings.llm_hedge_min_delay_seconds = args.latency * 2
+    settings.llm_backoff_base_seconds = args.latency
+
+    report = {
+        "without_hedging": asyncio.run(_run(args, "baseline", hedging=False)),
+        "with_hedging": asyncio.run(_run(args, "hedged", hedging=True)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Incident clustering check: expiry while members are in flight (no network)
+
+Runs two related alerts through the orchestrator with incident clustering on,
+and while the founder's investigation is still running sends an unrelated
+alert far enough in the future to close their incident to new members. The
+second member must still reuse the founder's investigation instead of
+quietly running its own. Triage and investigation are stubbed; decision and
+response use the simulated provider. Exits non-zero when the check fails.
+
+    python benchmarks/incident_check.py --investigation-seconds 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _configure_env() -> None:
+    os.environ["LLM_PROVIDER"] = "simulated"
+    os.environ["SIMULATED_BASE_LATENCY_SECONDS"] = "0"
+    os.environ["CORRELATION_ENABLED"] = "true"
+    os.environ["INCIDENT_CLUSTERING_ENABLED"] = "true"
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["SPECULATIVE_INVESTIGATION_ENABLED"] = "false"
+    os.environ["TRIAGE_BATCH_ENABLED"] = "false"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("LOG_FILE", "")
+    os.environ.setdefault("TRACING_FILE", "")
+
+
+async def _run(args) -> dict:
+    from app.config import settings
+    from app.context import Alert, AlertStatus, InvestigationResult, SOCWorkflowState, TriageResult, Verdict
+    from app.incidents import incident_clusterer
+    from app.orchestrator import get_orchestrator
+
+    orchestrator = get_orchestrator()
+    investigated = []
+
+    async def triage(state, event_callback=None):
+        state.status = AlertStatus.TRIAGING
+        state.triage_result = TriageResult(
+            verdict=Verdict.SUSPICIOUS, confidence=0.9, reasoning="check", noise_score=0.1, requires_investigation=True,
+        )
+        return state
+
+    async def investigate(state, event_callback=None):
+        investigated.append(state.alert.alert_id)
+        await asyncio.sleep(args.investigation_seconds)
+        state.status = AlertStatus.INVESTIGATING
+        state.investigation_result = InvestigationResult(findings=["check"], risk_score=5.0)
+        return state
+
+    orchestrator.triage_agent.execute = triage
+    orchestrator.investigation_agent.execute = investigate
+
+    now = datetime.now(timezone.utc) - timedelta(hours=1)
+
+    def state(alert_id: str, host: str, at: datetime) -> SOCWorkflowState:
+        alert = Alert(
+            alert_id=alert_id, rule_id="CHECK", timestamp=at.isoformat(), severity="high",
+            description="incident check", assets={"host": host},
+        )
+        return SOCWorkflowState(alert=alert, workflow_id=f"wf-{alert_id}")
+
+    founder = asyncio.create_task(orchestrator.process_alert(state("founder", "check-host", now)))
+    member = asyncio.create_task(orchestrator.process_alert(state("member", "check-host", now + timedelta(minutes=1))))
+    await asyncio.sleep(0)  # both are assigned to one incident on entry
+    later = now + timedelta(seconds=2 * settings.incident_window_minutes * 60)
+    closer = asyncio.create_task(orchestrator.process_alert(state("closer", "other-host", later)))
+    results = await asyncio.gather(founder, member, closer)
+
+    member_result = results[1].investigation_result
+    shared_from = member_result.shared_from_alert_id if member_result else None
+    return {
+        "same_incident": results[0].incident_id == results[1].incident_id,
+        "member_shared_from": shared_from,
+        "investigations_run": investigated,
+        "open_incidents_after": incident_clusterer.stats()["open_incidents"],
+        "passed": results[0].incident_id == results[1].incident_id and shared_from == "founder"
+                  and investigated.count("member") == 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--investigation-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+
+    _configure_env()
+    report = asyncio.run(_run(args))
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
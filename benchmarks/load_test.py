@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: replay alerts against the API and track completions
+
+Generates alerts from the data/alerts.json templates (each with a unique
+alert_id) and submits them at a target rate through /api/alerts/batch and/or
+/api/upload-alert. Every workflow is followed over its /ws/{workflow_id}
+WebSocket until the final event; per-stage times come from the workflow
+details (agent_processing_seconds). Reports alerts/sec, p50/p95/p99 end-to-end
+latency, per-stage latency and error rate, and writes the report as JSON so
+runs can be compared between versions.
+
+By default the API is started locally (uvicorn subprocess) with the simulated
+LLM provider, so the run needs no network or API key:
+
+    python benchmarks/load_test.py --alerts 200 --rate 20 --endpoint mixed
+    python benchmarks/load_test.py --url http://localhost:8000 --alerts 50 --rate 5
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Simulated provider defaults for the local server; any of these can be overridden from the environment
+LOCAL_SERVER_ENV = {
+    "LLM_PROVIDER": "simulated",
+    "SIMULATED_SEED": "42",
+    "LOG_FILE": "",
+    "LOG_LEVEL": "WARNING",
+    "TRACING_FILE": "",
+    "API_RELOAD": "false",
+    # The client-side limiter is sized for hosted quotas; the simulated provider has none
+    "LLM_REQUESTS_PER_MINUTE": "0",
+    "LLM_TOKENS_PER_MINUTE": "0",
+}
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    # Nearest rank: the smallest value with at least pct% of samples at or below it
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _latency_summary(values: List[float]) -> Dict[str, Any]:
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 1) if value is not None else None
+    return {
+        "count": len(values),
+        "p50_ms": ms(_percentile(values, 50)),
+        "p95_ms": ms(_percentile(values, 95)),
+        "p99_ms": ms(_percentile(values, 99)),
+        "max_ms": ms(max(values)) if values else None,
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _generate_alerts(count: int, templates_path: Path) -> List[Dict[str, Any]]:
+    """Cycle through the templates, giving every alert a unique id"""
+    templates = json.loads(templates_path.read_text())["alerts"]
+    run_tag = f"{int(time.time())}"
+    alerts = []
+    for i in range(count):
+        alert = copy.deepcopy(templates[i % len(templates)])
+        alert["alert_id"] = f"{alert['alert_id']}-lt{run_tag}-{i}"
+        alerts.append(alert)
+    return alerts
+
+
+class WorkflowRecord:
+    """Client-side view of one submitted alert"""
+
+    def __init__(self, alert_id: str, endpoint: str, submitted_at: float):
+        self.alert_id = alert_id
+        self.endpoint = endpoint
+        self.submitted_at = submitted_at
+        self.workflow_id: Optional[str] = None
+        self.completed_at: Optional[float] = None
+        self.status: Optional[str] = None
+        self.error: Optional[str] = None
+        self.stage_seconds: Dict[str, float] = {}
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, base_url: str):
+        self.args = args
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = "ws" + self.base_url[len("http"):]
+        self.records: List[WorkflowRecord] = []
+        self.trackers: List[asyncio.Task] = []
+        self.ws_slots = asyncio.Semaphore(args.max_websockets)
+
+    def _endpoint_for(self, tick: int) -> str:
+        if self.args.endpoint == "mixed":
+            return "batch" if tick % 2 == 0 else "upload"
+        return self.args.endpoint
+
+    async def _submit(self, client, alerts: List[Dict[str, Any]], endpoint: str) -> None:
+        submitted_at = time.monotonic()
+        records = [WorkflowRecord(alert["alert_id"], endpoint, submitted_at) for alert in alerts]
+        self.records.extend(records)
+        try:
+            if endpoint == "batch":
+                body = {"alerts": alerts, "enable_ai": True}
+                if self.args.provider:
+                    body["ai_provider"] = self.args.provider
+                response = await client.post(f"{self.base_url}/api/alerts/batch", json=body)
+            else:
+                files = {"file": ("alerts.json", json.dumps({"alerts": alerts}), "application/json")}
+                response = await client.post(f"{self.base_url}/api/upload-alert", files=files)
+            response.raise_for_status()
+            results = response.json()["workflows"]
+        except Exception as e:
+            for record in records:
+                record.status, record.error = "submit_error", f"{type(e).__name__}: {e}"
+            return
+
+        for record, result in zip(records, results):
+            if "workflow_id" not in result:
+                record.status, record.error = "submit_error", result.get("error", "rejected")
+                continue
+            record.workflow_id = result["workflow_id"]
+            self.trackers.append(asyncio.create_task(self._track(client, record)))
+
+    async def _track(self, client, record: WorkflowRecord) -> None:
+        """Follow the workflow's WebSocket until its final event, then fetch stage timings"""
+        import websockets
+
+        deadline = record.submitted_at + self.args.timeout
+        try:
+            async with self.ws_slots:
+                async with websockets.connect(f"{self.ws_url}/ws/{record.workflow_id}") as ws:
+                    while record.completed_at is None:
+                        message = json.loads(await asyncio.wait_for(ws.recv(), max(0.0, deadline - time.monotonic())))
+                        # A workflow that finished before we connected reports its terminal status on connect
+                        terminal = message.get("type") == "final" or (
+                            message.get("type") == "status" and message.get("status") in ("completed", "failed")
+                        )
+                        if terminal:
+                            record.completed_at = time.monotonic()
+                            record.status = message.get("status")
+        except asyncio.TimeoutError:
+            record.status, record.error = "timeout", f"no final event within {self.args.timeout}s"
+            return
+        except Exception as e:
+            record.status, record.error = "tracking_error", f"{type(e).__name__}: {e}"
+            return
+
+        try:
+            response = await client.get(
+                f"{self.base_url}/api/alerts/status/{record.workflow_id}", params={"include_details": "true"}
+            )
+            data = response.json()
+            record.status = data["workflow"]["status"]
+            if data["workflow"]["errors"]:
+                record.error = "; ".join(data["workflow"]["errors"])
+            record.stage_seconds = (data.get("details") or {}).get("agent_processing_seconds") or {}
+        except Exception as e:
+            record.error = f"status lookup failed: {type(e).__name__}: {e}"
+
+    async def run(self) -> Dict[str, Any]:
+        import httpx
+
+        alerts = _generate_alerts(self.args.alerts, Path(self.args.templates))
+        batch_size = max(1, self.args.batch_size)
+        interval = batch_size / self.args.rate
+        async with httpx.AsyncClient(timeout=self.args.timeout) as client:
+            started = time.monotonic()
+            # Open-loop pacing: submissions follow the schedule regardless of how the server keeps up
+            for tick, offset in enumerate(range(0, len(alerts), batch_size)):
+                delay = started + tick * interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._submit(client, alerts[offset:offset + batch_size], self._endpoint_for(tick))
+            submit_seconds = time.monotonic() - started
+            await asyncio.gather(*self.trackers)
+            metrics = (await client.get(f"{self.base_url}/api/metrics")).json()
+        return self._report(started, submit_seconds, metrics)
+
+    def _report(self, started: float, submit_seconds: float, server_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        completed = [r for r in self.records if r.status == "completed"]
+        failed = [r for r in self.records if r.status != "completed"]
+        end = max((r.completed_at for r in self.records if r.completed_at), default=time.monotonic())
+        elapsed = end - started
+        stages: Dict[str, List[float]] = {}
+        for record in completed:
+            for stage, seconds in record.stage_seconds.items():
+                stages.setdefault(stage, []).append(seconds)
+        errors: Dict[str, int] = {}
+        for record in failed:
+            errors[record.status or "unknown"] = errors.get(record.status or "unknown", 0) + 1
+        return {
+            "run": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_commit": _git_commit(),
+                "base_url": self.base_url,
+                "endpoint": self.args.endpoint,
+                "alerts": self.args.alerts,
+                "target_rate": self.args.rate,
+                "batch_size": self.args.batch_size,
+                "provider": self.args.provider,
+            },
+            "submitted": len(self.records),
+            "completed": len(completed),
+            "failed": len(failed),
+            "error_rate": round(len(failed) / len(self.records), 4) if self.records else 0.0,
+            "errors_by_status": errors,
+            "error_samples": [r.error for r in failed if r.error][:5],
+            "offered_rate": round(len(self.records) / submit_seconds, 2) if submit_seconds > 0 else None,
+            "throughput_alerts_per_second": round(len(completed) / elapsed, 2) if elapsed > 0 else None,
+            "elapsed_seconds": round(elapsed, 2),
+            "end_to_end": _latency_summary([r.completed_at - r.submitted_at for r in completed]),
+            "end_to_end_by_endpoint": {
+                endpoint: _latency_summary([r.completed_at - r.submitted_at for r in completed if r.endpoint == endpoint])
+                for endpoint in sorted({r.endpoint for r in completed})
+            },
+            "stages": {stage: _latency_summary(values) for stage, values in sorted(stages.items())},
+            "server": {
+                "total_cost_usd": server_metrics.get("total_cost_usd"),
+                "usage_by_model": server_metrics.get("usage_by_model"),
+            },
+        }
+
+
+def _start_local_server(port: int) -> subprocess.Popen:
+    env = {**os.environ}
+    for key, value in LOCAL_SERVER_ENV.items():
+        env.setdefault(key, value)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+async def _wait_healthy(base_url: str, timeout: float) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"API at {base_url} did not become healthy within {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="API base URL; omit to start a local server with the simulated provider")
+    parser.add_argument("--alerts", type=int, default=100, help="alerts to submit")
+    parser.add_argument("--rate", type=float, default=10.0, help="target submission rate (alerts/sec)")
+    parser.add_argument("--endpoint", choices=["batch", "upload", "mixed"], default="batch")
+    parser.add_argument("--batch-size", type=int, default=1, help="alerts per request")
+    parser.add_argument("--provider", default=None, help="ai_provider sent with batch requests (e.g. simulated)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-alert completion timeout (seconds)")
+    parser.add_argument("--max-websockets", type=int, default=500, help="concurrent WebSocket connections")
+    parser.add_argument("--templates", default=str(ROOT / "data" / "alerts.json"))
+    parser.add_argument("--output", default=None, help="JSON report path (default: benchmarks/results/load_test_<commit>_<time>.json)")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = _start_local_server(port)
+    try:
+        asyncio.run(_wait_healthy(base_url, timeout=60))
+        report = asyncio.run(LoadTest(args, base_url).run())
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    output = Path(args.output) if args.output else (
+        ROOT / "benchmarks" / "results" / f"load_test_{report['run']['git_commit'] or 'local'}_{int(time.time())}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps({k: v for k, v in report.items() if k not in ("server", "error_samples")}, indent=2))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
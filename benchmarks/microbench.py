@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the per-alert CPU hot paths
+
+Times the code that runs for every alert: payload normalization, Alert
+validation, LangGraph state transport, threat-intel lookup (also against a
+synthetic store of 1M IPs and 100k CIDR ranges), prompt rendering, response
+parsing and list_workflows over 10k/100k stored workflows. Each case
+reports ops/sec (best of several timed rounds) and, from a separate
+tracemalloc pass, peak and retained bytes per operation. Results are compared
+with benchmarks/microbench_baseline.json; a case whose ops/sec drops by more
+than --tolerance (or whose peak allocation grows by more than it) is flagged
+and the script exits non-zero. Throughput baselines are machine-specific:
+record one per machine (or CI runner) with --update-baseline before comparing.
+Rebaselining over a regression needs --reason; the old and new numbers and the
+reason are kept under "accepted_regressions" in the baseline file, so a slowdown
+is never hidden by rewriting the baseline alongside the change that caused it.
+
+    python benchmarks/microbench.py                     # compare against the baseline
+    python benchmarks/microbench.py --only parse        # cases whose name contains "parse"
+    python benchmarks/microbench.py --update-baseline   # record this machine's numbers
+    python benchmarks/microbench.py --update-baseline --only lookup --reason "..."
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "benchmarks" / "microbench_baseline.json"
+
+sys.path.insert(0, str(ROOT))
+
+
+def _configure_env() -> None:
+    # Agents are built against the offline simulated provider; nothing here calls a model
+    os.environ.setdefault("LLM_PROVIDER", "simulated")
+    os.environ.setdefault("LOG_FILE", "")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("TRACING_FILE", "")
+
+
+def _build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(name, zero-argument operation) for every benchmarked path"""
+    import logging
+    logging.disable(logging.WARNING)
+
+    from app import main
+    from app.context import Alert, SOCWorkflowState, TriageResult, DecisionResult, Verdict, Priority, AlertStatus
+    from app.orchestrator import SOCOrchestrator
+    from app.prompt_compaction import render_raw_data
+    from app.threat_intel import ThreatIntelStore
+    from agents.triage_agent import create_triage_agent
+    from agents.investigation_agent import create_investigation_agent
+    from agents.decision_agent import create_decision_agent
+
+    raw_alert = json.loads((ROOT / "data" / "alerts.json").read_text())["alerts"][0]
+    normalized = main._normalize_alert_payload(raw_alert)
+    alert = Alert(**normalized)
+    state = SOCWorkflowState(alert=alert, workflow_id="bench")
+    payload = SOCOrchestrator._state_payload(state)
+
+    triage_agent = create_triage_agent()
+    investigation_agent = create_investigation_agent()
+    decision_agent = create_decision_agent()
+
+    def render_triage_prompt() -> str:
+        raw_data = render_raw_data(alert.raw_data, triage_agent.llm)
+        prompt_vars = {
+            "alert_id": alert.alert_id,
+            "rule_id": alert.rule_id,
+            "rule_name": alert.rule_name or "N/A",
+            "severity": alert.severity,
+            "timestamp": alert.timestamp,
+            "description": alert.description,
+            "tactics": ", ".join(alert.mitre.tactics) if alert.mitre.tactics else "None",
+            "techniques": ", ".join(alert.mitre.techniques) if alert.mitre.techniques else "None",
+            "host": alert.assets.host or "N/A",
+            "source_ip": alert.assets.source_ip or "N/A",
+            "destination_ip": alert.assets.destination_ip or "N/A",
+            "user": alert.assets.user or "N/A",
+            "raw_data": raw_data.text,
+        }
+        return triage_agent.prompt_template.invoke(prompt_vars).to_string()
+
+    triage_response = "Assessment follows.\n" + json.dumps({
+        "verdict": "true_positive", "confidence": 0.92, "noise_score": 0.05, "requires_investigation": True,
+        "key_indicators": ["135 failures across 135 distinct accounts", "External source IP"],
+        "reasoning": "High-volume failures from an external IP matching password spray.",
+    })
+    decision_response = json.dumps({
+        "final_verdict": "true_positive", "priority": "P1", "confidence": 0.9,
+        "rationale": "Confirmed password spray from a known malicious IP.",
+        "recommended_actions": ["Block source IP", "Reset credentials"],
+        "escalation_required": True, "estimated_impact": "HIGH",
+    })
+
+    def stored_workflows(count: int) -> Dict[str, SOCWorkflowState]:
+        # Completed workflows sharing one alert; the decision alternates so filters have work to do
+        stored = {}
+        for i in range(count):
+            decision = DecisionResult(
+                final_verdict=Verdict.TRUE_POSITIVE if i % 2 else Verdict.BENIGN,
+                priority=Priority.P1 if i % 2 else Priority.P5,
+                confidence=0.9, rationale="r", escalation_required=bool(i % 2), estimated_impact="HIGH",
+            )
+            stored[f"wf-{i}"] = state.model_copy(update={
+                "workflow_id": f"wf-{i}", "status": AlertStatus.COMPLETED, "decision_result": decision,
+            })
+        return stored
+
+    def synthetic_threat_intel(ip_count: int, cidr_count: int) -> ThreatIntelStore:
+        rng = random.Random(7)
+        octets = lambda: f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}"
+        return ThreatIntelStore({"malicious_ips": (
+            [{"ip": f"{octets()}.{rng.randrange(256)}"} for _ in range(ip_count)]
+            + [{"ip": f"{octets()}.0/24"} for _ in range(cidr_count)]
+        )})
+
+    threat_intel_1m = synthetic_threat_intel(1_000_000, 100_000)
+    workflows_10k, workflows_100k = stored_workflows(10_000), stored_workflows(100_000)
+    loop = asyncio.new_event_loop()
+
+    def list_workflows(stored: Dict[str, SOCWorkflowState], **filters: Any) -> Callable[[], Any]:
+        def run():
+            main.workflows = stored
+            return loop.run_until_complete(main.list_workflows(**filters))
+        return run
+
+    return [
+        ("normalize_alert_payload", lambda: main._normalize_alert_payload(raw_alert)),
+        ("alert_validation", lambda: Alert(**normalized)),
+        ("state_payload", lambda: SOCOrchestrator._state_payload(state)),
+        ("final_state", lambda: SOCOrchestrator._final_state(payload)),
+        ("threat_intel_lookup", lambda: investigation_agent._get_relevant_threat_intel(state)),
+        ("threat_intel_ip_1m", lambda: threat_intel_1m.lookup_ip(alert.assets.source_ip)),
+        ("threat_intel_ip_miss_1m", lambda: threat_intel_1m.is_listed("10.20.30.40")),
+        ("render_triage_prompt", render_triage_prompt),
+        ("parse_triage_response", lambda: triage_agent._parse_response(triage_response)),
+        ("parse_decision_response", lambda: decision_agent._parse_response(decision_response)),
+        ("triage_result_validation", lambda: TriageResult(**json.loads(triage_response[triage_response.index("{"):]))),
+        ("list_workflows_10k", list_workflows(workflows_10k)),
+        ("list_workflows_10k_filtered", list_workflows(workflows_10k, verdict=Verdict.TRUE_POSITIVE, limit=1000)),
+        ("list_workflows_100k", list_workflows(workflows_100k)),
+        ("list_workflows_100k_filtered", list_workflows(workflows_100k, priority=Priority.P3)),
+    ]
+
+
+def _time_case(op: Callable[[], Any], min_round_seconds: float, rounds: int) -> float:
+    """Best ops/sec over ``rounds`` rounds of at least ``min_round_seconds`` each"""
+    op()  # warm caches and lazy imports
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds:
+            break
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_round_seconds / elapsed) + 1))
+    best = elapsed / iterations
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        best = min(best, (time.perf_counter() - started) / iterations)
+    return 1.0 / best
+
+
+def _measure_allocations(op: Callable[[], Any], iterations: int) -> Dict[str, int]:
+    """Peak bytes allocated while one op runs and bytes still held after it (averaged)"""
+    op()
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = op()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+            del result
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes_per_op": peak_total // iterations,
+        "retained_bytes_per_op": max(0, retained - baseline) // iterations,
+    }
+
+
+def _compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        result["baseline_ops_per_sec"] = reference["ops_per_sec"]
+        result["ops_change"] = round(result["ops_per_sec"] / reference["ops_per_sec"] - 1, 3)
+        if result["ops_per_sec"] < reference["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']:.0f} ops/s vs baseline {reference['ops_per_sec']:.0f}")
+        reference_peak = reference.get("peak_bytes_per_op")
+        if reference_peak and result["peak_bytes_per_op"] > reference_peak * (1 + tolerance):
+            regressions.append(f"{name}: peak {result['peak_bytes_per_op']} B/op vs baseline {reference_peak}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help="run only cases whose name contains this substring")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-round-seconds", type=float, default=0.2)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative slowdown / allocation growth")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--reason", help="why regressions are accepted (required to rebaseline over one)")
+    parser.add_argument("--output", help="also write the full results to this JSON file")
+    args = parser.parse_args()
+
+    _configure_env()
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, op in _build_cases():
+        if args.only and args.only not in name:
+            continue
+        ops = _time_case(op, args.min_round_seconds, args.rounds)
+        results[name] = {"ops_per_sec": round(ops, 1), "us_per_op": round(1e6 / ops, 2), **_measure_allocations(op, args.alloc_iterations)}
+        print(f"{name:32s} {ops:12.1f} ops/s {results[name]['us_per_op']:12.2f} us/op "
+              f"{results[name]['peak_bytes_per_op']:10d} B peak/op")
+
+    baseline_path = Path(args.baseline)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results,
+    }
+    if args.update_baseline:
+        previous = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        existing = previous.get("cases", {})
+        accepted = previous.get("accepted_regressions", [])
+        regressions = _compare(results, existing, args.tolerance)
+        if regressions and not args.reason:
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            sys.exit("Refusing to rebaseline over regressions without --reason")
+        for line in regressions:
+            accepted.append({"date": datetime.now(timezone.utc).date().isoformat(), "regression": line, "reason": args.reason})
+        for result in results.values():
+            result.pop("baseline_ops_per_sec", None)
+            result.pop("ops_change", None)
+        updated = {**report, "cases": {**existing, **results}}
+        if accepted:
+            updated["accepted_regressions"] = accepted
+        baseline_path.write_text(json.dumps(updated, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return
+
+    regressions = []
+    if baseline_path.exists():
+        regressions = _compare(results, json.loads(baseline_path.read_text())["cases"], args.tolerance)
+    report["regressions"] = regressions
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
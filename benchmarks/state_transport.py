@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+State transport benchmark: JSON round-trip vs. shared model instances (no network)
+
+Runs the full LangGraph workflow in mock mode (enable_ai=False, no agent delay)
+for an alert whose evidence_sample is padded to N rows, once with the legacy
+transport (state dumped to JSON and parsed back before ainvoke, so every node
+re-validates the plain dict, and model_validate at the end) and once with the
+current transport, and reports the average cost per workflow.
+
+    python benchmarks/state_transport.py --rows 10 100 500 --workflows 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _configure_env() -> None:
+    os.environ["MOCK_DATA_DELAY"] = "0"
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    # The same alert is replayed every run; an ever-growing correlation index would bill the later phase
+    os.environ["CORRELATION_ENABLED"] = "false"
+    os.environ["INCIDENT_CLUSTERING_ENABLED"] = "false"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("LOG_FILE", "")
+
+
+def _build_alert(rows: int):
+    from app.main import _normalize_alert_payload
+    from app.context import Alert
+
+    with open("data/alerts.json", "r") as f:
+        raw = json.load(f)["alerts"][0]
+    sample = raw["evidence_sample"]
+    raw = dict(raw, evidence_sample=[dict(sample[i % len(sample)]) for i in range(rows)])
+    return Alert(**_normalize_alert_payload(raw))
+
+
+async def _run(orchestrator, alert, workflows: int) -> float:
+    from app.context import SOCWorkflowState
+
+    started = time.perf_counter()
+    for i in range(workflows):
+        state = SOCWorkflowState(alert=alert, workflow_id=f"bench-{i}", enable_ai=False)
+        final_state = await orchestrator.process_alert(state)
+        assert final_state.decision_result is not None, final_state.errors
+    return (time.perf_counter() - started) / workflows * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 500], help="evidence_sample rows per alert")
+    parser.add_argument("--workflows", type=int, default=50, help="workflows per measurement")
+    args = parser.parse_args()
+
+    _configure_env()
+    logging_disable()
+    from app.context import SOCWorkflowState
+    from app.orchestrator import SOCOrchestrator
+
+    class LegacyTransportOrchestrator(SOCOrchestrator):
+        """Previous transport: full JSON round-trip in, model_validate out"""
+
+        @staticmethod
+        def _state_payload(state):
+            return json.loads(state.model_dump_json())
+
+        @staticmethod
+        def _final_state(result):
+            return SOCWorkflowState.model_validate(result)
+
+    legacy, current = LegacyTransportOrchestrator(), SOCOrchestrator()
+    report = []
+    for rows in args.rows:
+        alert = _build_alert(rows)
+        # Warm up both graphs before timing
+        asyncio.run(_run(legacy, alert, 2))
+        asyncio.run(_run(current, alert, 2))
+        legacy_ms = asyncio.run(_run(legacy, alert, args.workflows))
+        current_ms = asyncio.run(_run(current, alert, args.workflows))
+        report.append({
+            "evidence_rows": rows,
+            "json_round_trip_ms_per_workflow": round(legacy_ms, 3),
+            "shared_instances_ms_per_workflow": round(current_ms, 3),
+            "speedup": round(legacy_ms / current_ms, 2) if current_ms else None,
+        })
+    print(json.dumps(report, indent=2))
+
+
+def logging_disable() -> None:
+    import logging
+    logging.disable(logging.INFO)
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,9 @@ Reasoning: {triage_reasoning}
 THREAT INTELLIGENCE:
 {threat_intel}
 
+RELATED ALERTS (shared host, source IP, user or rule within the correlation window):
+{related_alerts}
+
 RAW DATA:
 {raw_data}
 
@@ -90,6 +93,44 @@ Provide your triage assessment in the following JSON format:
 }}
 """
 
+# Triage Agent batched human prompt (micro-batched triage during alert storms)
+TRIAGE_BATCH_HUMAN_PROMPT = """Analyze each of the following {alert_count} alerts independently and provide a triage assessment for every one:
+
+{alerts}
+
+Return a JSON array with exactly one object per alert, in the same order, using this format:
+[
+    {{
+        "alert_id": "the Alert ID exactly as given",
+        "verdict": "true_positive|false_positive|benign|suspicious|unknown",
+        "confidence": 0.0-1.0,
+        "noise_score": 0.0-1.0,
+        "requires_investigation": true|false,
+        "key_indicators": ["indicator1", "indicator2", ...],
+        "reasoning": "Your 2-3 sentence explanation"
+    }},
+    ...
+]
+"""
+
+# Per-alert section rendered into TRIAGE_BATCH_HUMAN_PROMPT (filled with str.format)
+TRIAGE_BATCH_ALERT_BLOCK = """=== ALERT {index} ===
+Alert ID: {alert_id}
+Rule ID: {rule_id}
+Rule Name: {rule_name}
+Severity: {severity}
+Timestamp: {timestamp}
+Description: {description}
+Tactics: {tactics}
+Techniques: {techniques}
+Host: {host}
+Source IP: {source_ip}
+Destination IP: {destination_ip}
+User: {user}
+Raw Data:
+{raw_data}
+"""
+
 # Decision Agent human prompt
 DECISION_HUMAN_PROMPT = """Make final decision on this alert based on complete analysis:
 